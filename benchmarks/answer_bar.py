@@ -0,0 +1,98 @@
+"""Compare the LaTeX compile time of the two answer-bar styles on the pset demo.
+
+Renders the solution copy of ``demo/pset`` once with ``style.answer-bar`` set
+to ``tcolorbox`` (breakable tcolorbox with TikZ overlays) and once with
+``rule`` (plain ``\\vrule``). Then it times cold LaTeX builds of each: every build
+starts from an empty directory, so all passes are counted. The exercises are
+repeated ``--copies`` times so the document holds enough solutions for the
+bar to matter. Needs a LaTeX installation.
+
+Usage::
+
+    uv run python benchmarks/answer_bar.py [--copies 20] [--repeat 3] [--engine lualatex]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+import json
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+from texsmith.core.conversion.service import ConversionService
+
+from texsmith_template_exam.dual import build_request
+
+
+DEMO = Path(__file__).resolve().parents[1] / "demo" / "pset"
+STYLES = ("tcolorbox", "rule")
+
+
+def write_source(workdir: Path, copies: int) -> tuple[list[Path], int]:
+    """Write the demo with its exercises repeated; return the inputs and solution count."""
+    text = (DEMO / "pset.md").read_text(encoding="utf-8")
+    _, front_matter, body = text.split("---\n", 2)
+    source = workdir / "pset.md"
+    source.write_text(f"---\n{front_matter}---\n" + body * copies, encoding="utf-8")
+    config = workdir / "config.yml"
+    config.write_text((DEMO / "config.yml").read_text(encoding="utf-8"), encoding="utf-8")
+    return [config, source], body.count("!!! solution") * copies
+
+
+def measure(
+    style: str, inputs: list[Path], workdir: Path, repeat: int, engine: str | None
+) -> dict[str, object]:
+    service = ConversionService()
+    request = build_request(
+        inputs, attributes={"solution": True, "style": {"answer-bar": style}}, service=service
+    )
+    timings = []
+    for run in range(repeat):
+        response = service.execute(replace(request, render_dir=workdir / style / f"run-{run}"))
+        start = time.perf_counter()
+        result = service.build_pdf(response.render_result, engine=engine)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"LaTeX build failed for {style}: see {result.log_path}")
+    return {
+        "style": style,
+        "median_s": round(statistics.median(timings), 3),
+        "min_s": round(min(timings), 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copies", type=int, default=20, help="repetitions of the exercises")
+    parser.add_argument("--repeat", type=int, default=3, help="cold builds per style")
+    parser.add_argument("--engine", help="LaTeX engine (template default: lualatex)")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    with tempfile.TemporaryDirectory(prefix="exam-answer-bar-") as tmp:
+        workdir = Path(tmp)
+        inputs, solutions = write_source(workdir, args.copies)
+        out.write(f"{solutions} solutions, {args.repeat} cold builds per style\n")
+        out.write(f"{'style':>10} {'median s':>9} {'min s':>7}\n")
+        results = []
+        for style in STYLES:
+            result = measure(style, inputs, workdir, args.repeat, args.engine)
+            results.append(result)
+            out.write(f"{style:>10} {result['median_s']:>9} {result['min_s']:>7}\n")
+            out.flush()
+
+    baseline, candidate = (result["median_s"] for result in results)
+    out.write(f"rule / tcolorbox: {candidate / baseline:.2f}\n")
+    if args.json:
+        payload = {"solutions": solutions, "results": results}
+        args.json.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""Measure what reusing form XObjects for answer fillers saves on student copies.
+
+Writes an exam whose parts reserve answer space with lines and grids. For each
+text style (dotted, lines) it builds the student copy cold twice: once as
+rendered (every distinct filler row is a form XObject drawn once and referenced
+afterwards) and once with ``\\texsmithformsfalse`` added to the preamble (every
+row is drawn as plain rules, as exam.cls does). For each build it reports the
+median compile time and the PDF size. Needs a LaTeX installation.
+
+Usage::
+
+    uv run python benchmarks/answer_fillers.py [--questions 40] [--repeat 3] [--engine lualatex]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import replace
+import json
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+
+from texsmith.core.conversion.service import ConversionService
+
+from texsmith_template_exam.dual import build_request
+
+
+VARIANTS = ("plain", "forms")
+_FILLERS = ("{ lines=4 }", "{ lines=10 }", "{ grid=6cm }")
+
+
+def write_source(workdir: Path, questions: int) -> list[Path]:
+    """Write an exam with ``questions`` questions of three filler-backed parts each."""
+    lines = ["---", "title: Answer fillers", "language: en", "exam:", "  points: false", "---", ""]
+    for question in range(questions):
+        lines += [f"## Question {question + 1}", ""]
+        for filler in _FILLERS:
+            lines += ["### -", "", "Explain your answer.", "", f"!!! solution {filler}", ""]
+            lines += ["    The expected answer.", ""]
+    source = workdir / "fillers.md"
+    source.write_text("\n".join(lines), encoding="utf-8")
+    return [source]
+
+
+def measure(
+    variant: str,
+    text_style: str,
+    inputs: list[Path],
+    workdir: Path,
+    repeat: int,
+    engine: str | None,
+) -> dict[str, object]:
+    service = ConversionService()
+    request = build_request(inputs, attributes={"style": {"text": text_style}}, service=service)
+    timings = []
+    size = 0
+    for run in range(repeat):
+        render_dir = workdir / f"{text_style}-{variant}" / f"run-{run}"
+        response = service.execute(replace(request, render_dir=render_dir))
+        if variant == "plain":
+            main_tex = response.render_result.main_tex_path
+            tex = main_tex.read_text(encoding="utf-8")
+            tex = tex.replace("\\begin{document}", "\\texsmithformsfalse\n\\begin{document}", 1)
+            main_tex.write_text(tex, encoding="utf-8")
+        start = time.perf_counter()
+        result = service.build_pdf(response.render_result, engine=engine)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"LaTeX build failed for {variant}: see {result.log_path}")
+        size = result.pdf_path.stat().st_size
+    return {
+        "variant": variant,
+        "text": text_style,
+        "median_s": round(statistics.median(timings), 3),
+        "pdf_kib": round(size / 1024, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=40, help="questions in the exam")
+    parser.add_argument("--repeat", type=int, default=3, help="cold builds per variant")
+    parser.add_argument("--engine", help="LaTeX engine (template default: lualatex)")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout
+    results = []
+    with tempfile.TemporaryDirectory(prefix="exam-answer-fillers-") as tmp:
+        workdir = Path(tmp)
+        inputs = write_source(workdir, args.questions)
+        out.write(f"{args.questions * len(_FILLERS)} fillers, {args.repeat} cold builds each\n")
+        out.write(f"{'text':>7} {'variant':>8} {'median s':>9} {'PDF KiB':>8}\n")
+        for text_style in ("dotted", "lines"):
+            for variant in VARIANTS:
+                result = measure(variant, text_style, inputs, workdir, args.repeat, args.engine)
+                results.append(result)
+                out.write(
+                    f"{text_style:>7} {variant:>8} {result['median_s']:>9} {result['pdf_kib']:>8}\n"
+                )
+                out.flush()
+
+    for plain, forms in zip(results[::2], results[1::2], strict=True):
+        out.write(
+            f"{plain['text']}: forms / plain time {forms['median_s'] / plain['median_s']:.2f},"
+            f" size {forms['pdf_kib'] / plain['pdf_kib']:.2f}\n"
+        )
+    if args.json:
+        payload = {"questions": args.questions, "results": results}
+        args.json.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,193 @@
+"""Generate synthetic exam sources for benchmarks.
+
+Each exam mixes every construct the exam renderer handles: nested question /
+part / subpart headings, fill-in blanks, multiple-choice task lists,
+``!!! solution`` blocks (plain, lines, grid, box), fenced code and math. The
+output is deterministic for a given seed.
+
+Usage::
+
+    uv run python benchmarks/exam_corpus.py -o build/corpus --questions 10 40 160
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+import random
+import sys
+
+
+_WORDS = (
+    "algorithm",
+    "array",
+    "binary",
+    "cache",
+    "compiler",
+    "graph",
+    "hash",
+    "heap",
+    "integer",
+    "kernel",
+    "latency",
+    "matrix",
+    "memory",
+    "network",
+    "node",
+    "pointer",
+    "process",
+    "queue",
+    "recursion",
+    "register",
+    "scheduler",
+    "stack",
+    "string",
+    "thread",
+    "tree",
+    "vector",
+)
+
+_SOLUTION_OPTIONS = ("", " { lines=3 }", " { grid=3cm }", " { box=4cm }")
+
+
+@dataclass(frozen=True, slots=True)
+class CorpusSpec:
+    """Shape of a generated exam."""
+
+    questions: int = 10
+    depth: int = 2
+    parts: int = 2
+    fillin_density: float = 0.3
+    choices: int = 5
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"exam-q{self.questions}-d{self.depth}-s{self.seed}"
+
+
+class _Writer:
+    def __init__(self, spec: CorpusSpec) -> None:
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.lines: list[str] = []
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choice(_WORDS) for _ in range(count))
+
+    def sentence(self) -> str:
+        parts = []
+        for _ in range(self.rng.randint(6, 14)):
+            if self.rng.random() < self.spec.fillin_density / 4:
+                answer = self.words(self.rng.randint(1, 2))
+                width = f"{{w={self.rng.choice((20, 30, 50))}}}" if self.rng.random() < 0.5 else ""
+                parts.append(f"[{answer}]{width}")
+            else:
+                parts.append(self.rng.choice(_WORDS))
+        return " ".join(parts).capitalize() + "."
+
+    def emit(self, *lines: str) -> None:
+        self.lines.extend(lines)
+
+    def block(self, level: int, index: int) -> None:
+        heading = "#" * (level + 2)
+        title = "-" if self.rng.random() < 0.5 else self.words(2).title()
+        points = f" {{ points={self.rng.randint(1, 6)} }}" if level == 0 else ""
+        self.emit(f"{heading} {title}{points}", "", self.sentence(), "")
+
+        kind = (index + level) % 5
+        if kind == 0:
+            self.choice_list()
+        elif kind == 1:
+            self.code_block()
+        elif kind == 2:
+            self.emit("$$", r"\sum_{k=0}^{n} \binom{n}{k} x^k = (1 + x)^n", "$$", "")
+            self.emit(f"Let $f(x) = x^{self.rng.randint(2, 9)}$. {self.sentence()}", "")
+        else:
+            self.emit(self.sentence(), "")
+
+        self.solution()
+
+        if level < self.spec.depth:
+            for child in range(self.spec.parts):
+                self.block(level + 1, index + child)
+
+    def choice_list(self) -> None:
+        correct = self.rng.randrange(self.spec.choices)
+        for choice in range(self.spec.choices):
+            mark = "x" if choice == correct else " "
+            self.emit(f"- [{mark}] {self.words(self.rng.randint(1, 3))}")
+        self.emit("")
+
+    def code_block(self) -> None:
+        name = self.rng.choice(_WORDS)
+        self.emit(
+            "```python",
+            f"def {name}(items):",
+            f"    return [x for x in items if x > {self.rng.randint(0, 99)}]",
+            "```",
+            "",
+        )
+
+    def solution(self) -> None:
+        option = self.rng.choice(_SOLUTION_OPTIONS)
+        self.emit(f"!!! solution{option}", "", f"    {self.sentence()}", "")
+
+
+def generate_exam(spec: CorpusSpec) -> str:
+    """Return the Markdown source of an exam matching ``spec``."""
+    writer = _Writer(spec)
+    writer.emit(
+        "---",
+        f"title: Synthetic exam {spec.name}",
+        "language: en",
+        "exam:",
+        "  course: Benchmarks",
+        "---",
+        "",
+    )
+    for index in range(spec.questions):
+        writer.block(0, index)
+    return "\n".join(writer.lines)
+
+
+def write_corpus(output_dir: Path, specs: list[CorpusSpec]) -> list[Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for spec in specs:
+        path = output_dir / f"{spec.name}.md"
+        path.write_text(generate_exam(spec), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", type=Path, default=Path("build/corpus"))
+    parser.add_argument("--questions", type=int, nargs="+", default=[10, 40, 160])
+    parser.add_argument("--depth", type=int, default=2, help="part/subpart nesting (0-2)")
+    parser.add_argument("--parts", type=int, default=2, help="children per heading")
+    parser.add_argument("--fillin-density", type=float, default=0.3)
+    parser.add_argument("--choices", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    specs = [
+        CorpusSpec(
+            questions=count,
+            depth=args.depth,
+            parts=args.parts,
+            fillin_density=args.fillin_density,
+            choices=args.choices,
+            seed=args.seed,
+        )
+        for count in args.questions
+    ]
+    for path in write_corpus(args.output, specs):
+        sys.stdout.write(f"{path}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""Measure how fill-in placeholder replacement scales with document size.
+
+Builds synthetic HTML with nested sections, code blocks and raw LaTeX, then
+times the ``render_fillin_placeholders`` handler at increasing sizes. LaTeX
+escaping of answers is stubbed out so the numbers reflect the tree traversal
+only.
+
+Usage::
+
+    uv run python benchmarks/fillin_scaling.py [--depth 8] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from texsmith_template_exam import exam_renderer
+
+
+class _Config:
+    legacy_latex_accents = False
+
+
+class _Context:
+    def __init__(self) -> None:
+        self.runtime: dict[str, object] = {}
+        self.config = _Config()
+
+
+def build_document(sections: int, depth: int) -> str:
+    chunks: list[str] = []
+    for index in range(sections):
+        inner = (
+            f"<p>Answer {index}: [{index}]{{w=20}} and some <em>text</em>.</p>"
+            "<p>Plain paragraph without placeholders.</p>"
+            f"<pre><code>items[{index}] = [x]{{w=5}}</code></pre>"
+            f"<div class='latex-raw'>[{index}]{{w=5}}</div>"
+        )
+        for _ in range(depth):
+            inner = f"<div>{inner}</div>"
+        chunks.append(f"<section>{inner}</section>")
+    return "".join(chunks)
+
+
+def measure(sections: int, depth: int, repeat: int) -> tuple[int, float]:
+    html = build_document(sections, depth)
+    best = float("inf")
+    nodes = 0
+    for _ in range(repeat):
+        soup = BeautifulSoup(html, "html.parser")
+        nodes = sum(1 for _ in soup.descendants)
+        start = time.perf_counter()
+        exam_renderer.render_fillin_placeholders(soup, _Context())
+        best = min(best, time.perf_counter() - start)
+    return nodes, best
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=8, help="nesting depth of each section")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size (best is kept)")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 200, 400, 800, 1600], help="section counts"
+    )
+    args = parser.parse_args(argv)
+
+    exam_renderer.render_moving_text = lambda text, *_args, **_kwargs: text
+
+    out = sys.stdout
+    out.write(f"{'sections':>8} {'nodes':>8} {'ms':>9} {'us/node':>8}\n")
+    for sections in args.sizes:
+        nodes, elapsed = measure(sections, args.depth, args.repeat)
+        out.write(f"{sections:>8} {nodes:>8} {elapsed * 1e3:>9.2f} {elapsed * 1e6 / nodes:>8.3f}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+"""Measure end-to-end render throughput of the exam template.
+
+Generates synthetic exams (see ``exam_corpus.py``) and renders them through
+the real TeXSmith conversion pipeline with the exam renderer and template, in
+both student and solution mode. For each size it reports documents per
+second, the time spent in each stage (Markdown parse, every render-engine
+phase, template wrapping) and the tracemalloc peak of one extra render.
+No LaTeX engine is run.
+
+Usage::
+
+    uv run python benchmarks/render_throughput.py [--questions 5 20 80] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import defaultdict
+from collections.abc import Iterator
+import contextlib
+from dataclasses import dataclass, field, replace
+import json
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from exam_corpus import CorpusSpec, write_corpus
+from texsmith.core.context import RenderContext
+from texsmith.core.conversion.service import ConversionService
+from texsmith.core.rules import RenderEngine
+
+from texsmith_template_exam.dual import VARIANTS, build_request
+
+
+@dataclass(slots=True)
+class StageTimer:
+    """Accumulate wall time per pipeline stage."""
+
+    totals: dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    _phase: str | None = None
+    _phase_start: float = 0.0
+
+    def add(self, stage: str, elapsed: float) -> None:
+        self.totals[stage] += elapsed
+
+    def _close_phase(self) -> None:
+        if self._phase is not None:
+            self.add(self._phase, time.perf_counter() - self._phase_start)
+            self._phase = None
+
+    @contextlib.contextmanager
+    def instrument(self) -> Iterator[None]:
+        """Time render-engine phases by hooking ``enter_phase`` and ``run``."""
+        original_enter = RenderContext.enter_phase
+        original_run = RenderEngine.run
+        timer = self
+
+        def enter_phase(context: RenderContext, phase: object) -> None:
+            timer._close_phase()
+            timer._phase = f"phase:{getattr(phase, 'name', phase).lower()}"
+            timer._phase_start = time.perf_counter()
+            original_enter(context, phase)
+
+        def run(engine: RenderEngine, root: object, context: RenderContext) -> None:
+            try:
+                original_run(engine, root, context)
+            finally:
+                timer._close_phase()
+
+        RenderContext.enter_phase = enter_phase  # type: ignore[method-assign]
+        RenderEngine.run = run  # type: ignore[method-assign]
+        try:
+            yield
+        finally:
+            RenderContext.enter_phase = original_enter  # type: ignore[method-assign]
+            RenderEngine.run = original_run  # type: ignore[method-assign]
+
+
+def render_once(service: ConversionService, source: Path, output: Path, timer: StageTimer) -> None:
+    request = build_request([source], service=service)
+
+    start = time.perf_counter()
+    prepared = service.prepare_documents(request)
+    timer.add("markdown", time.perf_counter() - start)
+
+    for name, solution in VARIANTS:
+        variant = replace(
+            request,
+            render_dir=output / name,
+            template_options={**request.template_options, "solution": solution},
+        )
+        phases_before = sum(v for k, v in timer.totals.items() if k.startswith("phase:"))
+        start = time.perf_counter()
+        service.execute(variant, prepared=prepared)
+        elapsed = time.perf_counter() - start
+        phases = sum(v for k, v in timer.totals.items() if k.startswith("phase:"))
+        timer.add("template", elapsed - (phases - phases_before))
+
+
+def measure(spec: CorpusSpec, repeat: int, workdir: Path) -> dict[str, object]:
+    (source,) = write_corpus(workdir / "corpus", [spec])
+    service = ConversionService()
+    render_once(service, source, workdir / "warmup", StageTimer())
+
+    timer = StageTimer()
+    start = time.perf_counter()
+    with timer.instrument():
+        for run in range(repeat):
+            render_once(service, source, workdir / f"run-{run}", timer)
+    elapsed = time.perf_counter() - start
+
+    # tracemalloc slows allocations down considerably, so memory is sampled
+    # on a separate render rather than during the timed ones.
+    tracemalloc.start()
+    render_once(service, source, workdir / "traced", StageTimer())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "document": source.name,
+        "questions": spec.questions,
+        "bytes": source.stat().st_size,
+        "docs_per_sec": round(repeat / elapsed, 3),
+        "seconds_per_doc": round(elapsed / repeat, 4),
+        "peak_mib": round(peak / 2**20, 2),
+        "stages_ms": {
+            stage: round(total * 1e3 / repeat, 2)
+            for stage, total in sorted(timer.totals.items(), key=lambda item: -item[1])
+        },
+    }
+
+
+def format_row(result: dict[str, object]) -> str:
+    stages = ", ".join(f"{name} {ms}" for name, ms in result["stages_ms"].items())
+    return (
+        f"{result['questions']:>9} {result['bytes']:>8} {result['docs_per_sec']:>9} "
+        f"{result['peak_mib']:>9}  {stages}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fillin-density", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=3, help="renders per size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    out = sys.stdout
+    out.write(f"{'questions':>9} {'bytes':>8} {'docs/sec':>9} {'peak MiB':>9}  stages (ms/doc)\n")
+    with tempfile.TemporaryDirectory(prefix="exam-bench-") as tmp:
+        for questions in args.questions:
+            spec = CorpusSpec(
+                questions=questions,
+                depth=args.depth,
+                fillin_density=args.fillin_density,
+                seed=args.seed,
+            )
+            result = measure(spec, args.repeat, Path(tmp) / spec.name)
+            results.append(result)
+            out.write(format_row(result) + "\n")
+            out.flush()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,284 @@
+"""Render many exams from a manifest on a pool of pre-warmed worker processes."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+from dataclasses import dataclass, field, replace
+from importlib import import_module
+import os
+from pathlib import Path
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from texsmith.core.conversion.service import ConversionService
+from texsmith.core.templates.runtime import TemplateRuntime, load_template_runtime
+from texsmith.core.templates.session import TemplateSession
+
+from .compilecache import CompileCache
+from .dual import DEFAULT_TEMPLATE, _build_pdf, build_request
+from .formats import FormatCache
+from .passes import PassPlanner
+
+
+if TYPE_CHECKING:
+    from texsmith.core.conversion.models import ConversionRequest
+    from texsmith.core.diagnostics import DiagnosticEmitter
+
+
+@dataclass(frozen=True, slots=True)
+class BatchJob:
+    """One render: sources (optionally preceded by a YAML config) into ``output``."""
+
+    name: str
+    sources: tuple[Path, ...]
+    output: Path
+    config: Path | None = None
+    attributes: Mapping[str, Any] = field(default_factory=dict)
+    template: str = DEFAULT_TEMPLATE
+    build: bool = False
+    engine: str | None = None
+    format_cache: Path | None = None
+    compile_cache: Path | None = None
+    max_passes: int | None = None
+
+    def inputs(self) -> list[Path]:
+        return [*([self.config] if self.config else []), *self.sources]
+
+
+@dataclass(frozen=True, slots=True)
+class BatchResult:
+    """Outcome of a :class:`BatchJob`."""
+
+    index: int
+    name: str
+    ok: bool
+    elapsed: float
+    worker: int
+    main_tex: Path | None = None
+    pdf: Path | None = None
+    passes: int | None = None
+    error: str | None = None
+
+
+ProgressCallback = Callable[[BatchResult, int, int], None]
+
+_SERVICE: ConversionService | None = None
+_FORMAT_CACHES: dict[Path, FormatCache] = {}
+_COMPILE_CACHES: dict[Path, CompileCache] = {}
+_RUNTIMES: dict[str, TemplateRuntime] = {}
+_RUNTIMES_LOCK = threading.Lock()
+
+
+def resident_runtime(template: str) -> TemplateRuntime:
+    """Return the template runtime for ``template``, loading it on first use."""
+    with _RUNTIMES_LOCK:
+        runtime = _RUNTIMES.get(template)
+        if runtime is None:
+            runtime = _RUNTIMES[template] = load_template_runtime(template)
+        return runtime
+
+
+class ResidentConversionService(ConversionService):
+    """:class:`ConversionService` that loads each template runtime only once."""
+
+    @staticmethod
+    def _initialise_template_session(
+        template: str,
+        *,
+        settings: ConversionRequest,
+        emitter: DiagnosticEmitter,
+    ) -> TemplateSession:
+        return TemplateSession(resident_runtime(str(template)), settings=settings, emitter=emitter)
+
+
+def load_manifest(path: Path) -> list[BatchJob]:
+    """Read a YAML manifest with optional ``defaults`` and a ``jobs`` list.
+
+    Relative paths are resolved against the manifest directory. Job
+    ``attributes`` are merged over the default ones.
+    """
+    import yaml
+
+    path = Path(path)
+    payload = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    if not isinstance(payload, Mapping) or not isinstance(payload.get("jobs"), list):
+        raise ValueError(f"{path}: expected a mapping with a 'jobs' list.")  # noqa: TRY004
+    defaults = payload.get("defaults") or {}
+    if not isinstance(defaults, Mapping):
+        raise ValueError(f"{path}: 'defaults' must be a mapping.")  # noqa: TRY004
+
+    base = path.parent
+    jobs: list[BatchJob] = []
+    for index, raw in enumerate(payload["jobs"], start=1):
+        if not isinstance(raw, Mapping):
+            raise ValueError(f"{path}: job #{index} must be a mapping.")  # noqa: TRY004
+        entry = {**defaults, **raw}
+        sources = entry.get("sources")
+        if isinstance(sources, str):
+            sources = [sources]
+        if not sources or not entry.get("output"):
+            raise ValueError(f"{path}: job #{index} needs 'sources' and 'output'.")
+        config = entry.get("config")
+        format_cache = entry.get("format_cache")
+        compile_cache = entry.get("compile_cache")
+        jobs.append(
+            BatchJob(
+                name=str(entry.get("name") or f"job-{index}"),
+                sources=tuple(base / str(source) for source in sources),
+                output=base / str(entry["output"]),
+                config=base / str(config) if config else None,
+                attributes={
+                    **(defaults.get("attributes") or {}),
+                    **(raw.get("attributes") or {}),
+                },
+                template=str(entry.get("template") or DEFAULT_TEMPLATE),
+                build=bool(entry.get("build", False)),
+                engine=entry.get("engine"),
+                format_cache=base / str(format_cache) if format_cache else None,
+                compile_cache=base / str(compile_cache) if compile_cache else None,
+                max_passes=int(entry["max_passes"]) if entry.get("max_passes") else None,
+            )
+        )
+    return jobs
+
+
+def warm_worker() -> None:
+    """Load the exam template runtime and Markdown engines for this process's jobs.
+
+    Jobs share a :class:`ResidentConversionService`, so the template runtime
+    loaded here is reused by every job. TeXSmith builds a fresh renderer per
+    document, so for the renderer only its modules are imported up front.
+    """
+    global _SERVICE
+    from texsmith.core.templates.base import TemplateError
+
+    from .markdown import render_exam_markdown
+
+    for module in ("texsmith.adapters.latex.renderer", f"{__package__}.exam_renderer"):
+        import_module(module)
+    _SERVICE = ResidentConversionService()
+    # Jobs report template errors themselves.
+    with contextlib.suppress(OSError, TemplateError):
+        resident_runtime(DEFAULT_TEMPLATE)
+    render_exam_markdown("warm-up")
+
+
+def _formats(directory: Path | None) -> FormatCache | None:
+    if directory is None:
+        return None
+    cache = _FORMAT_CACHES.get(directory)
+    if cache is None:
+        cache = _FORMAT_CACHES.setdefault(directory, FormatCache(directory))
+    return cache
+
+
+def _compiled(directory: Path | None) -> CompileCache | None:
+    if directory is None:
+        return None
+    cache = _COMPILE_CACHES.get(directory)
+    if cache is None:
+        cache = _COMPILE_CACHES.setdefault(directory, CompileCache(directory))
+    return cache
+
+
+def run_job(
+    job: BatchJob,
+    index: int = 0,
+    service: ConversionService | None = None,
+) -> BatchResult:
+    """Render ``job``, capturing failures in the result instead of raising."""
+    service = service or _SERVICE or ConversionService()
+    planner = PassPlanner(job.max_passes) if job.max_passes else None
+    start = time.perf_counter()
+    try:
+        request = build_request(
+            job.inputs(),
+            template=job.template,
+            attributes=job.attributes,
+            service=service,
+        )
+        response = service.execute(replace(request, render_dir=job.output))
+        pdf = (
+            _build_pdf(
+                service,
+                response,
+                engine=job.engine,
+                formats=_formats(job.format_cache),
+                compiled=_compiled(job.compile_cache),
+                planner=planner,
+            )
+            if job.build
+            else None
+        )
+    except Exception as exc:
+        return BatchResult(
+            index=index,
+            name=job.name,
+            ok=False,
+            elapsed=time.perf_counter() - start,
+            worker=os.getpid(),
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    main_tex = response.render_result.main_tex_path
+    report = planner.report_for(main_tex) if planner is not None else None
+    return BatchResult(
+        index=index,
+        name=job.name,
+        ok=True,
+        elapsed=time.perf_counter() - start,
+        worker=os.getpid(),
+        main_tex=main_tex,
+        pdf=pdf,
+        passes=report.passes if report is not None else None,
+    )
+
+
+def run_batch(
+    jobs: Iterable[BatchJob],
+    *,
+    workers: int | None = None,
+    progress: ProgressCallback | None = None,
+    service: ConversionService | None = None,
+) -> list[BatchResult]:
+    """Run ``jobs`` and return their results in submission order.
+
+    Jobs are dispatched to ``workers`` processes (default: CPU count), each
+    warmed up by :func:`warm_worker`. ``progress`` is called as soon as a job
+    finishes with the result, the number of finished jobs and the total.
+    ``workers=0`` renders in the current process, optionally with ``service``.
+    """
+    jobs = list(jobs)
+    total = len(jobs)
+    results: list[BatchResult | None] = [None] * total
+
+    def _record(result: BatchResult) -> None:
+        results[result.index] = result
+        if progress is not None:
+            progress(result, sum(item is not None for item in results), total)
+
+    if workers == 0:
+        for index, job in enumerate(jobs):
+            _record(run_job(job, index, service))
+        return results  # type: ignore[return-value]
+
+    max_workers = min(workers or os.cpu_count() or 1, total) or 1
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=warm_worker) as pool:
+        futures = [pool.submit(run_job, job, index) for index, job in enumerate(jobs)]
+        for future in as_completed(futures):
+            _record(future.result())
+    return results  # type: ignore[return-value]
+
+
+__all__ = [
+    "BatchJob",
+    "BatchResult",
+    "ResidentConversionService",
+    "load_manifest",
+    "resident_runtime",
+    "run_batch",
+    "run_job",
+    "warm_worker",
+]
@@ -0,0 +1,407 @@
+"""Command line entry point for exam-specific build workflows."""
+
+from __future__ import annotations
+
+import argparse
+from collections.abc import Iterable, Sequence
+import contextlib
+from dataclasses import replace
+import os
+from pathlib import Path
+import sys
+import time
+from typing import TYPE_CHECKING, Any
+
+from .defaults import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_HOST,
+    DEFAULT_INTERVAL,
+    DEFAULT_MAX_PASSES,
+    DEFAULT_PORT,
+    DEFAULT_QUEUE_TIMEOUT,
+    DEFAULT_TEMPLATE,
+    QUESTION_CACHE_ENV,
+)
+
+
+# Subcommands import their modules when they run: each pulls in texsmith, which
+# takes longer to import than a short quiz takes to render.
+if TYPE_CHECKING:
+    from .batch import BatchResult
+    from .compilecache import CompileCache
+    from .formats import FormatCache
+    from .passes import PassPlanner
+    from .watch import WatchRebuild
+
+
+def _coerce_attribute_value(raw: str) -> Any:
+    candidate = raw.strip()
+    lowered = candidate.lower()
+    if lowered in {"true", "false"}:
+        return lowered == "true"
+    for cast in (int, float):
+        try:
+            return cast(candidate)
+        except ValueError:
+            continue
+    return candidate
+
+
+def parse_attributes(values: Iterable[str] | None) -> dict[str, Any]:
+    """Parse ``key=value`` pairs the same way ``texsmith -a`` does."""
+    attributes: dict[str, Any] = {}
+    for raw in values or ():
+        key, sep, value = raw.partition("=")
+        parts = [chunk for chunk in key.strip().split(".") if chunk]
+        if not sep or not parts:
+            raise ValueError(f"Invalid attribute override '{raw}', expected key=value.")
+        cursor = attributes
+        for part in parts[:-1]:
+            nested = cursor.setdefault(part, {})
+            if not isinstance(nested, dict):
+                raise ValueError(  # noqa: TRY004
+                    f"Invalid attribute override '{raw}', '{part}' is already a value."
+                )
+            cursor = nested
+        cursor[parts[-1]] = _coerce_attribute_value(value)
+    return attributes
+
+
+def _add_render_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("inputs", nargs="+", type=Path, help="config.yml and Markdown sources")
+    parser.add_argument("-t", "--template", default=DEFAULT_TEMPLATE, help="template name or path")
+    parser.add_argument("-o", "--output", type=Path, default=Path("build"), help="output directory")
+    parser.add_argument(
+        "-a",
+        "--attribute",
+        action="append",
+        dest="attributes",
+        metavar="KEY=VALUE",
+        help="template attribute override (repeatable)",
+    )
+    parser.add_argument("--build", action="store_true", help="compile the PDFs")
+    parser.add_argument("--engine", default=None, help="LaTeX engine (defaults to the template's)")
+    _add_cache_arguments(parser)
+    _add_pass_arguments(parser)
+
+
+def _add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--format-cache",
+        type=Path,
+        nargs="?",
+        const=True,
+        default=None,
+        metavar="DIR",
+        help="compile from precompiled preamble formats stored in DIR "
+        "(default: the texsmith cache directory)",
+    )
+    parser.add_argument(
+        "--compile-cache",
+        type=Path,
+        nargs="?",
+        const=True,
+        default=None,
+        metavar="DIR",
+        help="reuse cached PDFs of unchanged documents stored in DIR "
+        "(default: the texsmith cache directory)",
+    )
+
+
+def _add_pass_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-passes",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_PASSES,
+        default=None,
+        metavar="N",
+        help="run LaTeX pass by pass instead of latexmk, stopping once the auxiliary "
+        f"files are stable, and report the passes (at most N, default: {DEFAULT_MAX_PASSES})",
+    )
+
+
+def _pass_planner(value: int | None) -> PassPlanner | None:
+    from .passes import PassPlanner
+
+    if value is None:
+        return None
+    return PassPlanner(value)
+
+
+def _format_cache(value: Path | bool | None) -> FormatCache | None:
+    from .formats import FormatCache
+
+    if value is None:
+        return None
+    return FormatCache(None if value is True else value)
+
+
+def _compile_cache(value: Path | bool | None) -> CompileCache | None:
+    from .compilecache import CompileCache
+
+    if value is None:
+        return None
+    return CompileCache(None if value is True else value)
+
+
+def _run_dual(args: argparse.Namespace) -> int:
+    from .dual import build_request, render_dual
+
+    planner = _pass_planner(args.max_passes)
+    request = build_request(
+        args.inputs,
+        template=args.template,
+        attributes=parse_attributes(args.attributes),
+    )
+    result = render_dual(
+        request,
+        args.output,
+        build=args.build,
+        engine=args.engine,
+        formats=_format_cache(args.format_cache),
+        compiled=_compile_cache(args.compile_cache),
+        planner=planner,
+    )
+    for name, response in result.responses().items():
+        sys.stdout.write(f"{name}: {response.render_result.main_tex_path}\n")
+    for pdf in (result.student_pdf, result.solution_pdf):
+        if pdf is not None:
+            sys.stdout.write(f"pdf: {pdf}\n")
+    if planner is not None:
+        for response in result.responses().values():
+            main_tex = response.render_result.main_tex_path
+            report = planner.report_for(main_tex)
+            if report is not None:
+                sys.stdout.write(f"passes: {main_tex} {report.describe()}\n")
+    return 0
+
+
+def _report_progress(result: BatchResult, done: int, total: int) -> None:
+    status = "ok" if result.ok else "FAILED"
+    detail = result.pdf or result.main_tex if result.ok else result.error
+    passes = f", LaTeX passes: {result.passes}" if result.passes is not None else ""
+    sys.stdout.write(
+        f"[{done}/{total}] {result.name}: {status} in {result.elapsed:.2f}s "
+        f"(pid {result.worker}{passes}) {detail}\n"
+    )
+    sys.stdout.flush()
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    from .batch import load_manifest, run_batch
+
+    jobs = load_manifest(args.manifest)
+    if args.format_cache is not None:
+        directory = _format_cache(args.format_cache).directory
+        jobs = [replace(job, format_cache=directory) for job in jobs]
+    if args.compile_cache is not None:
+        directory = _compile_cache(args.compile_cache).directory
+        jobs = [replace(job, compile_cache=directory) for job in jobs]
+    if args.max_passes is not None:
+        if args.max_passes < 1:
+            raise ValueError("--max-passes must be at least 1.")
+        jobs = [replace(job, max_passes=args.max_passes) for job in jobs]
+    start = time.perf_counter()
+    results = run_batch(jobs, workers=args.jobs, progress=_report_progress)
+    failed = [result for result in results if not result.ok]
+    sys.stdout.write(
+        f"{len(results) - len(failed)}/{len(results)} jobs succeeded "
+        f"in {time.perf_counter() - start:.2f}s\n"
+    )
+    return 1 if failed else 0
+
+
+def _run_variants(args: argparse.Namespace) -> int:
+    from .variants import ShuffleOptions, write_variants
+
+    if args.count < 1:
+        raise ValueError("--count must be at least 1.")
+    options = ShuffleOptions(
+        choices=not args.keep_choices,
+        questions=args.shuffle_questions,
+        parts=args.shuffle_parts,
+    )
+    answers = write_variants(args.sources, args.output, args.count, seed=args.seed, options=options)
+    sys.stdout.write(f"{args.count} variants in {args.output}\nanswers: {answers}\n")
+    return 0
+
+
+def _report_rebuild(result: WatchRebuild) -> None:
+    changed = ", ".join(path.name for path in result.changed) or "initial build"
+    stamp = time.strftime("%H:%M:%S")
+    if result.ok:
+        outputs = result.pdfs or result.main_tex
+        passes = "".join(f", {name} passes: {count}" for name, count in result.passes.items())
+        sys.stdout.write(
+            f"[{stamp}] {changed}: {', '.join(outputs)} in {result.elapsed:.2f}s "
+            f"(edit to {'PDF' if result.pdfs else 'TeX'} {result.latency:.2f}s{passes})\n"
+        )
+    else:
+        sys.stdout.write(f"[{stamp}] {changed}: FAILED {result.error}\n")
+    sys.stdout.flush()
+
+
+def _run_watch(args: argparse.Namespace) -> int:
+    from .watch import ExamWatcher
+
+    os.environ.setdefault(QUESTION_CACHE_ENV, "1")
+    variants = ("exam", "solution") if args.variant == "both" else (args.variant,)
+    watcher = ExamWatcher(
+        args.inputs,
+        args.output,
+        template=args.template,
+        attributes=parse_attributes(args.attributes),
+        variants=variants,
+        build=args.build,
+        engine=args.engine,
+        formats=_format_cache(True if args.format_cache is None else args.format_cache),
+        compiled=_compile_cache(True if args.compile_cache is None else args.compile_cache),
+        planner=_pass_planner(args.max_passes),
+        interval=args.interval,
+        debounce=args.debounce,
+    )
+    sys.stdout.write(f"watching {len(watcher.paths)} files, press Ctrl+C to stop\n")
+    with contextlib.suppress(KeyboardInterrupt):
+        watcher.run(_report_rebuild)
+    return 0
+
+
+def _run_serve(args: argparse.Namespace) -> int:
+    from .server import RenderServer, make_server
+
+    os.environ.setdefault(QUESTION_CACHE_ENV, "1")
+    app = RenderServer(
+        max_concurrent=args.jobs,
+        queue_timeout=args.queue_timeout,
+        template=args.template,
+        formats=_format_cache(args.format_cache),
+        compiled=_compile_cache(args.compile_cache),
+        planner=_pass_planner(args.max_passes),
+    )
+    app.warm()
+    server = make_server(
+        app, host=args.host, port=args.port, socket_path=args.socket, verbose=args.verbose
+    )
+    where = args.socket or "http://{}:{}".format(*server.server_address[:2])
+    sys.stdout.write(f"serving on {where} ({app.max_concurrent} concurrent renders)\n")
+    sys.stdout.flush()
+    try:
+        with contextlib.suppress(KeyboardInterrupt):
+            server.serve_forever()
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="texsmith-exam", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dual = commands.add_parser(
+        "dual", help="render the student and solution variants from a single parse"
+    )
+    _add_render_arguments(dual)
+    dual.set_defaults(handler=_run_dual)
+
+    batch = commands.add_parser(
+        "batch", help="render every job of a YAML manifest on warm worker processes"
+    )
+    batch.add_argument("manifest", type=Path, help="YAML manifest with a 'jobs' list")
+    batch.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="worker processes (default: CPU count, 0 renders in-process)",
+    )
+    _add_cache_arguments(batch)
+    _add_pass_arguments(batch)
+    batch.set_defaults(handler=_run_batch)
+
+    variants = commands.add_parser(
+        "variants", help="write seeded shuffled variants of Markdown sources and an answer map"
+    )
+    variants.add_argument("sources", nargs="+", type=Path, help="Markdown sources, in order")
+    variants.add_argument("-n", "--count", type=int, default=4, help="number of variants")
+    variants.add_argument("-s", "--seed", default="0", help="seed shared by all variants")
+    variants.add_argument(
+        "-o", "--output", type=Path, default=Path("variants"), help="output directory"
+    )
+    variants.add_argument(
+        "--shuffle-questions", action="store_true", help="also shuffle top-level questions"
+    )
+    variants.add_argument(
+        "--shuffle-parts", action="store_true", help="also shuffle parts within a question"
+    )
+    variants.add_argument(
+        "--keep-choices", action="store_true", help="keep choices in their written order"
+    )
+    variants.set_defaults(handler=_run_variants)
+
+    watch = commands.add_parser(
+        "watch", help="rebuild the exam whenever its sources or config change"
+    )
+    _add_render_arguments(watch)
+    watch.add_argument(
+        "--variant",
+        choices=("exam", "solution", "both"),
+        default="both",
+        help="variants to rebuild (default: both)",
+    )
+    watch.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help=f"seconds between polls (default: {DEFAULT_INTERVAL})",
+    )
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f"seconds without edits before rebuilding (default: {DEFAULT_DEBOUNCE})",
+    )
+    watch.set_defaults(handler=_run_watch)
+
+    serve = commands.add_parser(
+        "serve", help="serve renders over a local HTTP API with warm caches"
+    )
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"bind address ({DEFAULT_HOST})")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port ({DEFAULT_PORT})")
+    serve.add_argument(
+        "--socket", type=Path, default=None, help="listen on this Unix socket instead"
+    )
+    serve.add_argument("-t", "--template", default=DEFAULT_TEMPLATE, help="template name or path")
+    serve.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="concurrent renders (default: CPU count)",
+    )
+    serve.add_argument(
+        "--queue-timeout",
+        type=float,
+        default=DEFAULT_QUEUE_TIMEOUT,
+        help="seconds a request waits for a render slot before 503 "
+        f"(default: {DEFAULT_QUEUE_TIMEOUT:g})",
+    )
+    serve.add_argument("--verbose", action="store_true", help="log every request")
+    _add_cache_arguments(serve)
+    _add_pass_arguments(serve)
+    serve.set_defaults(handler=_run_serve)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (ValueError, RuntimeError) as exc:
+        parser.error(str(exc))
+    return 1
+
+
+if __name__ == "__main__":  # pragma: no cover - manual invocation
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+"""Content-addressed cache of compiled PDFs.
+
+A rendered exam is keyed by everything LaTeX reads: the main ``.tex`` and its
+fragments, the template assets (``heiglogo.sty``, ``columen.sty``), generated
+packages and fonts in the render directory, the images it references, and the
+engine. When a rebuild produces the same inputs, the cached PDF is copied back
+and LaTeX is not run at all.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+import hashlib
+import os
+from pathlib import Path
+import re
+import shutil
+import threading
+
+from texsmith.adapters.latex.engines import EngineResult
+from texsmith.core.templates.session import TemplateRenderResult
+from texsmith.core.user_dir import get_user_dir
+
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+_GRAPHICS_PATTERN = re.compile(r"\\includegraphics\s*(?:\[[^\]]*\])?\s*\{(?P<path>[^{}]+)\}")
+_IMAGE_ARGUMENT_PATTERN = re.compile(r"\{(?P<path>[^{}\s]+\.(?:pdf|png|jpe?g|eps|svg))\}", re.I)
+_IMAGE_SUFFIXES = ("", ".pdf", ".png", ".jpg", ".jpeg", ".eps")
+_PACKAGE_SUFFIXES = (".sty", ".cls", ".def", ".cfg", ".bib", ".bst")
+
+
+def _referenced_images(texts: Iterable[str], workdir: Path) -> list[Path]:
+    images: set[Path] = set()
+    for text in texts:
+        candidates = [m["path"] for m in _GRAPHICS_PATTERN.finditer(text)]
+        candidates += [m["path"] for m in _IMAGE_ARGUMENT_PATTERN.finditer(text)]
+        for candidate in candidates:
+            if "#" in candidate or "\\" in candidate:
+                continue
+            base = workdir / candidate.strip()
+            for suffix in _IMAGE_SUFFIXES:
+                path = base.with_name(base.name + suffix) if suffix else base
+                if path.is_file():
+                    images.add(path)
+                    break
+    return sorted(images)
+
+
+def compile_key(render_result: TemplateRenderResult, engine: str | None = None) -> str:
+    """Return the content hash of everything ``render_result`` compiles from."""
+    main_tex = render_result.main_tex_path
+    workdir = main_tex.parent
+    sources = [main_tex, *render_result.fragment_paths]
+    texts = [path.read_text(encoding="utf-8") for path in sources]
+
+    inputs = {*render_result.fragment_paths, *render_result.asset_paths}
+    inputs.update(
+        path for path in workdir.iterdir() if path.suffix in _PACKAGE_SUFFIXES and path.is_file()
+    )
+    fonts = workdir / "fonts"
+    if fonts.is_dir():
+        inputs.update(path for path in fonts.rglob("*") if path.is_file())
+    if render_result.bibliography_path:
+        inputs.add(render_result.bibliography_path)
+    inputs.update(_referenced_images(texts, workdir))
+
+    digest = hashlib.sha256()
+    header = (
+        engine or render_result.template_engine or "",
+        str(bool(render_result.requires_shell_escape)),
+        texts[0],
+    )
+    for part in header:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for path in sorted(inputs):
+        try:
+            name = path.relative_to(workdir).as_posix()
+        except ValueError:
+            name = path.as_posix()
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CompileCache:
+    """Directory of PDFs keyed by :func:`compile_key`, capped at ``max_bytes``.
+
+    Hits refresh the entry's modification time; when the cache grows past its
+    cap, the least recently used PDFs are removed first.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = Path(directory) if directory else get_user_dir().cache_dir("pdf")
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def restore(self, key: str, target: Path) -> bool:
+        entry = self._entry(key)
+        try:
+            shutil.copyfile(entry, target)
+            os.utime(entry)
+        except OSError:
+            return False
+        return True
+
+    def store(self, key: str, pdf: Path) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self._entry(key)
+        staging = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            shutil.copyfile(pdf, staging)
+            staging.replace(entry)
+        except OSError:
+            staging.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used PDFs until the cache fits ``max_bytes``."""
+        entries = []
+        for path in self.directory.glob("*.pdf"):
+            try:
+                info = path.stat()
+            except OSError:
+                continue
+            entries.append((info.st_mtime_ns, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def build_pdf(
+        self,
+        render_result: TemplateRenderResult,
+        build: Callable[[], EngineResult],
+        *,
+        engine: str | None = None,
+    ) -> EngineResult:
+        """Restore the PDF of ``render_result`` from the cache, or ``build`` and store it."""
+        key = compile_key(render_result, engine)
+        main_tex = render_result.main_tex_path
+        pdf = main_tex.with_suffix(".pdf")
+        if self.restore(key, pdf):
+            with self._lock:
+                self.hits += 1
+            return EngineResult(
+                returncode=0,
+                messages=[],
+                command=[],
+                log_path=main_tex.with_suffix(".log"),
+                pdf_path=pdf,
+            )
+
+        with self._lock:
+            self.misses += 1
+        result = build()
+        if result.returncode == 0 and result.pdf_path.exists():
+            self.store(key, result.pdf_path)
+        return result
+
+
+__all__ = [
+    "DEFAULT_MAX_BYTES",
+    "CompileCache",
+    "compile_key",
+]
@@ -0,0 +1,36 @@
+"""Defaults shared by the CLI and the modules it dispatches to.
+
+Kept free of texsmith imports so that building the argument parser (and
+``texsmith-exam --help``) does not load the renderer.
+"""
+
+from __future__ import annotations
+
+
+DEFAULT_TEMPLATE = "exam"
+
+QUESTION_CACHE_ENV = "TEXSMITH_EXAM_QUESTION_CACHE"
+
+# ``watch``: seconds between polls, and seconds without edits before rebuilding.
+DEFAULT_INTERVAL = 0.25
+DEFAULT_DEBOUNCE = 0.3
+
+# Most LaTeX passes the pass planner runs before giving up on a document.
+DEFAULT_MAX_PASSES = 5
+
+# ``serve``
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+
+__all__ = [
+    "DEFAULT_DEBOUNCE",
+    "DEFAULT_HOST",
+    "DEFAULT_INTERVAL",
+    "DEFAULT_MAX_PASSES",
+    "DEFAULT_PORT",
+    "DEFAULT_QUEUE_TIMEOUT",
+    "DEFAULT_TEMPLATE",
+    "QUESTION_CACHE_ENV",
+]
@@ -0,0 +1,146 @@
+"""Render the student and solution variants of an exam from a single parse."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any
+
+from texsmith.adapters.latex.engines import EngineResult
+from texsmith.core.conversion.models import ConversionRequest
+from texsmith.core.conversion.service import ConversionResponse, ConversionService
+
+from .compilecache import CompileCache
+from .defaults import DEFAULT_TEMPLATE
+from .formats import FormatCache
+from .logocache import LOGO_CACHE
+from .markdown import exam_markdown_extensions
+from .passes import PassPlanner
+
+
+# Output sub-directory and value of the ``solution`` attribute for each variant.
+VARIANTS: tuple[tuple[str, bool], ...] = (("exam", False), ("solution", True))
+
+
+@dataclass(slots=True)
+class DualRenderResult:
+    """Template responses (and optional PDFs) for both variants of an exam."""
+
+    student: ConversionResponse
+    solution: ConversionResponse
+    student_pdf: Path | None = None
+    solution_pdf: Path | None = None
+
+    def responses(self) -> dict[str, ConversionResponse]:
+        return {"exam": self.student, "solution": self.solution}
+
+
+def build_request(
+    inputs: Iterable[Path],
+    *,
+    template: str = DEFAULT_TEMPLATE,
+    attributes: Mapping[str, Any] | None = None,
+    service: ConversionService | None = None,
+) -> ConversionRequest:
+    """Build a conversion request the same way ``texsmith render`` would.
+
+    A leading ``config.yml`` (or any YAML file) is used as shared front matter,
+    mirroring the demo Makefiles.
+    """
+    service = service or ConversionService()
+    split = service.split_inputs([Path(path) for path in inputs])
+    if not split.documents:
+        raise ValueError("No Markdown or HTML sources were provided.")
+    return ConversionRequest(
+        documents=split.documents,
+        bibliography_files=split.bibliography_files,
+        front_matter=split.front_matter,
+        front_matter_path=split.front_matter_path,
+        markdown_extensions=exam_markdown_extensions(),
+        template=template,
+        template_options=dict(attributes or {}),
+        embed_fragments=len(split.documents) == 1,
+    )
+
+
+def render_dual(
+    request: ConversionRequest,
+    output_dir: Path,
+    *,
+    build: bool = False,
+    engine: str | None = None,
+    service: ConversionService | None = None,
+    formats: FormatCache | None = None,
+    compiled: CompileCache | None = None,
+    planner: PassPlanner | None = None,
+) -> DualRenderResult:
+    """Render ``request`` once per variant while parsing the sources only once.
+
+    The Markdown sources are converted to HTML a single time; both template
+    sessions render the same prepared documents and only differ by the
+    ``solution`` attribute. Outputs land in ``<output_dir>/exam`` and
+    ``<output_dir>/solution``. With ``formats``, PDFs are compiled from cached
+    preamble formats; with ``compiled``, unchanged documents reuse their
+    cached PDF without running LaTeX; with ``planner``, LaTeX passes stop as
+    soon as the auxiliary files are stable.
+    """
+    service = service or ConversionService()
+    prepared = service.prepare_documents(request)
+    output_dir = Path(output_dir)
+
+    responses: dict[str, ConversionResponse] = {}
+    for name, solution in VARIANTS:
+        variant_request = replace(
+            request,
+            render_dir=output_dir / name,
+            template_options={**request.template_options, "solution": solution},
+        )
+        responses[name] = service.execute(variant_request, prepared=prepared)
+
+    result = DualRenderResult(student=responses["exam"], solution=responses["solution"])
+    if build:
+        caches = {"formats": formats, "compiled": compiled, "planner": planner}
+        result.student_pdf = _build_pdf(service, result.student, engine=engine, **caches)
+        result.solution_pdf = _build_pdf(service, result.solution, engine=engine, **caches)
+    return result
+
+
+def _build_pdf(
+    service: ConversionService,
+    response: ConversionResponse,
+    *,
+    engine: str | None,
+    formats: FormatCache | None = None,
+    compiled: CompileCache | None = None,
+    planner: PassPlanner | None = None,
+) -> Path | None:
+    render_result = response.render_result
+    LOGO_CACHE.place(render_result.main_tex_path)
+
+    def build() -> EngineResult:
+        if formats is not None:
+            return formats.build_pdf(service, render_result, engine=engine, planner=planner)
+        if planner is not None:
+            return planner.build_pdf(service, render_result, engine=engine)
+        return service.build_pdf(render_result, engine=engine)
+
+    if compiled is not None:
+        engine_result = compiled.build_pdf(render_result, build, engine=engine)
+    else:
+        engine_result = build()
+    if engine_result.returncode != 0:
+        raise RuntimeError(
+            f"LaTeX build failed for {response.render_result.main_tex_path} "
+            f"(exit code {engine_result.returncode})."
+        )
+    return engine_result.pdf_path
+
+
+__all__ = [
+    "DEFAULT_TEMPLATE",
+    "VARIANTS",
+    "DualRenderResult",
+    "build_request",
+    "render_dual",
+]
@@ -2,38 +2,115 @@
 
 from __future__ import annotations
 
-from collections.abc import Mapping
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
 from datetime import datetime, timezone
-from functools import lru_cache
 from pathlib import Path
 import re
 import sys as _sys
+import threading
 from typing import Any
 
+from jinja2 import Environment, pass_context
 from texsmith.adapters.latex.renderer import LaTeXRenderer
-from texsmith.adapters.markdown import render_markdown
 from texsmith.core.templates.base import WrappableTemplate
 
-from texsmith_template_exam.exam import version as exam_version
-from texsmith_template_exam.markdown import exam_markdown_extensions
+from texsmith_template_exam.exam.environment import init_shared_template
+from texsmith_template_exam.exam.points import point_macros
+from texsmith_template_exam.logocache import logo_file_name
+from texsmith_template_exam.markdown import render_exam_markdown
 
 
 __init__ = _sys.modules[__name__]
 
 
+# Raw LaTeX comment inserted between fragments when a list is converted in one
+# pass. It goes through the renderer untouched, so the output can be split on it.
+_BATCH_SEPARATOR = "%texsmith-exam-batch-separator"
+_BATCH_SPLIT_RE = re.compile(rf"^{re.escape(_BATCH_SEPARATOR)}$", re.MULTILINE)
+_FRAGMENT_CACHE_SIZE = 512
+_fragment_cache: OrderedDict[str, str] = OrderedDict()
+_fragment_lock = threading.Lock()
+
+
 def _markdown_to_latex(value: Any) -> str:
     if value is None:
         return ""
     text = str(value)
     if not text.strip():
         return text
-    html = render_markdown(text, exam_markdown_extensions()).html
+    latex = _cached_fragment(text)
+    if latex is None:
+        latex = _convert_markdown(text)
+        _store_fragment(text, latex)
+    return latex
+
+
+def _markdown_to_latex_list(values: Any) -> list[str]:
+    """Convert a list of Markdown fragments, rendering all cache misses in one pass."""
+    if values is None:
+        return []
+    if isinstance(values, str) or not isinstance(values, Iterable):
+        values = [values]
+    texts = ["" if value is None else str(value) for value in values]
+
+    misses = [
+        text for text in dict.fromkeys(texts) if text.strip() and _cached_fragment(text) is None
+    ]
+    if len(misses) > 1:
+        converted = _convert_markdown_batch(misses)
+        if converted is not None:
+            for text, latex in zip(misses, converted, strict=True):
+                _store_fragment(text, latex)
+    return [_markdown_to_latex(text) for text in texts]
+
+
+def _convert_markdown(text: str) -> str:
+    html = render_exam_markdown(text)
     return _get_renderer().render(html).strip()
 
 
-@lru_cache(maxsize=1)
+def _convert_markdown_batch(texts: list[str]) -> list[str] | None:
+    """Convert ``texts`` with a single Markdown and LaTeX pass.
+
+    Returns ``None`` when the output cannot be split back into one chunk per
+    fragment (for instance an unterminated code fence swallowing a
+    separator); callers then fall back to converting fragments one by one.
+    """
+    if any(_BATCH_SEPARATOR in text for text in texts):
+        return None
+    source = f"\n\n/// latex\n{_BATCH_SEPARATOR}\n///\n\n".join(texts)
+    chunks = _BATCH_SPLIT_RE.split(_convert_markdown(source))
+    if len(chunks) != len(texts):
+        return None
+    return [chunk.strip() for chunk in chunks]
+
+
+def _cached_fragment(text: str) -> str | None:
+    with _fragment_lock:
+        latex = _fragment_cache.get(text)
+        if latex is not None:
+            _fragment_cache.move_to_end(text)
+        return latex
+
+
+def _store_fragment(text: str, latex: str) -> None:
+    with _fragment_lock:
+        _fragment_cache[text] = latex
+        _fragment_cache.move_to_end(text)
+        while len(_fragment_cache) > _FRAGMENT_CACHE_SIZE:
+            _fragment_cache.popitem(last=False)
+
+
+_renderers = threading.local()
+
+
 def _get_renderer() -> LaTeXRenderer:
-    return LaTeXRenderer(copy_assets=False, convert_assets=False)
+    """Return this thread's fragment renderer; renderers are not shared across threads."""
+    renderer = getattr(_renderers, "latex", None)
+    if renderer is None:
+        renderer = _renderers.latex = LaTeXRenderer(copy_assets=False, convert_assets=False)
+    return renderer
 
 
 def _format_exam_date(value: Any, lang: str = "fr") -> str:
@@ -93,18 +170,32 @@ def _format_exam_date(value: Any, lang: str = "fr") -> str:
     return f"{date_part} à {time_part}"
 
 
-def _format_exam_version(value: Any) -> str:
-    return exam_version.format_exam_version(value)
+@pass_context
+def _format_exam_version(context: Any, value: Any) -> str:
+    # Imported here: the git reader is only needed for ``version: git``.
+    from texsmith_template_exam.exam import version as exam_version
+
+    source = context.get("_source_path") or context.get("_source_dir") or context.get("source_dir")
+    return exam_version.format_exam_version(value, source)
+
+
+def _register_filters(environment: Environment) -> None:
+    environment.filters.setdefault("markdown_to_latex", _markdown_to_latex)
+    environment.filters.setdefault("markdown_to_latex_list", _markdown_to_latex_list)
+    environment.filters.setdefault("exam_date", _format_exam_date)
+    environment.filters.setdefault("exam_version", _format_exam_version)
+    environment.filters.setdefault("exam_logo_name", logo_file_name)
 
 
 class Template(WrappableTemplate):
-    """Exam template with extra Jinja filters."""
+    """Exam template with extra Jinja filters.
+
+    Instances share one manifest and Jinja environment per process, so
+    ``template.tex`` is compiled once rather than on every render.
+    """
 
     def __init__(self) -> None:
-        super().__init__(Path(__file__).resolve().parent)
-        self.environment.filters.setdefault("markdown_to_latex", _markdown_to_latex)
-        self.environment.filters.setdefault("exam_date", _format_exam_date)
-        self.environment.filters.setdefault("exam_version", _format_exam_version)
+        init_shared_template(self, Path(__file__).resolve().parent, _register_filters)
 
     def prepare_context(  # type: ignore[override]
         self,
@@ -113,7 +204,9 @@ class Template(WrappableTemplate):
         overrides: Mapping[str, Any] | None = None,
     ) -> dict[str, Any]:
         self._ensure_paper_format(overrides)
-        return super().prepare_context(latex_body, overrides=overrides)
+        context = super().prepare_context(latex_body, overrides=overrides)
+        context["exam_point_macros"] = point_macros(latex_body)
+        return context
 
     def _ensure_paper_format(self, overrides: Mapping[str, Any] | None) -> None:
         if not isinstance(overrides, dict):
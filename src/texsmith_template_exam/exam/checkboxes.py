@@ -5,13 +5,14 @@ from __future__ import annotations
 from bs4.element import NavigableString, Tag
 from texsmith.core.context import RenderContext
 
+from texsmith_template_exam.exam.columns import choice_layout
 from texsmith_template_exam.exam.mode import in_compact_mode
 from texsmith_template_exam.exam.styles import choice_style
 from texsmith_template_exam.exam.texsmith_compat import (
     mark_processed,
     prepare_rich_text_content,
 )
-from texsmith_template_exam.exam.utils import choice_label
+from texsmith_template_exam.exam.utils import choice_flags, choice_label, split_choice_marker
 
 
 def render_exam_checkboxes(element: Tag, context: RenderContext) -> None:
@@ -21,40 +22,31 @@ def render_exam_checkboxes(element: Tag, context: RenderContext) -> None:
 
     prepare_rich_text_content(element, context)
 
-    items: list[tuple[bool, str]] = []
-    has_checkbox = False
-
+    states: list[tuple[bool | None, bool]] = []
+    texts: list[str] = []
     for li in element.find_all("li", recursive=False):
-        if li.find(["ul", "ol"]):
-            return
-
+        checked: bool | None = None
+        text = li.get_text(strip=False).strip()
         checkbox_input = li.find("input", attrs={"type": "checkbox"})
         if checkbox_input is not None:
-            is_checked = checkbox_input.has_attr("checked")
-            checkbox_input.extract()
-            text = li.get_text(strip=False).strip()
-            items.append((is_checked, text))
-            has_checkbox = True
-            continue
-
-        text = li.get_text(strip=False).strip()
-        if text.startswith("[ ]"):
-            items.append((False, text[3:].strip()))
-            has_checkbox = True
-        elif text.startswith("[x]") or text.startswith("[X]"):
-            items.append((True, text[3:].strip()))
-            has_checkbox = True
+            checked = checkbox_input.has_attr("checked")
         else:
-            items.append((False, text))
+            marker = split_choice_marker(text)
+            if marker is not None:
+                checked, text = marker
+        states.append((checked, li.find(["ul", "ol"]) is not None))
+        texts.append(text)
 
-    if not has_checkbox:
+    flags = choice_flags(states)
+    if flags is None:
         return
+    items = list(zip(flags, texts, strict=True))
 
-    selected_style = choice_style(context)
-    if selected_style == "checkbox":
-        lines = ["\\begin{samepage}", "\\begin{columen}[5]", "\\begin{checkboxes}"]
-    else:
-        lines = ["\\begin{samepage}", "\\begin{columen}[5]", "\\begin{choices}"]
+    layout = choice_layout(context, [text for _checked, text in items])
+    environment = layout.environment(
+        "checkboxes" if choice_style(context) == "checkbox" else "choices"
+    )
+    lines = ["\\begin{samepage}", *layout.begin(), f"\\begin{{{environment}}}"]
     show_answerline = not in_compact_mode(context)
     correct_labels: list[str] = []
     for index, (checked, text) in enumerate(items):
@@ -63,28 +55,16 @@ def render_exam_checkboxes(element: Tag, context: RenderContext) -> None:
             correct_labels.append(choice_label(index))
         else:
             lines.append(f"\\choice {text}")
-    if selected_style == "checkbox":
-        lines.append("\\end{checkboxes}")
-        lines.append("\\end{columen}")
-        if show_answerline:
-            if correct_labels:
-                lines.append(
-                    f"\\ifprintanswers\\answerline[{', '.join(correct_labels)}]\\else\\answerline\\fi"
-                )
-            else:
-                lines.append("\\answerline")
-        lines.append("\\end{samepage}")
-    else:
-        lines.append("\\end{choices}")
-        lines.append("\\end{columen}")
-        if show_answerline:
-            if correct_labels:
-                lines.append(
-                    f"\\ifprintanswers\\answerline[{', '.join(correct_labels)}]\\else\\answerline\\fi"
-                )
-            else:
-                lines.append("\\answerline")
-        lines.append("\\end{samepage}")
+    lines.append(f"\\end{{{environment}}}")
+    lines.extend(layout.end())
+    if show_answerline:
+        if correct_labels:
+            lines.append(
+                f"\\ifprintanswers\\answerline[{', '.join(correct_labels)}]\\else\\answerline\\fi"
+            )
+        else:
+            lines.append("\\answerline")
+    lines.append("\\end{samepage}")
 
     element.replace_with(mark_processed(NavigableString("\n".join(lines) + "\n")))
 
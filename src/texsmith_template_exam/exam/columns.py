@@ -0,0 +1,396 @@
+"""Choose the layout of choice lists from the estimated width of their options.
+
+Wrapping every list in ``columen`` leaves the column count to LaTeX: each list
+starts at five columns and columen narrows it by one column per pass, through
+the ``.aux``, until no option wraps or overflows. A quiz full of choice lists
+pays for that with trial typesetting and extra LaTeX runs. The renderer
+already has the text of every option, so it estimates the rendered widths from
+the Computer Modern metrics of the 10pt body font and the page geometry. Then
+it picks the layout itself:
+
+* the list gets the widest column count its options fit in;
+* very short options that would need more than one row of columns go on one
+  line instead (``oneparchoices``);
+* columen is only used when the estimate is too close to call, or when the
+  widths are unknown (math displays, images, unmeasured fonts or page sizes).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from math import ceil
+import re
+import unicodedata
+
+from texsmith.core.context import RenderContext
+
+from texsmith_template_exam.exam.mode import exam_settings
+
+
+MAX_COLUMNS = 5
+
+# TeX points per unit.
+_UNITS = {"pt": 1.0, "bp": 72.27 / 72, "mm": 72.27 / 25.4, "cm": 72.27 / 2.54, "in": 72.27}
+# ts-geometry's margin presets.
+_NAMED_MARGINS = {"narrow": "1.5cm", "wide": "3cm"}
+_LENGTH_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(pt|bp|mm|cm|in)?\s*$")
+# (width, height) in millimetres of the formats ts-geometry accepts.
+_PAPER_SIZES = {
+    "a3": (297.0, 420.0),
+    "a4": (210.0, 297.0),
+    "a5": (148.0, 210.0),
+    "a6": (105.0, 148.0),
+    "b5": (176.0, 250.0),
+    "letter": (215.9, 279.4),
+    "legal": (215.9, 355.6),
+    "executive": (184.15, 266.7),
+}
+# Template default: A4 with 2.5cm side margins.
+_DEFAULT_LINE_WIDTH = 160 * _UNITS["mm"]
+# Width of the body fonts TeXSmith offers relative to Computer Modern. Sans
+# Latin Modern is slightly narrower than the roman it is measured against.
+_FONT_SCALES = {
+    "lm": 1.0,
+    "lm-sans": 1.0,
+    "termes": 0.92,
+    "libertinus": 0.95,
+    "pagella": 1.03,
+    "heros": 1.03,
+    "heros-otf": 1.03,
+    "plex": 1.06,
+    "adventor": 1.1,
+    "adventor-otf": 1.1,
+    "schola": 1.1,
+    "bonum": 1.14,
+}
+
+# Widths of cmr10 glyphs, in points at 10pt.
+_GLYPH_WIDTHS = {
+    char: width / 100
+    for chars, width in (
+        ("il.,:;!'`[]", 278),
+        ("fj", 306),
+        ("-", 333),
+        (" ", 333),
+        ("I", 361),
+        ("t()", 389),
+        ("r", 392),
+        ("s", 394),
+        ("cez", 444),
+        ("?", 472),
+        ('ag0123456789"/*', 500),
+        ("J", 514),
+        ("kqvxy", 528),
+        ("bdhnpuS_", 556),
+        ("Z", 611),
+        ("L", 625),
+        ("F", 653),
+        ("EP", 681),
+        ("B", 708),
+        ("wCT", 722),
+        ("R", 736),
+        ("AHNUVXY", 750),
+        ("D", 764),
+        ("+=<>&KOQ", 778),
+        ("G", 785),
+        ("m#%", 833),
+        ("M", 917),
+        ("W", 1028),
+    )
+    for char in chars
+}
+_DEFAULT_GLYPH = 5.0
+_UPPERCASE_GLYPH = 7.5
+_WIDE_GLYPH = 10.0
+_MONO_GLYPH = 5.25
+_SPACE = 3.33
+_BOLD_SCALE = 1.15
+_SCRIPT_SCALE = 0.7
+# A binary operator or relation with its surrounding math spacing.
+_MATH_OPERATOR = 13.3
+
+# Commands whose output the estimate cannot size: math displays and
+# constructs, images, explicit breaks and spacing, nested answer blanks.
+_UNSIZED_COMMANDS = frozenset(
+    {
+        "\\", "[", "]", "begin", "binom", "dfrac", "displaystyle", "fillin", "frac", "hfill",
+        "hspace", "includegraphics", "int", "linebreak", "newline", "oint", "overset", "par",
+        "parbox", "prod", "raisebox", "rule", "sqrt", "stackrel", "sum", "tfrac", "tikz",
+        "underset", "vspace",
+    }
+)  # fmt: skip
+_COMMAND_WIDTHS = {
+    " ": _SPACE,
+    ",": 1.67,
+    ":": 2.22,
+    ";": 2.78,
+    "!": -1.67,
+    "enspace": 5.0,
+    "quad": 10.0,
+    "qquad": 20.0,
+    "ldots": 12.0,
+    "dots": 12.0,
+    "left": 0.0,
+    "right": 0.0,
+    "%": 8.33,
+    "#": 8.33,
+    "&": 7.78,
+}
+_MATH_OPERATORS = frozenset(
+    {
+        "approx", "cap", "cdot", "cup", "equiv", "ge", "geq", "in", "le", "leftarrow", "leq",
+        "mapsto", "mp", "ne", "neq", "notin", "pm", "Rightarrow", "rightarrow", "subset",
+        "times", "to",
+    }
+)  # fmt: skip
+_BOLD_COMMANDS = frozenset({"textbf", "mathbf", "bfseries"})
+_MONO_COMMANDS = frozenset({"texttt", "ttfamily", "url", "path"})
+_HIDDEN_COMMANDS = frozenset({"footnote", "index", "label"})
+_TOKEN_RE = re.compile(r"\\(?:[A-Za-z@]+\*?|.)|\s+|.", re.DOTALL)
+
+# Layout of the template: ``\questionshook`` indents by ``2.`` plus a 0.4em
+# label separation, parts and subparts by their label plus ``\labelsep``,
+# ``\choiceshook`` by ``W.``, ``\labelsep`` and 1em. ``multicols`` keeps the
+# default 10pt ``\columnsep``; ``oneparchoices`` puts 1em before each label.
+_QUESTION_INDENT = 11.8
+_PART_INDENT = 21.1
+_CHOICE_INDENT = 28.0
+_COLUMN_SEP = 10.0
+_INLINE_LABEL = 13.1 + _SPACE + 10.0
+_PART_FLAGS = ("exam_parts_open", "exam_subparts_open", "exam_subsubparts_open")
+
+# Options at most this wide may share one line when columns need several rows.
+SHORT_OPTION = 25.0
+# Estimates within this fraction of a column width are left to columen.
+TOLERANCE = 0.1
+
+
+@dataclass(frozen=True, slots=True)
+class _Style:
+    scale: float = 1.0
+    mono: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class ChoiceLayout:
+    """How one choice list is typeset.
+
+    ``inline`` lists use exam.cls's one-paragraph environments. Otherwise the
+    list gets ``columns`` columns, or at most ``columns`` when ``balanced``
+    leaves the final count to columen.
+    """
+
+    columns: int
+    inline: bool = False
+    balanced: bool = False
+
+    def environment(self, name: str) -> str:
+        """Return the exam.cls environment for ``choices`` or ``checkboxes``."""
+        return f"onepar{name}" if self.inline else name
+
+    def begin(self) -> list[str]:
+        if self.balanced:
+            return [f"\\begin{{columen}}[{self.columns}]"]
+        if self.inline or self.columns == 1:
+            return []
+        return [f"\\begin{{texsmithcolumns}}{{{self.columns}}}"]
+
+    def end(self) -> list[str]:
+        if self.balanced:
+            return ["\\end{columen}"]
+        if self.inline or self.columns == 1:
+            return []
+        return ["\\end{texsmithcolumns}"]
+
+
+def _glyph_width(char: str, style: _Style, math: bool) -> float:
+    if style.mono:
+        return _MONO_GLYPH * style.scale
+    if math and char in "+-=<>":
+        return _MATH_OPERATOR * style.scale
+    if char.isspace():
+        return 0.0 if math else _SPACE * style.scale
+    base = unicodedata.normalize("NFD", char)[0]
+    width = _GLYPH_WIDTHS.get(base)
+    if width is None:
+        if unicodedata.combining(base):
+            width = 0.0
+        elif unicodedata.east_asian_width(base) in "WF":
+            width = _WIDE_GLYPH
+        else:
+            width = _UPPERCASE_GLYPH if base.isupper() else _DEFAULT_GLYPH
+    return width * style.scale
+
+
+def estimate_width(latex: str) -> float | None:
+    """Estimate the natural width, in points, of ``latex`` in the 10pt body font.
+
+    Returns ``None`` when the text holds something the estimate cannot size.
+    """
+    stack = [_Style()]
+    # Styles of the next brace groups: ``\textbf{`` opens a bold group.
+    pending: list[_Style] = []
+    math = False
+    script = False
+    width = 0.0
+    for match in _TOKEN_RE.finditer(latex):
+        token = match.group()
+        style = stack[-1]
+        if script:
+            style = _Style(style.scale * _SCRIPT_SCALE, style.mono)
+            script = False
+            if token == "{":
+                pending.insert(0, style)
+        if token == "{":
+            stack.append(pending.pop(0) if pending else style)
+        elif token == "}":
+            if len(stack) > 1:
+                stack.pop()
+        elif token in ("$", "\\(", "\\)"):
+            math = not math
+        elif math and token in ("^", "_"):
+            script = True
+        elif token == "~":
+            width += _SPACE * style.scale
+        elif token.startswith("\\") and len(token) > 1:
+            name = token[1:].rstrip("*")
+            if name in _UNSIZED_COMMANDS:
+                return None
+            if name in _HIDDEN_COMMANDS:
+                pending.append(_Style(0.0))
+            elif name == "href":
+                pending.extend((_Style(0.0), style))
+            elif name in _BOLD_COMMANDS or name in _MONO_COMMANDS:
+                changed = _Style(
+                    style.scale * (_BOLD_SCALE if name in _BOLD_COMMANDS else 1.0),
+                    style.mono or name in _MONO_COMMANDS,
+                )
+                if name.endswith(("series", "family")):
+                    stack[-1] = changed
+                else:
+                    pending.append(changed)
+            elif name in _COMMAND_WIDTHS:
+                width += _COMMAND_WIDTHS[name] * style.scale
+            elif math and name in _MATH_OPERATORS:
+                width += _MATH_OPERATOR * style.scale
+            elif not name.isalpha():
+                width += _glyph_width(name, style, math=False)
+            elif latex[match.end() : match.end() + 1] != "{":
+                # A symbol such as ``\alpha`` or ``\og``; commands with an
+                # argument only wrap their text.
+                width += _DEFAULT_GLYPH * style.scale
+        else:
+            width += _glyph_width(token[0], style, math)
+    return max(width, 0.0)
+
+
+def _length(value: object) -> float | None:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) * _UNITS["mm"]
+    if not isinstance(value, str):
+        return None
+    match = _LENGTH_RE.match(value)
+    if not match:
+        return None
+    return float(match.group(1)) * _UNITS[match.group(2) or "mm"]
+
+
+def line_width(paper: object) -> float | None:
+    """Return the text width, in points, for a ``press.paper`` setting.
+
+    Returns ``None`` when the setting leaves the width to geometry's defaults
+    or uses values the estimate does not understand.
+    """
+    if paper is None:
+        return _DEFAULT_LINE_WIDTH
+    if not isinstance(paper, Mapping):
+        return None
+    page = _length(paper["width"]) if paper.get("width") is not None else None
+    if page is None:
+        size = _PAPER_SIZES.get(str(paper.get("format") or "a4").lower().removesuffix("paper"))
+        if size is None:
+            return None
+        landscape = str(paper.get("orientation", "")).lower() in {"landscape", "horizontal"}
+        page = size[landscape] * _UNITS["mm"]
+    margin = paper.get("margin")
+    if isinstance(margin, Mapping):
+        sides = [
+            _length(margin.get(side, margin.get(alias)))
+            for side, alias in (("left", "inner"), ("right", "outer"))
+        ]
+    else:
+        sides = [_length(_NAMED_MARGINS.get(str(margin).strip().lower(), margin))] * 2
+    binding = _length(paper["binding"]) if paper.get("binding") is not None else 0.0
+    if None in sides or binding is None:
+        return None
+    width = page - sum(sides) - binding
+    return width if width > 0 else None
+
+
+def font_scale(family: object) -> float | None:
+    """Return the width of the ``fonts.family`` setting relative to Computer Modern."""
+    if family is None:
+        return 1.0
+    return _FONT_SCALES.get(str(family).strip().lower())
+
+
+def _indent(context: RenderContext) -> float:
+    depth = sum(bool(context.state.counters.get(flag, 0)) for flag in _PART_FLAGS)
+    return _QUESTION_INDENT + depth * _PART_INDENT
+
+
+def plan_choices(
+    widths: Sequence[float | None], available: float | None, *, max_columns: int = MAX_COLUMNS
+) -> ChoiceLayout:
+    """Pick the layout for options of the given estimated ``widths``.
+
+    ``available`` is the line width in points; ``None`` entries (and an
+    unknown line width) leave the column count to columen.
+    """
+    count = max(len(widths), 1)
+    most = max(1, min(max_columns, count))
+    if available is None or any(width is None for width in widths):
+        return ChoiceLayout(most, balanced=True)
+    sizes = [width for width in widths if width is not None]
+    widest = max(sizes, default=0.0)
+    for columns in range(most, 0, -1):
+        if widest <= _column_width(available, columns) * (1 + TOLERANCE):
+            break
+    rows = ceil(count / columns)
+    inline = sum(_INLINE_LABEL + width for width in sizes)
+    if rows > 1 and widest <= SHORT_OPTION and inline <= available * (1 - TOLERANCE):
+        return ChoiceLayout(1, inline=True)
+    # Same number of rows with fewer, wider columns.
+    columns = ceil(count / rows)
+    balanced = columns > 1 and widest > _column_width(available, columns) * (1 - TOLERANCE)
+    return ChoiceLayout(columns, balanced=balanced)
+
+
+def _column_width(available: float, columns: int) -> float:
+    return (available - (columns - 1) * _COLUMN_SEP) / columns - _CHOICE_INDENT
+
+
+def choice_layout(context: RenderContext, texts: Iterable[str]) -> ChoiceLayout:
+    """Pick the layout of a choice list whose options render to ``texts``."""
+    settings = exam_settings(context)
+    available = line_width(settings.paper)
+    scale = font_scale(settings.fonts)
+    widths: list[float | None] = []
+    for text in texts:
+        width = estimate_width(text)
+        widths.append(None if width is None or scale is None else width * scale)
+    if available is not None:
+        available -= _indent(context)
+    return plan_choices(widths, available)
+
+
+__all__ = [
+    "MAX_COLUMNS",
+    "ChoiceLayout",
+    "choice_layout",
+    "estimate_width",
+    "font_scale",
+    "line_width",
+    "plan_choices",
+]
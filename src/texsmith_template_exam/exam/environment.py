@@ -0,0 +1,174 @@
+"""Process-wide Jinja environment for the exam template.
+
+TeXSmith re-executes the template's ``__init__`` and constructs a new
+``Template`` for every render, which would rebuild the Jinja environment and
+compile ``template.tex`` again each time. The manifest and the environment
+(filters and compiled templates included) are kept here instead, in a module
+imported once per process, and shared by every ``Template`` instance.
+
+Compiled templates are also stored in an on-disk bytecode cache keyed by the
+template's source hash, so a new process (a ``batch`` worker, a CLI run) loads
+``template.tex`` without compiling it. Set ``TEXSMITH_EXAM_JINJA_CACHE`` to a
+directory to move that cache, or to ``0`` to disable it.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+import contextlib
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+import threading
+from typing import Any
+
+from jinja2 import Environment
+from jinja2.bccache import Bucket, FileSystemBytecodeCache
+from texsmith.core.templates.base import BaseTemplate, TemplateError, _resolve_manifest_path
+from texsmith.core.user_dir import get_user_dir
+
+
+JINJA_CACHE_ENV = "TEXSMITH_EXAM_JINJA_CACHE"
+
+_FALSY = {"0", "false", "no", "off"}
+_PARSE_CACHE_SIZE = 16
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache keyed by template path and source hash.
+
+    Each edit of a template gets its own entry, so switching between versions
+    does not recompile either of them. Failing to write an entry never fails
+    the render.
+    """
+
+    def get_bucket(
+        self, environment: Environment, name: str, filename: str | None, source: str
+    ) -> Bucket:
+        checksum = self.get_source_checksum(source)
+        key = hashlib.sha1(f"{name}|{filename}|{checksum}".encode()).hexdigest()
+        bucket = Bucket(environment, key, checksum)
+        self.load_bytecode(bucket)
+        return bucket
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        with contextlib.suppress(OSError):
+            super().dump_bytecode(bucket)
+
+
+def jinja_cache_directory() -> Path | None:
+    """Return the bytecode cache directory, or ``None`` when it is disabled."""
+    value = os.environ.get(JINJA_CACHE_ENV, "").strip()
+    if value.lower() in _FALSY:
+        return None
+    if value:
+        return Path(value).expanduser()
+    return get_user_dir().cache_dir("jinja", create=False)
+
+
+def bytecode_cache() -> TemplateBytecodeCache | None:
+    """Return the on-disk bytecode cache, or ``None`` if it is disabled or unusable."""
+    directory = jinja_cache_directory()
+    if directory is None:
+        return None
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return TemplateBytecodeCache(str(directory))
+
+
+def _remember_parses(environment: Environment) -> None:
+    """Memoize ``environment.parse`` for unchanged sources.
+
+    TeXSmith parses the template entry point on every render to discover the
+    variables it uses. Compiling goes through ``Environment._parse`` and is not
+    affected; the returned trees are only inspected, never modified.
+    """
+    parse = environment.parse
+    parsed: OrderedDict[tuple[str, str | None, str | None], Any] = OrderedDict()
+    lock = threading.Lock()
+
+    def cached_parse(source: str, name: str | None = None, filename: str | None = None) -> Any:
+        key = (source, name, filename)
+        with lock:
+            tree = parsed.get(key)
+            if tree is not None:
+                parsed.move_to_end(key)
+                return tree
+        tree = parse(source, name, filename)
+        with lock:
+            parsed[key] = tree
+            while len(parsed) > _PARSE_CACHE_SIZE:
+                parsed.popitem(last=False)
+        return tree
+
+    environment.parse = cached_parse  # type: ignore[method-assign]
+
+
+@dataclass(frozen=True, slots=True)
+class _SharedTemplate:
+    stamp: tuple[int, int] | None
+    root: Path
+    manifest: Any
+    info: Any
+    environment: Environment
+
+
+_shared: dict[Path, _SharedTemplate] = {}
+_lock = threading.Lock()
+
+
+def _manifest_stamp(root: Path) -> tuple[int, int] | None:
+    try:
+        stat = _resolve_manifest_path(root).stat()
+    except (OSError, TemplateError):
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def init_shared_template(
+    template: BaseTemplate, root: Path, configure: Callable[[Environment], None]
+) -> None:
+    """Initialise ``template`` with the manifest and environment shared for ``root``.
+
+    The first call for ``root`` runs ``BaseTemplate.__init__``, enables the
+    bytecode cache and calls ``configure`` (to register filters) on the new
+    environment. Later calls reuse them until the manifest file changes;
+    edits to the template sources are picked up by Jinja's auto-reload.
+    """
+    root = root.resolve()
+    stamp = _manifest_stamp(root)
+    with _lock:
+        shared = _shared.get(root)
+        if shared is None or shared.stamp != stamp:
+            BaseTemplate.__init__(template, root)
+            environment = template.environment
+            environment.bytecode_cache = bytecode_cache()
+            _remember_parses(environment)
+            configure(environment)
+            shared = _shared[root] = _SharedTemplate(
+                stamp, template.root, template.manifest, template.info, environment
+            )
+    template.root = shared.root
+    template.manifest = shared.manifest
+    template.info = shared.info
+    template.environment = shared.environment
+
+
+def clear_shared_templates() -> None:
+    """Forget the shared environments; the next ``Template`` rebuilds its own."""
+    with _lock:
+        _shared.clear()
+
+
+__all__ = [
+    "JINJA_CACHE_ENV",
+    "TemplateBytecodeCache",
+    "bytecode_cache",
+    "clear_shared_templates",
+    "init_shared_template",
+    "jinja_cache_directory",
+]
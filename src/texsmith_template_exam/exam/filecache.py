@@ -0,0 +1,97 @@
+"""Process-wide cache for parsed source files (YAML config, front matter)."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+import threading
+from typing import Any
+
+
+_MISSING = object()
+
+
+class FileCache:
+    """Bounded LRU cache of parsed files keyed by ``(path, mtime, size)``.
+
+    Entries are invalidated as soon as the file's modification time or size
+    changes. Parsed values are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(self, loader: Callable[[Path], Any], *, maxsize: int = 256) -> None:
+        self._loader = loader
+        self._maxsize = maxsize
+        self._entries: OrderedDict[Path, tuple[int, int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path | str, default: Any = None) -> Any:
+        """Return the parsed content of ``path`` or ``default`` if it cannot be read."""
+        resolved = Path(path)
+        try:
+            stat = resolved.stat()
+        except OSError:
+            return default
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(resolved)
+            if entry is not None and entry[:2] == stamp:
+                self._entries.move_to_end(resolved)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        try:
+            value = self._loader(resolved)
+        except Exception:
+            value = _MISSING
+
+        with self._lock:
+            self._entries[resolved] = (*stamp, value)
+            self._entries.move_to_end(resolved)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return default if value is _MISSING else value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _load_yaml(path: Path) -> Any:
+    import yaml
+
+    return yaml.safe_load(path.read_text(encoding="utf-8"))
+
+
+def _load_front_matter(path: Path) -> dict[str, object]:
+    from texsmith.adapters.markdown import split_front_matter
+
+    front_matter, _ = split_front_matter(path.read_text(encoding="utf-8"))
+    return front_matter if isinstance(front_matter, dict) else {}
+
+
+YAML_CACHE = FileCache(_load_yaml)
+FRONT_MATTER_CACHE = FileCache(_load_front_matter)
+
+
+def clear_file_caches() -> None:
+    YAML_CACHE.clear()
+    FRONT_MATTER_CACHE.clear()
+
+
+__all__ = [
+    "FRONT_MATTER_CACHE",
+    "YAML_CACHE",
+    "FileCache",
+    "clear_file_caches",
+]
@@ -6,7 +6,7 @@ import re
 
 from texsmith.core.context import RenderContext
 
-from texsmith_template_exam.exam.mode import resolve_value
+from texsmith_template_exam.exam.mode import exam_settings
 from texsmith_template_exam.exam.utils import normalize_fillin_width
 
 
@@ -37,17 +37,9 @@ def coerce_fillin_scale(value: object, *, default: float) -> float:
 
 
 def fillin_scale_from_context(context: RenderContext, *, default_scale: float = 2.5) -> float:
-    for key in (
-        "char-width-scale",
-        "fillin_char_width_scale",
-        "style.char-width-scale",
-        "fillin.char-width-scale",
-        "exam.char-width-scale",
-        "exam.fillin.char-width-scale",
-    ):
-        value = resolve_value(context, (key,), include_runtime=True, include_front_matter=True)
-        if value is not None:
-            return coerce_fillin_scale(value, default=default_scale)
+    value = exam_settings(context).fillin_scale
+    if value is not None:
+        return coerce_fillin_scale(value, default=default_scale)
     return default_scale
 
 
@@ -0,0 +1,556 @@
+"""Minimal read-only access to git repositories without spawning ``git``.
+
+Only what ``version=git`` needs is implemented: locating the repository,
+resolving ``HEAD`` through loose refs and ``packed-refs``, reading commit and
+tag objects (loose or packed, including deltified entries), a
+``git describe --tags --dirty`` equivalent and a dirty check that trusts the
+index stat data and hashes files whose stat data changed.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import hashlib
+import heapq
+import mmap
+import os
+from pathlib import Path
+import stat as stat_module
+import struct
+import zlib
+
+
+_OBJECT_TYPES = {1: b"commit", 2: b"tree", 3: b"blob", 4: b"tag"}
+_OFS_DELTA = 6
+_REF_DELTA = 7
+_GITLINK_MODE = 0o160000
+_SYMLINK_MODE = 0o120000
+
+
+class GitError(Exception):
+    """Raised when repository metadata cannot be read."""
+
+
+def find_repository(start: Path) -> tuple[Path, Path] | None:
+    """Return ``(worktree_root, git_dir)`` for the repository containing ``start``."""
+    try:
+        current = start.resolve()
+    except OSError:
+        return None
+    if current.is_file():
+        current = current.parent
+    for candidate in (current, *current.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return candidate, dot_git
+        if dot_git.is_file():
+            try:
+                content = dot_git.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            if content.startswith("gitdir:"):
+                git_dir = Path(content.split(":", 1)[1].strip())
+                if not git_dir.is_absolute():
+                    git_dir = (candidate / git_dir).resolve()
+                return candidate, git_dir
+    return None
+
+
+@dataclass(slots=True)
+class _Pack:
+    path: Path
+    shas: list[bytes]
+    offsets: list[int]
+    data: mmap.mmap | bytes
+
+    @classmethod
+    def load(cls, idx_path: Path) -> _Pack:
+        raw = idx_path.read_bytes()
+        if raw[:4] != b"\xfftOc" or struct.unpack(">I", raw[4:8])[0] != 2:
+            raise GitError(f"Unsupported pack index: {idx_path}")
+        count = struct.unpack(">I", raw[8 + 255 * 4 : 8 + 256 * 4])[0]
+        sha_start = 8 + 256 * 4
+        shas = [raw[sha_start + i * 20 : sha_start + (i + 1) * 20] for i in range(count)]
+        offset_start = sha_start + count * 24
+        large_start = offset_start + count * 4
+        offsets = []
+        for i in range(count):
+            (offset,) = struct.unpack(">I", raw[offset_start + i * 4 : offset_start + i * 4 + 4])
+            if offset & 0x80000000:
+                index = offset & 0x7FFFFFFF
+                large = large_start + index * 8
+                (offset,) = struct.unpack(">Q", raw[large : large + 8])
+            offsets.append(offset)
+
+        pack_path = idx_path.with_suffix(".pack")
+        with pack_path.open("rb") as handle:
+            try:
+                data: mmap.mmap | bytes = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                data = b""
+        return cls(pack_path, shas, offsets, data)
+
+    def offset_of(self, sha: bytes) -> int | None:
+        index = bisect_left(self.shas, sha)
+        if index < len(self.shas) and self.shas[index] == sha:
+            return self.offsets[index]
+        return None
+
+
+@dataclass(slots=True)
+class Commit:
+    sha: str
+    parents: tuple[str, ...]
+    time: int
+
+
+@dataclass
+class Repository:
+    """Read-only view of a git repository."""
+
+    root: Path
+    git_dir: Path
+    common_dir: Path = field(init=False)
+    _packs: list[_Pack] | None = field(default=None, init=False, repr=False)
+    _commits: dict[str, Commit] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        commondir = self.git_dir / "commondir"
+        if commondir.is_file():
+            target = Path(commondir.read_text(encoding="utf-8").strip())
+            self.common_dir = target if target.is_absolute() else (self.git_dir / target).resolve()
+        else:
+            self.common_dir = self.git_dir
+
+    @classmethod
+    def discover(cls, start: Path) -> Repository | None:
+        found = find_repository(start)
+        if found is None:
+            return None
+        return cls(*found)
+
+    # -- refs -------------------------------------------------------------
+
+    def head(self) -> tuple[str | None, str | None]:
+        """Return ``(symbolic_ref, sha)`` for ``HEAD``; either may be ``None``."""
+        try:
+            content = (self.git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError as exc:
+            raise GitError("Unable to read HEAD") from exc
+        if content.startswith("ref:"):
+            ref = content[4:].strip()
+            return ref, self.resolve_ref(ref)
+        return None, content or None
+
+    def resolve_ref(self, ref: str, _depth: int = 0) -> str | None:
+        for base in (self.git_dir, self.common_dir):
+            path = base / ref
+            if path.is_file():
+                content = path.read_text(encoding="utf-8").strip()
+                if content.startswith("ref:") and _depth < 5:
+                    return self.resolve_ref(content[4:].strip(), _depth + 1)
+                return content or None
+        return self.packed_refs().get(ref, (None, None))[0]
+
+    def packed_refs(self) -> dict[str, tuple[str, str | None]]:
+        """Return ``{ref: (sha, peeled_sha)}`` from ``packed-refs``."""
+        refs: dict[str, tuple[str, str | None]] = {}
+        path = self.common_dir / "packed-refs"
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return refs
+        last: str | None = None
+        for line in lines:
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("^"):
+                if last is not None:
+                    refs[last] = (refs[last][0], line[1:].strip())
+                continue
+            sha, _, ref = line.partition(" ")
+            refs[ref.strip()] = (sha, None)
+            last = ref.strip()
+        return refs
+
+    def tags(self) -> dict[str, tuple[str, str | None]]:
+        """Return ``{tag_name: (sha, peeled_sha)}`` for every tag."""
+        tags = {
+            ref[len("refs/tags/") :]: value
+            for ref, value in self.packed_refs().items()
+            if ref.startswith("refs/tags/")
+        }
+        tag_root = self.common_dir / "refs" / "tags"
+        if tag_root.is_dir():
+            for path in tag_root.rglob("*"):
+                if path.is_file():
+                    name = path.relative_to(tag_root).as_posix()
+                    tags[name] = (path.read_text(encoding="utf-8").strip(), None)
+        return tags
+
+    # -- objects ----------------------------------------------------------
+
+    def read_object(self, sha: str) -> tuple[bytes, bytes]:
+        """Return ``(type, payload)`` for the object ``sha``."""
+        loose = self.common_dir / "objects" / sha[:2] / sha[2:]
+        if loose.is_file():
+            raw = zlib.decompress(loose.read_bytes())
+            header, _, body = raw.partition(b"\0")
+            return header.split(b" ", 1)[0], body
+        binary = bytes.fromhex(sha)
+        for pack in self._load_packs():
+            offset = pack.offset_of(binary)
+            if offset is not None:
+                return self._read_packed(pack, offset)
+        raise GitError(f"Object {sha} not found")
+
+    def _load_packs(self) -> list[_Pack]:
+        if self._packs is None:
+            pack_dir = self.common_dir / "objects" / "pack"
+            self._packs = [_Pack.load(idx) for idx in sorted(pack_dir.glob("*.idx"))]
+        return self._packs
+
+    def _read_packed(self, pack: _Pack, offset: int) -> tuple[bytes, bytes]:
+        data = pack.data
+        byte = data[offset]
+        kind = (byte >> 4) & 0x7
+        position = offset + 1
+        while byte & 0x80:
+            byte = data[position]
+            position += 1
+
+        if kind == _OFS_DELTA:
+            byte = data[position]
+            position += 1
+            distance = byte & 0x7F
+            while byte & 0x80:
+                byte = data[position]
+                position += 1
+                distance = ((distance + 1) << 7) | (byte & 0x7F)
+            base_kind, base = self._read_packed(pack, offset - distance)
+            return base_kind, _apply_delta(base, _inflate(data, position))
+        if kind == _REF_DELTA:
+            base_sha = bytes(data[position : position + 20]).hex()
+            base_kind, base = self.read_object(base_sha)
+            return base_kind, _apply_delta(base, _inflate(data, position + 20))
+        if kind not in _OBJECT_TYPES:
+            raise GitError(f"Unsupported pack object type {kind} in {pack.path}")
+        return _OBJECT_TYPES[kind], _inflate(data, position)
+
+    def commit(self, sha: str) -> Commit:
+        cached = self._commits.get(sha)
+        if cached is not None:
+            return cached
+        kind, body = self.read_object(sha)
+        if kind != b"commit":
+            raise GitError(f"{sha} is not a commit")
+        parents: list[str] = []
+        timestamp = 0
+        for line in body.split(b"\n"):
+            if not line:
+                break
+            if line.startswith(b"parent "):
+                parents.append(line[7:].decode("ascii"))
+            elif line.startswith(b"committer "):
+                parts = line.rsplit(b" ", 2)
+                timestamp = int(parts[-2]) if len(parts) == 3 else 0
+        commit = Commit(sha, tuple(parents), timestamp)
+        self._commits[sha] = commit
+        return commit
+
+    def peel(self, sha: str) -> tuple[str, bool]:
+        """Peel annotated tags; return ``(commit_sha, was_annotated)``."""
+        annotated = False
+        for _ in range(10):
+            kind, body = self.read_object(sha)
+            if kind != b"tag":
+                return sha, annotated
+            annotated = True
+            first = body.split(b"\n", 1)[0]
+            sha = first.split(b" ", 1)[1].decode("ascii")
+        return sha, annotated
+
+    def tree_entries(self, sha: str, prefix: str = "") -> Iterator[tuple[str, int, str]]:
+        """Yield ``(path, mode, sha)`` for every file below tree ``sha``."""
+        _, body = self.read_object(sha)
+        position = 0
+        while position < len(body):
+            space = body.index(b" ", position)
+            nul = body.index(b"\0", space)
+            mode = int(body[position:space], 8)
+            name = body[space + 1 : nul].decode("utf-8", "surrogateescape")
+            child = body[nul + 1 : nul + 21].hex()
+            position = nul + 21
+            path = f"{prefix}{name}"
+            if stat_module.S_ISDIR(mode):
+                yield from self.tree_entries(child, f"{path}/")
+            else:
+                yield path, mode, child
+
+    def commit_tree(self, sha: str) -> str:
+        _, body = self.read_object(sha)
+        first = body.split(b"\n", 1)[0]
+        return first.split(b" ", 1)[1].decode("ascii")
+
+    # -- describe ---------------------------------------------------------
+
+    def describe(self, *, abbrev: int = 7) -> str | None:
+        """Return ``git describe --tags`` output (without ``--dirty``)."""
+        _, head = self.head()
+        if not head:
+            return None
+        candidates: dict[str, tuple[bool, str]] = {}
+        for name, (sha, peeled) in self.tags().items():
+            try:
+                if peeled:
+                    target, annotated = peeled, True
+                else:
+                    target, annotated = self.peel(sha)
+            except GitError:
+                continue
+            current = candidates.get(target)
+            if current is None or (annotated, name) > current:
+                candidates[target] = (annotated, name)
+        if not candidates:
+            return None
+        if head in candidates:
+            return candidates[head][1]
+
+        tagged = self._nearest_tagged(head, candidates)
+        if tagged is None:
+            return None
+        depth = self._count_between(head, tagged)
+        return f"{candidates[tagged][1]}-{depth}-g{head[:abbrev]}"
+
+    def _nearest_tagged(self, head: str, candidates: dict[str, object]) -> str | None:
+        queue = [(-self.commit(head).time, head)]
+        seen = {head}
+        while queue:
+            _, sha = heapq.heappop(queue)
+            if sha in candidates:
+                return sha
+            for parent in self.commit(sha).parents:
+                if parent not in seen:
+                    seen.add(parent)
+                    heapq.heappush(queue, (-self.commit(parent).time, parent))
+        return None
+
+    def _count_between(self, head: str, base: str) -> int:
+        excluded = self._ancestors(base)
+        return len(self._ancestors(head, stop=excluded))
+
+    def _ancestors(self, start: str, stop: set[str] | None = None) -> set[str]:
+        stop = stop or set()
+        seen: set[str] = set()
+        stack = [start]
+        while stack:
+            sha = stack.pop()
+            if sha in seen or sha in stop:
+                continue
+            seen.add(sha)
+            stack.extend(self.commit(sha).parents)
+        return seen
+
+    # -- working tree -----------------------------------------------------
+
+    def is_dirty(self) -> bool:
+        """Return ``True`` when tracked files differ from ``HEAD``.
+
+        Staged changes are found by comparing index entries with the ``HEAD``
+        tree. A file whose size or mtime differs from the stat data recorded
+        in the index is hashed as a blob and only counts as modified when the
+        hash differs, so touching or copying a checkout keeps it clean.
+        Untracked files are ignored, as with ``git describe --dirty``; clean
+        filters (``autocrlf``, ``.gitattributes``) are not applied.
+        """
+        index_path = self.git_dir / "index"
+        if not index_path.is_file():
+            return False
+        entries = read_index(index_path)
+
+        _, head = self.head()
+        tracked: dict[str, str] = {}
+        if head:
+            tracked = {
+                path: sha
+                for path, mode, sha in self.tree_entries(self.commit_tree(head))
+                if mode != _GITLINK_MODE
+            }
+
+        staged = {entry.path: entry.sha for entry in entries if entry.mode != _GITLINK_MODE}
+        if any(entry.stage for entry in entries) or staged != tracked:
+            return True
+
+        for entry in entries:
+            if entry.mode == _GITLINK_MODE or entry.skip:
+                continue
+            path = self.root / entry.path
+            try:
+                info = os.lstat(path)
+            except OSError:
+                return True
+            if not _stat_matches(entry, info) and _blob_sha(path, info) != entry.sha:
+                return True
+        return False
+
+
+@dataclass(slots=True)
+class IndexEntry:
+    path: str
+    sha: str
+    mode: int
+    size: int
+    mtime: int
+    mtime_ns: int
+    stage: int
+    skip: bool
+
+
+def _stat_matches(entry: IndexEntry, info: os.stat_result) -> bool:
+    if info.st_size & 0xFFFFFFFF != entry.size:
+        return False
+    if int(info.st_mtime) & 0xFFFFFFFF != entry.mtime:
+        return False
+    return not entry.mtime_ns or info.st_mtime_ns % 1_000_000_000 == entry.mtime_ns
+
+
+def _blob_sha(path: Path, info: os.stat_result) -> str | None:
+    """Return the blob id git would record for ``path``, or ``None`` if it cannot."""
+    try:
+        if stat_module.S_ISLNK(info.st_mode):
+            # Path.readlink() would normalise the target git hashed verbatim.
+            data = os.fsencode(os.readlink(path))  # noqa: PTH115
+        elif stat_module.S_ISREG(info.st_mode):
+            data = path.read_bytes()
+        else:
+            return None
+    except OSError:
+        return None
+    return hashlib.sha1(b"blob %d\0" % len(data) + data, usedforsecurity=False).hexdigest()
+
+
+def read_index(path: Path) -> list[IndexEntry]:
+    """Parse the entries of a version 2, 3 or 4 git index file."""
+    data = path.read_bytes()
+    if data[:4] != b"DIRC":
+        raise GitError(f"Invalid index file: {path}")
+    version, count = struct.unpack(">II", data[4:12])
+    if version not in (2, 3, 4):
+        raise GitError(f"Unsupported index version {version}")
+
+    entries: list[IndexEntry] = []
+    position = 12
+    previous = b""
+    for _ in range(count):
+        start = position
+        (_, _, mtime, mtime_ns, _, _, mode, _, _, size) = struct.unpack(
+            ">10I", data[position : position + 40]
+        )
+        sha = data[position + 40 : position + 60].hex()
+        (flags,) = struct.unpack(">H", data[position + 60 : position + 62])
+        position += 62
+        extended = 0
+        if flags & 0x4000:
+            (extended,) = struct.unpack(">H", data[position : position + 2])
+            position += 2
+
+        if version == 4:
+            strip, position = _read_offset_varint(data, position)
+            nul = data.index(b"\0", position)
+            name = previous[: len(previous) - strip] + data[position:nul]
+            position = nul + 1
+        else:
+            nul = data.index(b"\0", position)
+            name = data[position:nul]
+            position = start + ((nul - start) // 8 + 1) * 8
+        previous = name
+
+        entries.append(
+            IndexEntry(
+                path=name.decode("utf-8", "surrogateescape"),
+                sha=sha,
+                mode=mode,
+                size=size,
+                mtime=mtime,
+                mtime_ns=mtime_ns,
+                stage=(flags >> 12) & 0x3,
+                skip=bool(flags & 0x8000) or bool(extended & 0x4000),
+            )
+        )
+    return entries
+
+
+def _read_offset_varint(data: bytes, position: int) -> tuple[int, int]:
+    byte = data[position]
+    position += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[position]
+        position += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, position
+
+
+def _inflate(data: mmap.mmap | bytes, position: int) -> bytes:
+    decompressor = zlib.decompressobj()
+    chunks = []
+    chunk_size = 4096
+    while not decompressor.eof:
+        chunk = data[position : position + chunk_size]
+        if not chunk:
+            break
+        chunks.append(decompressor.decompress(chunk))
+        position += chunk_size
+    return b"".join(chunks)
+
+
+def _read_size(delta: bytes, position: int) -> tuple[int, int]:
+    size = 0
+    shift = 0
+    while True:
+        byte = delta[position]
+        position += 1
+        size |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return size, position
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    _, position = _read_size(delta, 0)
+    target_size, position = _read_size(delta, position)
+    out = bytearray()
+    while position < len(delta):
+        opcode = delta[position]
+        position += 1
+        if opcode & 0x80:
+            offset = size = 0
+            for bit in range(4):
+                if opcode & (1 << bit):
+                    offset |= delta[position] << (8 * bit)
+                    position += 1
+            for bit in range(3):
+                if opcode & (0x10 << bit):
+                    size |= delta[position] << (8 * bit)
+                    position += 1
+            out += base[offset : offset + (size or 0x10000)]
+        elif opcode:
+            out += delta[position : position + opcode]
+            position += opcode
+        else:
+            raise GitError("Invalid delta opcode")
+    if len(out) != target_size:
+        raise GitError("Delta application produced an unexpected size")
+    return bytes(out)
+
+
+__all__ = [
+    "Commit",
+    "GitError",
+    "IndexEntry",
+    "Repository",
+    "find_repository",
+    "read_index",
+]
@@ -8,23 +8,18 @@ from texsmith.core.context import RenderContext
 from texsmith.fonts.scripts import render_moving_text
 
 from texsmith_template_exam.exam.mode import in_compact_mode, points_enabled
+from texsmith_template_exam.exam.points import record_points
 from texsmith_template_exam.exam.texsmith_compat import coerce_attribute, mark_processed
 from texsmith_template_exam.exam.utils import (
-    extract_dash_attrs_prefix,
     is_empty_title,
     is_truthy_attribute,
     matches_empty_title_pattern,
     normalize_answer_text,
     normalize_points,
-    parse_heading_attrs,
+    split_heading_attrs,
 )
 
 
-_EMPTY_TITLE_PATTERN = None
-_ATTRS_BLOCK_PATTERN = None
-_HEADING_DASH_ATTRS_PATTERN = None
-
-
 def _flag(context: RenderContext, key: str) -> bool:
     return bool(context.state.counters.get(key, 0))
 
@@ -166,34 +161,7 @@ def render_exam_headings(element: Tag, context: RenderContext) -> None:
         element.replace_with(mark_processed(NavigableString(latex)))
         return
 
-    raw_text = element.get_text(strip=False)
-    heading_attrs: dict[str, str] = {}
-    stripped_heading = raw_text.strip()
-    attrs_block_pattern = None if _ATTRS_BLOCK_PATTERN is None else _ATTRS_BLOCK_PATTERN
-    if attrs_block_pattern is not None:
-        attrs_match = attrs_block_pattern.search(stripped_heading)
-    else:
-        attrs_match = None
-    if attrs_match:
-        parsed_attrs = parse_heading_attrs(attrs_match.group("attrs"))
-        if parsed_attrs:
-            heading_attrs = parsed_attrs
-            raw_text = stripped_heading[: attrs_match.start()].rstrip()
-    if not heading_attrs:
-        dash_attrs = extract_dash_attrs_prefix(stripped_heading)
-        if dash_attrs:
-            attrs_text, tail_text = dash_attrs
-            parsed_attrs = parse_heading_attrs(attrs_text)
-            if parsed_attrs:
-                heading_attrs = parsed_attrs
-                raw_text = tail_text or "-"
-    if not heading_attrs and _HEADING_DASH_ATTRS_PATTERN is not None:
-        dash_attrs_match = _HEADING_DASH_ATTRS_PATTERN.match(stripped_heading)
-        if dash_attrs_match:
-            parsed_attrs = parse_heading_attrs(dash_attrs_match.group("attrs"))
-            if parsed_attrs:
-                heading_attrs = parsed_attrs
-                raw_text = "-"
+    raw_text, heading_attrs = split_heading_attrs(element.get_text(strip=False))
     text = render_moving_text(
         raw_text,
         context,
@@ -300,6 +268,8 @@ def render_exam_headings(element: Tag, context: RenderContext) -> None:
         context.state.add_heading(level=rendered_level, text=plain_text, ref=ref)
         return
 
+    if points_enabled(context):
+        record_points(context, rendered_level, points)
     lines.append(
         _heading_latex(
             level=rendered_level,
@@ -328,14 +298,4 @@ def close_open_parts(root: Tag, context: RenderContext) -> None:
     root.append(NavigableString("\n" + "\n".join(lines) + "\n"))
 
 
-def configure_heading_patterns(
-    *,
-    attrs_block_pattern: object,
-    heading_dash_attrs_pattern: object,
-) -> None:
-    global _ATTRS_BLOCK_PATTERN, _HEADING_DASH_ATTRS_PATTERN
-    _ATTRS_BLOCK_PATTERN = attrs_block_pattern
-    _HEADING_DASH_ATTRS_PATTERN = heading_dash_attrs_pattern
-
-
-__all__ = ["close_open_parts", "configure_heading_patterns", "render_exam_headings"]
+__all__ = ["close_open_parts", "render_exam_headings"]
@@ -3,10 +3,16 @@
 from __future__ import annotations
 
 from collections.abc import Mapping
+from dataclasses import dataclass, field
+import os
 from pathlib import Path
+import sys
+from types import MappingProxyType
 
 from texsmith.core.context import RenderContext
 
+from texsmith_template_exam.exam.filecache import FRONT_MATTER_CACHE, YAML_CACHE
+
 
 def _is_truthy(value: object) -> bool:
     if isinstance(value, bool):
@@ -90,16 +96,41 @@ def _merge_mappings(base: object, incoming: object) -> object:
     return merged
 
 
-def _source_config_payload(context: RenderContext) -> Mapping[str, object] | None:
-    cache_key = "_texsmith_source_config"
-    cached = context.runtime.get(cache_key)
-    if cached is not None:
-        return cached if isinstance(cached, Mapping) else None
+_RENDER_CACHE_KEY = "_texsmith_exam_render_cache"
+
+
+def _render_cache(context: RenderContext) -> dict[tuple[str, object], object]:
+    """Return the per-render scratch cache stored in the persistent runtime.
+
+    Entries are keyed by the path they were read for, so a context reused for
+    another document never sees stale values.
+    """
+    cache = context.runtime.get(_RENDER_CACHE_KEY)
+    if isinstance(cache, dict):
+        return cache
+    cache = {}
+    _attach_runtime(context, _RENDER_CACHE_KEY, cache)
+    return cache
+
 
+def _attach_runtime(context: RenderContext, key: str, value: object) -> None:
+    attach = getattr(context, "attach_runtime", None)
+    if callable(attach):
+        attach(**{key: value})
+    else:
+        context.runtime[key] = value
+
+
+def _source_config_payload(context: RenderContext) -> Mapping[str, object] | None:
     source_dir = context.runtime.get("source_dir")
     if not source_dir:
-        context.runtime[cache_key] = False
         return None
+    cache = _render_cache(context)
+    cache_key = ("source_config", str(source_dir))
+    if cache_key in cache:
+        cached = cache[cache_key]
+        return cached if isinstance(cached, Mapping) else None
+
     root = Path(str(source_dir))
     candidates = [
         root / "common.yaml",
@@ -107,48 +138,28 @@ def _source_config_payload(context: RenderContext) -> Mapping[str, object] | Non
         root / "config.yaml",
         root / "config.yml",
     ]
-    existing = [path for path in candidates if path.exists() and path.is_file()]
-    if not existing:
-        context.runtime[cache_key] = False
-        return None
-    try:
-        import yaml
-    except Exception:
-        context.runtime[cache_key] = False
-        return None
-
     merged: object = {}
-    for path in existing:
-        try:
-            payload = yaml.safe_load(path.read_text(encoding="utf-8"))
-        except Exception:
-            continue
+    for path in candidates:
+        payload = YAML_CACHE.get(path)
         if isinstance(payload, Mapping):
             merged = _merge_mappings(merged, payload)
 
-    if not isinstance(merged, Mapping):
-        context.runtime[cache_key] = False
+    if not isinstance(merged, Mapping) or not merged:
+        cache[cache_key] = None
         return None
-    context.runtime[cache_key] = merged
+    cache[cache_key] = merged
     return merged
 
 
 def front_matter_flag(context: RenderContext, keys: tuple[str, ...]) -> object:
-    cache_key = "_texsmith_front_matter"
-    cached = context.runtime.get(cache_key)
+    document_path = context.runtime.get("document_path")
+    if document_path is None:
+        return None
+    cache = _render_cache(context)
+    cache_key = ("front_matter", str(document_path))
+    cached = cache.get(cache_key)
     if cached is None:
-        document_path = context.runtime.get("document_path")
-        front_matter: dict[str, object] = {}
-        if document_path is not None:
-            try:
-                from texsmith.adapters.markdown import split_front_matter
-
-                raw = Path(document_path).read_text(encoding="utf-8")
-                front_matter, _ = split_front_matter(raw)
-            except Exception:
-                front_matter = {}
-        context.runtime[cache_key] = front_matter
-        cached = front_matter
+        cached = cache[cache_key] = FRONT_MATTER_CACHE.get(document_path, {})
     if not isinstance(cached, dict):
         return None
     for key in keys:
@@ -167,24 +178,25 @@ def front_matter_flag(context: RenderContext, keys: tuple[str, ...]) -> object:
     return None
 
 
-def resolve_value(
+def resolve_layer(
     context: RenderContext,
     keys: tuple[str, ...],
     *,
     include_runtime: bool = True,
     include_front_matter: bool = True,
-) -> object | None:
+) -> tuple[object | None, str | None]:
+    """Return the first value found for ``keys`` and the layer that supplied it."""
     override_value = _runtime_override_value(context, keys)
     if override_value is not None:
-        return override_value
+        return override_value, "template_overrides"
 
     config_value = _config_value(context, keys)
     if config_value is not None:
-        return config_value
+        return config_value, "config"
 
     source_value = _source_config_value(context, keys)
     if source_value is not None:
-        return source_value
+        return source_value, "source_config"
 
     if include_runtime:
         for key in keys:
@@ -193,66 +205,232 @@ def resolve_value(
             if key in context.runtime:
                 value = context.runtime.get(key)
                 if value is not None:
-                    return value
+                    return value, "runtime"
 
     if include_front_matter:
-        return front_matter_flag(context, keys)
-    return None
+        value = front_matter_flag(context, keys)
+        if value is not None:
+            return value, "front_matter"
+    return None, None
 
 
-def in_solution_mode(context: RenderContext) -> bool:
-    value = resolve_value(
+def resolve_value(
+    context: RenderContext,
+    keys: tuple[str, ...],
+    *,
+    include_runtime: bool = True,
+    include_front_matter: bool = True,
+) -> object | None:
+    value, _layer = resolve_layer(
         context,
-        ("solution", "exam.solution", "press.solution"),
-        include_runtime=True,
-        include_front_matter=True,
+        keys,
+        include_runtime=include_runtime,
+        include_front_matter=include_front_matter,
     )
-    if _is_truthy(value):
-        return True
-
-    # Fallback for project solution builds when overrides are not propagated.
+    return value
+
+
+_SOLUTION_KEYS = ("solution", "exam.solution", "press.solution")
+_COMPACT_KEYS = ("compact", "exam.compact", "press.compact")
+_POINTS_KEYS = ("points", "exam.points")
+_STYLE_KEYS = ("style", "exam.style")
+_PROFILE_KEYS = ("profile", "exam.profile")
+_QUESTION_CACHE_KEYS = ("question_cache", "exam.question_cache")
+_PAPER_KEYS = ("press.paper", "paper")
+_FONTS_KEYS = ("fonts.family", "fonts_family", "font_family")
+_FILLIN_SCALE_KEYS = (
+    "char-width-scale",
+    "fillin_char_width_scale",
+    "style.char-width-scale",
+    "fillin.char-width-scale",
+    "exam.char-width-scale",
+    "exam.fillin.char-width-scale",
+)
+_SETTINGS_KEY = "_texsmith_exam_settings"
+_SETTING_FIELDS = (
+    "solution",
+    "compact",
+    "points",
+    "style",
+    "fillin_scale",
+    "profile",
+    "question_cache",
+    "paper",
+    "fonts",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ExamSettings:
+    """Exam settings resolved once per render.
+
+    ``layers`` records where each value came from (``template_overrides``,
+    ``config``, ``source_config``, ``runtime``, ``front_matter``,
+    ``document_path`` or ``default``).
+    """
+
+    solution: bool = False
+    compact: bool = False
+    points: bool = True
+    style: Mapping[str, object] = field(default_factory=lambda: MappingProxyType({}))
+    fillin_scale: object | None = None
+    profile: object | None = None
+    question_cache: object | None = None
+    paper: object | None = None
+    fonts: object | None = None
+    layers: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+    def describe(self) -> list[dict[str, object]]:
+        return [
+            {
+                "setting": name,
+                "value": _plain(getattr(self, name)),
+                "layer": self.layers.get(name, "default"),
+            }
+            for name in _SETTING_FIELDS
+        ]
+
+    def dump(self) -> str:
+        rows = [
+            (str(row["setting"]), repr(row["value"]), str(row["layer"])) for row in self.describe()
+        ]
+        widths = [max(len(row[index]) for row in rows) for index in range(2)]
+        return "\n".join(
+            f"{name:<{widths[0]}}  {value:<{widths[1]}}  [{layer}]" for name, value, layer in rows
+        )
+
+
+def _plain(value: object) -> object:
+    if isinstance(value, Mapping):
+        return {key: _plain(item) for key, item in value.items()}
+    return value
+
+
+def _path_fallback(context: RenderContext, markers: tuple[str, str, str]) -> bool:
     document_path = context.runtime.get("document_path")
-    if document_path is not None:
-        path_text = str(document_path).replace("\\", "/").lower()
-        if "/solution/" in path_text or path_text.endswith("-solutions.md") or ".solution." in path_text:
-            return True
-    return False
+    if document_path is None:
+        return False
+    path_text = str(document_path).replace("\\", "/").lower()
+    directory, suffix, infix = markers
+    return directory in path_text or path_text.endswith(suffix) or infix in path_text
 
 
-def in_compact_mode(context: RenderContext) -> bool:
-    value = resolve_value(
-        context,
-        ("compact", "exam.compact", "press.compact"),
-        include_runtime=True,
-        include_front_matter=True,
-    )
-    if _is_truthy(value):
-        return True
+def build_exam_settings(context: RenderContext) -> ExamSettings:
+    """Resolve every exam setting from the context layers."""
+    layers: dict[str, str] = {}
 
+    solution_value, layer = resolve_layer(context, _SOLUTION_KEYS)
+    solution = _is_truthy(solution_value)
+    if solution and layer:
+        layers["solution"] = layer
+    # Fallback for project solution builds when overrides are not propagated.
+    elif _path_fallback(context, ("/solution/", "-solutions.md", ".solution.")):
+        solution = True
+        layers["solution"] = "document_path"
+    elif layer:
+        layers["solution"] = layer
+
+    compact_value, layer = resolve_layer(context, _COMPACT_KEYS)
+    compact = _is_truthy(compact_value)
+    if compact and layer:
+        layers["compact"] = layer
     # Fallback for project light builds where compact mode is generated in a
     # dedicated source directory before front-matter overrides are propagated.
-    document_path = context.runtime.get("document_path")
-    if document_path is not None:
-        path_text = str(document_path).replace("\\", "/").lower()
-        if "/light-src/" in path_text or path_text.endswith("-light.md") or ".light." in path_text:
-            return True
-    return False
+    elif _path_fallback(context, ("/light-src/", "-light.md", ".light.")):
+        compact = True
+        layers["compact"] = "document_path"
+    elif layer:
+        layers["compact"] = layer
+
+    points_value, layer = resolve_layer(context, _POINTS_KEYS)
+    if layer:
+        layers["points"] = layer
+
+    style_value, layer = resolve_layer(context, _STYLE_KEYS)
+    style = dict(style_value) if isinstance(style_value, dict) else {}
+    if layer and style:
+        layers["style"] = layer
+
+    fillin_scale: object | None = None
+    for key in _FILLIN_SCALE_KEYS:
+        fillin_scale, layer = resolve_layer(context, (key,))
+        if fillin_scale is not None:
+            layers["fillin_scale"] = f"{layer}:{key}"
+            break
+
+    profile, layer = resolve_layer(context, _PROFILE_KEYS)
+    if layer:
+        layers["profile"] = layer
+
+    question_cache, layer = resolve_layer(context, _QUESTION_CACHE_KEYS)
+    if layer:
+        layers["question_cache"] = layer
+
+    paper, layer = resolve_layer(context, _PAPER_KEYS)
+    if layer:
+        layers["paper"] = layer
+
+    fonts, layer = resolve_layer(context, _FONTS_KEYS)
+    if layer:
+        layers["fonts"] = layer
+
+    return ExamSettings(
+        solution=solution,
+        compact=compact,
+        points=_coerce_bool(points_value, default=True),
+        style=MappingProxyType(style),
+        fillin_scale=fillin_scale,
+        profile=profile,
+        question_cache=question_cache,
+        paper=paper,
+        fonts=fonts,
+        layers=MappingProxyType(layers),
+    )
+
+
+def attach_exam_settings(context: RenderContext) -> ExamSettings:
+    """Resolve the settings of the document rendered with ``context`` and store them.
+
+    The renderer calls this once at the start of every render; the snapshot
+    lives in the persistent runtime so it survives render phases.
+    """
+    settings = build_exam_settings(context)
+    _attach_runtime(context, _SETTINGS_KEY, settings)
+    if _is_truthy(os.environ.get("TEXSMITH_EXAM_DEBUG_SETTINGS")):
+        document = context.runtime.get("document_path") or "<document>"
+        sys.stderr.write(f"exam settings for {document}:\n{settings.dump()}\n")
+    return settings
+
+
+def exam_settings(context: RenderContext) -> ExamSettings:
+    """Return the settings snapshot of ``context``, attaching it on first use."""
+    settings = context.runtime.get(_SETTINGS_KEY)
+    if settings is None:
+        settings = attach_exam_settings(context)
+    return settings
+
+
+def in_solution_mode(context: RenderContext) -> bool:
+    return exam_settings(context).solution
+
+
+def in_compact_mode(context: RenderContext) -> bool:
+    return exam_settings(context).compact
 
 
 def points_enabled(context: RenderContext) -> bool:
-    value = resolve_value(
-        context,
-        ("points", "exam.points"),
-        include_runtime=True,
-        include_front_matter=True,
-    )
-    return _coerce_bool(value, default=True)
+    return exam_settings(context).points
 
 
 __all__ = [
+    "ExamSettings",
+    "attach_exam_settings",
+    "build_exam_settings",
+    "exam_settings",
     "front_matter_flag",
     "in_compact_mode",
     "in_solution_mode",
     "points_enabled",
+    "resolve_layer",
     "resolve_value",
 ]
@@ -0,0 +1,163 @@
+"""Point totals counted while rendering.
+
+With ``addpoints``, exam.cls only learns the total of a question, the number
+of questions and the grand total from the ``.aux`` file of the previous pass,
+so a cold build prints ``??`` in the cover grade table and in
+``\\ExamQuestionPoints`` until LaTeX runs again. The heading renderer already
+sees every ``points=`` attribute: it records them here, the document rule
+writes the tally as a LaTeX comment at the end of the body, and the template
+turns the tallies of every document into macros defined in the preamble.
+exam.cls redefines the same macros from the ``.aux`` on later passes.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from decimal import Decimal
+import json
+import re
+
+from bs4.element import NavigableString, Tag
+from texsmith.core.context import RenderContext
+
+from texsmith_template_exam.exam.mode import _attach_runtime
+
+
+POINTS_COMMENT = "%texsmith-exam-points "
+
+_POINTS_KEY = "_texsmith_exam_points"
+_NUMBER_RE = re.compile(r"^\d+(?:\.\d+)?$")
+_TALLY_RE = re.compile(rf"^{re.escape(POINTS_COMMENT)}(.*)$", re.MULTILINE)
+
+# (heading level, points) for every question (1), part (2), subpart (3) and
+# subsubpart (4), in document order.
+PointEntry = tuple[int, str | None]
+
+
+def recorded_points(context: RenderContext) -> list[PointEntry]:
+    """Return the point entries recorded so far for the document being rendered."""
+    entries = context.runtime.get(_POINTS_KEY)
+    if isinstance(entries, list):
+        return entries
+    entries = []
+    _attach_runtime(context, _POINTS_KEY, entries)
+    return entries
+
+
+def record_points(context: RenderContext, level: int, points: str | None) -> None:
+    """Record a question (level 1) or part heading and its ``points`` value."""
+    recorded_points(context).append((level, points))
+
+
+def emit_point_tally(root: Tag, context: RenderContext) -> None:
+    """Append the recorded entries to the document as a LaTeX comment."""
+    entries = context.runtime.get(_POINTS_KEY)
+    if not entries:
+        return
+    _attach_runtime(context, _POINTS_KEY, [])
+    root.append(NavigableString(f"\n{POINTS_COMMENT}{json.dumps(entries)}\n"))
+
+
+@dataclass(frozen=True, slots=True)
+class PointTotals:
+    """Totals per question and per part, numbered like exam.cls does."""
+
+    questions: tuple[Decimal, ...]
+    parts: tuple[tuple[Decimal, ...], ...]
+    subparts: int = 0
+    subsubparts: int = 0
+
+    @property
+    def total(self) -> Decimal:
+        return sum(self.questions, Decimal(0))
+
+
+def point_totals(entries: Iterable[PointEntry]) -> PointTotals | None:
+    """Sum ``entries``; ``None`` if a value is not a plain number (e.g. ``2\\half``)."""
+    questions: list[Decimal] = []
+    parts: list[list[Decimal]] = []
+    counts = {3: 0, 4: 0}
+    for level, points in entries:
+        if points is not None and not _NUMBER_RE.match(points):
+            return None
+        value = Decimal(points) if points is not None else Decimal(0)
+        if level == 1:
+            questions.append(value)
+            parts.append([])
+            continue
+        if not questions:
+            continue
+        questions[-1] += value
+        if level == 2:
+            parts[-1].append(value)
+            continue
+        counts[level] = counts.get(level, 0) + 1
+        if parts[-1]:
+            parts[-1][-1] += value
+    return PointTotals(
+        questions=tuple(questions),
+        parts=tuple(tuple(values) for values in parts),
+        subparts=counts[3],
+        subsubparts=counts[4],
+    )
+
+
+def _number(value: Decimal) -> str:
+    return format(value.normalize(), "f")
+
+
+def _roman(number: int) -> str:
+    numerals = (
+        (1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+        (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i"),
+    )  # fmt: skip
+    result = []
+    for value, numeral in numerals:
+        count, number = divmod(number, value)
+        result.append(numeral * count)
+    return "".join(result)
+
+
+def point_macros(latex: str) -> str:
+    """Return preamble definitions for the point tallies found in ``latex``.
+
+    Returns an empty string when the body has no tally or a total cannot be
+    computed, leaving exam.cls to read everything from the ``.aux``.
+    """
+    entries: list[PointEntry] = []
+    for match in _TALLY_RE.finditer(latex):
+        try:
+            tally = json.loads(match.group(1))
+        except ValueError:
+            return ""
+        entries.extend((int(level), points) for level, points in tally)
+    totals = point_totals(entries) if entries else None
+    if totals is None or not totals.questions:
+        return ""
+    lines = [
+        f"\\gdef\\exam@numpoints{{{_number(totals.total)}}}",
+        f"\\gdef\\exam@numquestions{{{len(totals.questions)}}}",
+        f"\\gdef\\exam@numparts{{{sum(len(parts) for parts in totals.parts)}}}",
+        f"\\gdef\\exam@numsubparts{{{totals.subparts}}}",
+        f"\\gdef\\exam@numsubsubparts{{{totals.subsubparts}}}",
+    ]
+    for question, (points, parts) in enumerate(zip(totals.questions, totals.parts, strict=True), 1):
+        lines.append(f"\\gdef\\pointsofq@{_roman(question)}{{{_number(points)}}}")
+        for part, part_points in enumerate(parts, 1):
+            lines.append(
+                f"\\gdef\\texsmith@pointsofpart@{_roman(question)}@{_roman(part)}"
+                f"{{{_number(part_points)}}}"
+            )
+    return "\n".join(lines)
+
+
+__all__ = [
+    "POINTS_COMMENT",
+    "PointTotals",
+    "emit_point_tally",
+    "point_macros",
+    "point_totals",
+    "record_points",
+    "recorded_points",
+]
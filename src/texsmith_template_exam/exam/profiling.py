@@ -0,0 +1,195 @@
+"""Opt-in per-rule timing for the exam renderer handlers.
+
+Profiling is enabled with the ``TEXSMITH_EXAM_PROFILE`` environment variable
+or the ``profile``/``exam.profile`` template attribute. A truthy value prints
+the report table to stderr and writes the JSON report to the working
+directory; any other value is used as the JSON report path (or directory).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import functools
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any
+
+from texsmith.core.context import RenderContext
+
+from texsmith_template_exam.exam.mode import _is_truthy, exam_settings
+
+
+PROFILE_ENV = "TEXSMITH_EXAM_PROFILE"
+_PROFILER_KEY = "_texsmith_exam_profiler"
+_FALSY = {"", "0", "false", "no", "off"}
+
+
+@dataclass(slots=True)
+class RuleStats:
+    """Aggregated measurements for one handler."""
+
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    tags: Counter[str] = field(default_factory=Counter)
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1e3, 3),
+            "max_ms": round(self.max * 1e3, 3),
+            "mean_ms": round(self.total * 1e3 / self.calls, 4) if self.calls else 0.0,
+            "tags": dict(self.tags.most_common()),
+        }
+
+
+class RuleProfiler:
+    """Collect per-handler timings for a single render."""
+
+    def __init__(self, target: str | None = None) -> None:
+        self.target = target
+        self.rules: dict[str, RuleStats] = {}
+        self._started = time.perf_counter()
+
+    def call(
+        self,
+        name: str,
+        handler: Callable[[Any, RenderContext], None],
+        element: Any,
+        context: RenderContext,
+    ) -> None:
+        stats = self.rules.get(name)
+        if stats is None:
+            stats = self.rules[name] = RuleStats()
+        start = time.perf_counter()
+        try:
+            handler(element, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.tags[str(getattr(element, "name", None) or "?")] += 1
+
+    def report(self, document: object | None = None) -> dict[str, object]:
+        ordered = sorted(self.rules.items(), key=lambda item: item[1].total, reverse=True)
+        return {
+            "document": str(document) if document is not None else None,
+            "render_ms": round((time.perf_counter() - self._started) * 1e3, 3),
+            "rules": {name: stats.as_dict() for name, stats in ordered},
+        }
+
+    def format_table(self, report: dict[str, object]) -> str:
+        rules: dict[str, dict[str, Any]] = report["rules"]  # type: ignore[assignment]
+        width = max([len("rule"), *(len(name) for name in rules)])
+        lines = [
+            f"exam rule profile: {report['document'] or '<document>'} ({report['render_ms']} ms)",
+            f"{'rule':<{width}} {'calls':>7} {'total ms':>10} {'max ms':>9}  tags",
+        ]
+        for name, stats in rules.items():
+            tags = ", ".join(f"{tag}:{count}" for tag, count in stats["tags"].items())
+            lines.append(
+                f"{name:<{width}} {stats['calls']:>7} "
+                f"{stats['total_ms']:>10.3f} {stats['max_ms']:>9.3f}  {tags}"
+            )
+        return "\n".join(lines)
+
+    def finish(self, context: RenderContext) -> dict[str, object]:
+        document = context.runtime.get("document_path")
+        report = self.report(document)
+        sys.stderr.write(self.format_table(report) + "\n")
+
+        target = self._report_path(document)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+        emitter = context.runtime.get("emitter")
+        event = getattr(emitter, "event", None)
+        if callable(event):
+            event("exam_rule_profile", report)
+        return report
+
+    def _report_path(self, document: object | None) -> Path:
+        stem = Path(str(document)).stem if document else "document"
+        filename = f"exam-profile-{stem}.json"
+        if not self.target:
+            return Path.cwd() / filename
+        target = Path(self.target).expanduser()
+        if target.is_dir() or self.target.endswith(("/", os.sep)):
+            return target / filename
+        return target
+
+
+def _profile_target(context: RenderContext) -> object | None:
+    env_value = os.environ.get(PROFILE_ENV)
+    if env_value is not None and env_value.strip().lower() not in _FALSY:
+        return env_value
+    value = exam_settings(context).profile
+    if value is None or value is False:
+        return None
+    if isinstance(value, str) and value.strip().lower() in _FALSY:
+        return None
+    return value
+
+
+def active_profiler(context: RenderContext) -> RuleProfiler | None:
+    """Return the profiler attached to ``context``, creating it when enabled."""
+    profiler = context.runtime.get(_PROFILER_KEY)
+    if profiler is not None:
+        return profiler or None
+
+    target = _profile_target(context)
+    if target is None:
+        profiler = False
+    else:
+        path = None if target is True or _is_truthy(target) else str(target)
+        profiler = RuleProfiler(path)
+    attach = getattr(context, "attach_runtime", None)
+    if callable(attach):
+        attach(**{_PROFILER_KEY: profiler})
+    else:
+        context.runtime[_PROFILER_KEY] = profiler
+    return profiler or None
+
+
+def profiled(handler: Callable[[Any, RenderContext], None]) -> Callable[[Any, RenderContext], None]:
+    """Wrap a ``@renders`` handler so it reports to the active profiler.
+
+    The wrapper keeps the handler name and rule definition, so it registers
+    exactly like the original; when profiling is off the only overhead is a
+    runtime lookup.
+    """
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    def wrapper(element: Any, context: RenderContext) -> None:
+        profiler = active_profiler(context)
+        if profiler is None:
+            handler(element, context)
+            return
+        profiler.call(name, handler, element, context)
+
+    return wrapper
+
+
+def finish_profile(context: RenderContext) -> dict[str, object] | None:
+    """Emit the report for the current render, if profiling is enabled."""
+    profiler = active_profiler(context)
+    if profiler is None:
+        return None
+    return profiler.finish(context)
+
+
+__all__ = [
+    "PROFILE_ENV",
+    "RuleProfiler",
+    "RuleStats",
+    "active_profiler",
+    "finish_profile",
+    "profiled",
+]
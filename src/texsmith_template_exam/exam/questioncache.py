@@ -0,0 +1,638 @@
+"""Per-question cache of rendered LaTeX fragments.
+
+Top-level headings that render as ``\\question`` split a document into
+segments. Each segment is keyed by a hash of its HTML and of the resolved exam
+settings; when the key is known, the segment's nodes are dropped before the
+first render pass and its stored LaTeX is spliced back in during the POST
+phase, after closing whatever ``parts`` environments the previous question
+left open.
+
+Boundary markers record, in every phase, how each segment changed the
+document state (headings, script usage, pygments styles, ...) so that a
+cached segment replays the same changes. Segments whose effects cannot be
+replayed exactly (images, footnotes, counters, citations, assets, deferred
+answer lines) are always rendered.
+
+The cache lives in memory for the lifetime of the process and is enabled with
+the ``TEXSMITH_EXAM_QUESTION_CACHE`` environment variable or the
+``question_cache``/``exam.question_cache`` attribute.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+import copy
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any
+
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, PageElement, Tag
+from texsmith.core.context import RenderContext
+from texsmith.core.rules import RenderPhase
+from texsmith.fonts.fallback import merge_fallback_summaries
+from texsmith.fonts.scripts import merge_script_usage
+
+from texsmith_template_exam.defaults import QUESTION_CACHE_ENV
+from texsmith_template_exam.exam.mode import _attach_runtime, _is_truthy, exam_settings
+from texsmith_template_exam.exam.points import PointEntry, recorded_points
+from texsmith_template_exam.exam.texsmith_compat import mark_processed, reset_script_counts
+
+
+SEGMENT_TAG = "texsmith-exam-segment"
+DEFAULT_MAX_ENTRIES = 1024
+
+_SESSION_KEY = "_texsmith_exam_question_session"
+_FALSY = {"", "0", "false", "no", "off"}
+_HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+_PART_FLAGS = (
+    ("exam_parts_open", "parts"),
+    ("exam_subparts_open", "subparts"),
+    ("exam_subsubparts_open", "subsubparts"),
+)
+_FLAG_KEYS = frozenset(flag for flag, _ in _PART_FLAGS)
+_QUESTIONS_BEGIN = "\\ExamQuestionsBegin\n"
+_PENDING_ANSWERLINE = "pending_question_answerline"
+_HEADING_MODE = "heading_mode_level"
+# Runtime keys the heading renderer updates on its own; everything else must
+# be left untouched by a segment for it to be cached.
+_RUNTIME_HEADING_KEYS = frozenset({_PENDING_ANSWERLINE, _HEADING_MODE, "drop_title"})
+_FINGERPRINT_RUNTIME_KEYS = (
+    "base_level",
+    "numbered",
+    "language",
+    "template",
+    "code",
+    "callouts_definitions",
+    "diagrams_backend",
+)
+_UNCACHEABLE_TAGS = ("img", "svg", "object", "embed", "iframe", "video", "audio", "picture")
+_UNCACHEABLE_CLASSES = frozenset({"mermaid", "drawio"})
+_FOOTNOTE_CLASSES = frozenset({"footnote", "footnote-ref"})
+_SENTINEL_PATTERN = re.compile("\x00(\\d+)\x00")
+
+
+@dataclass(frozen=True, slots=True)
+class StateDelta:
+    """Document state changes made by one segment during one render phase."""
+
+    headings: tuple[dict[str, Any], ...] = ()
+    solutions: tuple[dict[str, Any], ...] = ()
+    index_entries: tuple[tuple[str, ...], ...] = ()
+    pygments_styles: tuple[tuple[str, str], ...] = ()
+    has_index_entries: bool = False
+    requires_shell_escape: bool = False
+    callouts_used: bool = False
+    script_usage: tuple[dict[str, Any], ...] = ()
+    fallback_summary: tuple[dict[str, Any], ...] = ()
+    points: tuple[PointEntry, ...] = ()
+
+    def is_empty(self) -> bool:
+        return self == _EMPTY_DELTA
+
+    def only_code(self) -> bool:
+        """Whether the only changes are the ones code blocks make."""
+        return self.is_empty() or (
+            StateDelta(
+                pygments_styles=self.pygments_styles,
+                requires_shell_escape=self.requires_shell_escape,
+            )
+            == self
+        )
+
+    def apply(self, context: RenderContext) -> None:
+        state = context.state
+        state.headings.extend(copy.deepcopy(self.headings))
+        state.solutions.extend(copy.deepcopy(self.solutions))
+        state.index_entries.extend(self.index_entries)
+        state.pygments_styles.update(self.pygments_styles)
+        state.has_index_entries = state.has_index_entries or self.has_index_entries
+        state.requires_shell_escape = state.requires_shell_escape or self.requires_shell_escape
+        state.callouts_used = state.callouts_used or self.callouts_used
+        if self.script_usage:
+            state.script_usage = merge_script_usage(state.script_usage, self.script_usage)
+        if self.fallback_summary:
+            state.fallback_summary = merge_fallback_summaries(
+                state.fallback_summary, self.fallback_summary
+            )
+        if self.points:
+            recorded_points(context).extend(self.points)
+
+
+_EMPTY_DELTA = StateDelta()
+
+
+@dataclass(frozen=True, slots=True)
+class CachedQuestion:
+    """Rendered LaTeX of one question and the state it leaves behind.
+
+    ``body`` starts right after the ``\\end{...}`` lines that close the parts
+    of the previous question; ``prefix`` is what the heading emits before them.
+    ``part_writes`` are the updates of the part flags that follow that close.
+    """
+
+    prefix: str
+    body: str
+    part_writes: tuple[tuple[str, int], ...]
+    heading_mode_level: int | None
+    deltas: Mapping[RenderPhase, StateDelta]
+
+
+class QuestionCache:
+    """Thread-safe LRU of :class:`CachedQuestion` keyed by segment hash."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedQuestion] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedQuestion | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedQuestion) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stores = 0
+
+
+QUESTION_CACHE = QuestionCache()
+
+
+class _FlagLog(dict):
+    """``DocumentState.counters`` replacement that records part flag updates."""
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.writes: list[tuple[str, int]] = []
+
+    def __setitem__(self, key: str, value: int) -> None:
+        if key in _FLAG_KEYS:
+            self.writes.append((key, value))
+        super().__setitem__(key, value)
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    lengths: tuple[int, int, int, int]
+    pygments_styles: dict[str, str]
+    flags: tuple[bool, bool, bool]
+    frozen: tuple[object, ...]
+    runtime: dict[str, object]
+
+
+@dataclass(slots=True)
+class _Segment:
+    key: str | None
+    cached: CachedQuestion | None
+    has_code: bool
+    tail: str = ""
+    snapshots: dict[RenderPhase, _Snapshot] = field(default_factory=dict)
+    deltas: dict[RenderPhase, StateDelta | None] = field(default_factory=dict)
+    entry_flags: tuple[bool, ...] = ()
+    clean_entry: bool = True
+    exit: tuple[list[tuple[str, int]], int | None] | None = None
+
+
+@dataclass(slots=True)
+class _Session:
+    segments: list[_Segment]
+    current: dict[RenderPhase, int] = field(default_factory=dict)
+    phase_start: dict[RenderPhase, _Snapshot] = field(default_factory=dict)
+    sentinels: list[NavigableString] = field(default_factory=list)
+    store: bool = True
+    code_dirty: bool = False
+    script_usage: list[dict[str, Any]] = field(default_factory=list)
+    fallback_summary: list[dict[str, Any]] = field(default_factory=list)
+
+
+def question_cache_enabled(context: RenderContext) -> bool:
+    env_value = os.environ.get(QUESTION_CACHE_ENV)
+    if env_value is not None:
+        return env_value.strip().lower() not in _FALSY
+    return _is_truthy(exam_settings(context).question_cache)
+
+
+def _snapshot(context: RenderContext) -> _Snapshot:
+    state = context.state
+    counters = tuple(
+        sorted((key, value) for key, value in state.counters.items() if key not in _FLAG_KEYS)
+    )
+    return _Snapshot(
+        lengths=(
+            len(state.headings),
+            len(state.solutions),
+            len(state.index_entries),
+            len(recorded_points(context)),
+        ),
+        pygments_styles=dict(state.pygments_styles),
+        flags=(state.has_index_entries, state.requires_shell_escape, state.callouts_used),
+        frozen=(
+            counters,
+            state.exercise_counter,
+            len(state.citations),
+            len(state.abbreviations),
+            len(state.acronyms),
+            len(state.glossary),
+            len(state.snippets),
+            len(state.footnotes),
+            len(state.bibliography),
+            len(getattr(context.assets, "assets_map", ())),
+        ),
+        runtime={
+            key: value
+            for key, value in context.runtime.items()
+            if not key.startswith("_") and key not in _RUNTIME_HEADING_KEYS
+        },
+    )
+
+
+def _stash_fonts(session: _Session, context: RenderContext) -> None:
+    reset_script_counts(context)
+    state = context.state
+    if state.script_usage:
+        session.script_usage = merge_script_usage(session.script_usage, state.script_usage)
+        state.script_usage = []
+    if state.fallback_summary:
+        session.fallback_summary = merge_fallback_summaries(
+            session.fallback_summary, state.fallback_summary
+        )
+        state.fallback_summary = []
+
+
+def _restore_fonts(session: _Session, context: RenderContext) -> None:
+    state = context.state
+    state.script_usage = merge_script_usage(session.script_usage, state.script_usage)
+    state.fallback_summary = merge_fallback_summaries(
+        session.fallback_summary, state.fallback_summary
+    )
+
+
+def _same_runtime(before: Mapping[str, object], after: Mapping[str, object]) -> bool:
+    if before.keys() != after.keys():
+        return False
+    for key, value in before.items():
+        current = after[key]
+        if value is current:
+            continue
+        if isinstance(value, (str, int, float, bool)) and value == current:
+            continue
+        return False
+    return True
+
+
+def _delta(before: _Snapshot, context: RenderContext) -> StateDelta | None:
+    """Return the state changes since ``before``, or ``None`` if they cannot be replayed.
+
+    Script usage and fallback fonts are set unions, so they are moved aside at
+    every snapshot (see :func:`_stash_fonts`) and whatever was added since is
+    exactly the window's contribution.
+    """
+    after = _snapshot(context)
+    if after.frozen != before.frozen or not _same_runtime(before.runtime, after.runtime):
+        return None
+    if any(name not in after.pygments_styles for name in before.pygments_styles):
+        return None
+    state = context.state
+    headings, solutions, index_entries, points = before.lengths
+    return StateDelta(
+        headings=tuple(copy.deepcopy(state.headings[headings:])),
+        solutions=tuple(copy.deepcopy(state.solutions[solutions:])),
+        index_entries=tuple(state.index_entries[index_entries:]),
+        pygments_styles=tuple(
+            (name, style)
+            for name, style in after.pygments_styles.items()
+            if before.pygments_styles.get(name) != style
+        ),
+        has_index_entries=after.flags[0] and not before.flags[0],
+        requires_shell_escape=after.flags[1] and not before.flags[1],
+        callouts_used=after.flags[2] and not before.flags[2],
+        script_usage=tuple(copy.deepcopy(state.script_usage)),
+        fallback_summary=tuple(copy.deepcopy(state.fallback_summary)),
+        points=tuple(recorded_points(context)[points:]),
+    )
+
+
+def _part_flags(context: RenderContext) -> tuple[bool, ...]:
+    return tuple(bool(context.state.counters.get(flag, 0)) for flag, _ in _PART_FLAGS)
+
+
+def _closing_writes(flags: tuple[bool, ...]) -> list[tuple[str, int]]:
+    """Flag updates made when a heading closes the open parts environments."""
+    opened = [flag for (flag, _), is_open in zip(_PART_FLAGS, flags, strict=True) if is_open]
+    return [(flag, 0) for flag in reversed(opened)]
+
+
+def _closing_text(flags: tuple[bool, ...]) -> str:
+    environments = [env for (_, env), is_open in zip(_PART_FLAGS, flags, strict=True) if is_open]
+    return "".join(f"\\end{{{env}}}\n" for env in reversed(environments))
+
+
+def _heading_level(element: Tag, base_level: int) -> int:
+    return int(element.name[1:]) + base_level - 1
+
+
+def _descendants(nodes: Iterable[PageElement], names: Iterable[str]) -> list[Tag]:
+    names = tuple(names)
+    found: list[Tag] = []
+    for node in nodes:
+        if not isinstance(node, Tag):
+            continue
+        if node.name in names:
+            found.append(node)
+        found.extend(node.find_all(names))
+    return found
+
+
+def _is_local_link(anchor: Tag) -> bool:
+    href = str(anchor.get("href") or "")
+    return bool(href) and not href.startswith(("#", "http://", "https://", "mailto:"))
+
+
+def _cacheable(nodes: list[PageElement]) -> bool:
+    if _descendants(nodes, _UNCACHEABLE_TAGS):
+        return False
+    if any(_is_local_link(anchor) for anchor in _descendants(nodes, ("a",))):
+        return False
+    for node in nodes:
+        if not isinstance(node, Tag):
+            continue
+        for tag in (node, *node.find_all(class_=True)):
+            classes = tag.get("class") or []
+            if _UNCACHEABLE_CLASSES.intersection(classes):
+                return False
+    return True
+
+
+def _may_leave_answerline(nodes: list[PageElement]) -> bool:
+    """Whether a heading in ``nodes`` may defer its answer line past the segment."""
+    for heading in _descendants(nodes, _HEADING_TAGS):
+        if heading.get("answer") or heading.get("data-answer"):
+            return True
+        if "answer" in heading.get_text():
+            return True
+    return False
+
+
+def _fingerprint(context: RenderContext) -> str:
+    settings = exam_settings(context)
+    payload = {
+        "settings": [
+            settings.solution,
+            settings.compact,
+            settings.points,
+            dict(settings.style),
+            settings.fillin_scale,
+            settings.paper,
+            settings.fonts,
+        ],
+        "runtime": {key: context.runtime.get(key) for key in _FINGERPRINT_RUNTIME_KEYS},
+        "config": repr(context.config),
+    }
+    return json.dumps(payload, sort_keys=True, default=repr)
+
+
+def _segment_key(fingerprint: str, nodes: list[PageElement]) -> str:
+    digest = hashlib.sha256(fingerprint.encode("utf-8"))
+    for node in nodes:
+        digest.update(b"\0")
+        digest.update(str(node).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _session(context: RenderContext) -> _Session | None:
+    session = context.runtime.get(_SESSION_KEY)
+    return session if isinstance(session, _Session) else None
+
+
+def split_question_segments(root: BeautifulSoup, context: RenderContext) -> None:
+    """Insert segment markers before every question and drop the cached ones."""
+    if not question_cache_enabled(context):
+        return
+    container = root.find("body") or root
+    if container.find(SEGMENT_TAG, recursive=False) is not None:
+        return
+    base_level = context.runtime.get("base_level", 0) or 0
+    if any(_heading_level(h, base_level) < 1 for h in container.find_all(_HEADING_TAGS)):
+        return
+    # Footnotes are collected for the whole document before any segment renders.
+    if root.find(class_=lambda value: value in _FOOTNOTE_CLASSES):
+        return
+
+    children = list(container.children)
+    starts = [
+        index
+        for index, child in enumerate(children)
+        if isinstance(child, Tag)
+        and child.name in _HEADING_TAGS
+        and _heading_level(child, base_level) == 1
+    ]
+    if not starts:
+        return
+
+    fingerprint = _fingerprint(context)
+    previous = children[: starts[0]]
+    drops_title = bool(context.runtime.get("drop_title")) and not _descendants(
+        previous, _HEADING_TAGS
+    )
+    segments: list[_Segment] = []
+    for number, start in enumerate(starts):
+        end = starts[number + 1] if number + 1 < len(starts) else len(children)
+        nodes = children[start:end]
+        # Whitespace between blocks renders as-is and stays in the document.
+        tail = ""
+        while isinstance(nodes[-1], NavigableString) and not nodes[-1].strip():
+            tail = str(nodes.pop()) + tail
+        key = None
+        if _cacheable(nodes) and not (number == 0 and drops_title):
+            key = _segment_key(fingerprint, nodes)
+        cached = None
+        if key is not None and not _may_leave_answerline(previous):
+            cached = QUESTION_CACHE.get(key)
+        marker = root.new_tag(SEGMENT_TAG, attrs={"data-index": str(number)})
+        nodes[0].insert_before(marker)
+        if cached is not None:
+            for node in nodes:
+                node.extract()
+        segments.append(
+            _Segment(
+                key=key,
+                cached=cached,
+                has_code=bool(_descendants(nodes, ("pre", "code"))),
+                tail=tail,
+            )
+        )
+        previous = nodes
+    container.append(root.new_tag(SEGMENT_TAG, attrs={"data-index": str(len(starts))}))
+    context.state.counters = _FlagLog(context.state.counters)
+    _attach_runtime(context, _SESSION_KEY, _Session(segments))
+
+
+def mark_phase_start(_root: Tag, context: RenderContext) -> None:
+    """Snapshot the state before the document-level rules of a phase run."""
+    session = _session(context)
+    if session is not None and context.phase is not None:
+        _stash_fonts(session, context)
+        session.phase_start[context.phase] = _snapshot(context)
+
+
+def _check_document_rules(session: _Session, start: _Snapshot, context: RenderContext) -> None:
+    # Document-level rules (code fallbacks, lists, footnotes) process every
+    # segment at once, so their changes cannot be attributed to one segment.
+    delta = _delta(start, context)
+    if delta is None or not delta.only_code():
+        session.store = False
+    elif not delta.is_empty():
+        session.code_dirty = True
+
+
+def render_segment_boundary(element: Tag, context: RenderContext) -> None:
+    """Close the previous segment's window and splice cached LaTeX in POST."""
+    session = _session(context)
+    phase = context.phase
+    if session is None or phase is None:
+        element.decompose()
+        return
+
+    index = int(element.get("data-index", 0))
+    previous = session.current.get(phase)
+    if previous is None:
+        start = session.phase_start.get(phase)
+        if start is not None:
+            _check_document_rules(session, start, context)
+    else:
+        segment = session.segments[previous]
+        segment.deltas[phase] = _delta(segment.snapshots[phase], context)
+    session.current[phase] = index
+    _stash_fonts(session, context)
+
+    segment = session.segments[index] if index < len(session.segments) else None
+    if segment is not None:
+        if segment.cached is not None:
+            segment.cached.deltas[phase].apply(context)
+        segment.snapshots[phase] = _snapshot(context)
+    if phase is not RenderPhase.POST:
+        return
+
+    flags = _part_flags(context)
+    pending = context.runtime.get(_PENDING_ANSWERLINE)
+    counters = context.state.counters
+    writes = list(counters.writes) if isinstance(counters, _FlagLog) else None
+    if isinstance(counters, _FlagLog):
+        counters.writes.clear()
+    if previous is not None:
+        exit_segment = session.segments[previous]
+        if pending or writes is None:
+            exit_segment.exit = None
+        else:
+            exit_segment.exit = (writes, context.runtime.get(_HEADING_MODE))
+
+    sentinel = mark_processed(NavigableString(f"\x00{index}\x00"))
+    session.sentinels.append(sentinel)
+    replacement: list[PageElement] = [sentinel]
+    if segment is not None:
+        segment.entry_flags = flags
+        segment.clean_entry = not pending
+        cached = segment.cached
+        if cached is not None:
+            text = cached.prefix + _closing_text(flags) + cached.body
+            replacement.append(mark_processed(NavigableString(text)))
+            for flag, value in (*_closing_writes(flags), *cached.part_writes):
+                counters[flag] = value
+            context.runtime[_HEADING_MODE] = cached.heading_mode_level
+    element.replace_with(*replacement)
+
+
+def _capture(segment: _Segment, chunk: str, session: _Session) -> CachedQuestion | None:
+    if not session.store or (session.code_dirty and segment.has_code):
+        return None
+    if not segment.clean_entry or segment.exit is None:
+        return None
+    deltas = {phase: segment.deltas.get(phase) for phase in RenderPhase}
+    if any(delta is None for delta in deltas.values()):
+        return None
+    writes, heading_mode_level = segment.exit
+    closing_writes = _closing_writes(segment.entry_flags)
+    if writes[: len(closing_writes)] != closing_writes:
+        return None
+    if not chunk.endswith(segment.tail):
+        return None
+    chunk = chunk[: len(chunk) - len(segment.tail)]
+    closing = _closing_text(segment.entry_flags)
+    if chunk.startswith(_QUESTIONS_BEGIN + closing):
+        prefix = _QUESTIONS_BEGIN
+    elif chunk.startswith(closing):
+        prefix = ""
+    else:
+        return None
+    return CachedQuestion(
+        prefix=prefix,
+        body=chunk[len(prefix) + len(closing) :],
+        part_writes=tuple(writes[len(closing_writes) :]),
+        heading_mode_level=heading_mode_level,
+        deltas=deltas,
+    )
+
+
+def store_question_fragments(root: Tag, context: RenderContext) -> None:
+    """Store the LaTeX of every rendered question and remove the markers."""
+    session = _session(context)
+    if session is None or not session.sentinels:
+        return
+    pieces = _SENTINEL_PATTERN.split(root.get_text())
+    for index_text, chunk in zip(pieces[1::2], pieces[2::2], strict=True):
+        index = int(index_text)
+        if index >= len(session.segments):
+            continue
+        segment = session.segments[index]
+        if segment.key is None or segment.cached is not None:
+            continue
+        entry = _capture(segment, chunk, session)
+        if entry is not None:
+            QUESTION_CACHE.put(segment.key, entry)
+    for sentinel in session.sentinels:
+        sentinel.extract()
+    session.sentinels.clear()
+    _restore_fonts(session, context)
+    context.state.counters = dict(context.state.counters)
+
+
+__all__ = [
+    "DEFAULT_MAX_ENTRIES",
+    "QUESTION_CACHE",
+    "QUESTION_CACHE_ENV",
+    "SEGMENT_TAG",
+    "CachedQuestion",
+    "QuestionCache",
+    "StateDelta",
+    "mark_phase_start",
+    "question_cache_enabled",
+    "render_segment_boundary",
+    "split_question_segments",
+    "store_question_fragments",
+]
@@ -6,7 +6,6 @@ import re
 
 from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag
-from texsmith.adapters.markdown import render_markdown
 from texsmith.core.context import RenderContext
 
 from texsmith_template_exam.exam.mode import in_compact_mode, in_solution_mode
@@ -19,7 +18,7 @@ from texsmith_template_exam.exam.texsmith_compat import (
     render_images,
 )
 from texsmith_template_exam.exam.utils import expand_lines_value, normalize_box_dim
-from texsmith_template_exam.markdown import exam_markdown_extensions
+from texsmith_template_exam.markdown import render_exam_markdown
 
 
 _SOLUTION_PATTERN = re.compile(
@@ -265,7 +264,7 @@ def render_solution_admonition(element: Tag, context: RenderContext) -> None:
         pre = candidate if candidate.name == "pre" else candidate.find("pre")
         if pre is not None:
             code_text = pre.get_text()
-            html = render_markdown(code_text, exam_markdown_extensions()).html
+            html = render_exam_markdown(code_text)
             soup = BeautifulSoup(html, "html.parser")
             _convert_math_scripts(soup)
             for para in soup.find_all("p"):
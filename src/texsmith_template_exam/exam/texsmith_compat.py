@@ -1,13 +1,16 @@
-"""Compatibility layer for texsmith internal helpers."""
+"""Compatibility layer for texsmith internal helpers.
+
+The helpers live in texsmith's private handler modules. They are resolved on
+first call rather than at import time, so loading the template or the CLI does
+not import the handlers until a document is actually rendered.
+"""
 
 from __future__ import annotations
 
-from texsmith.adapters.handlers._helpers import coerce_attribute, mark_processed
-from texsmith.adapters.handlers.admonitions import gather_classes
-from texsmith.adapters.handlers.blocks import _prepare_rich_text_content
-from texsmith.adapters.handlers.code import _is_ascii_art, _resolve_code_engine
-from texsmith.adapters.handlers.inline import _payload_is_block_environment
-from texsmith.adapters.handlers.media import render_images
+from collections.abc import Callable
+from functools import cache
+from importlib import import_module
+from typing import Any
 
 
 __all__ = [
@@ -18,12 +21,49 @@ __all__ = [
     "payload_is_block_environment",
     "prepare_rich_text_content",
     "render_images",
+    "reset_script_counts",
     "resolve_code_engine",
 ]
 
+_HANDLERS = "texsmith.adapters.handlers"
+
+
+@cache
+def _resolve(module: str, name: str) -> Callable[..., Any]:
+    return getattr(import_module(f"{_HANDLERS}.{module}"), name)
+
+
+def _deferred(module: str, name: str, alias: str) -> Callable[..., Any]:
+    def helper(*args: Any, **kwargs: Any) -> Any:
+        return _resolve(module, name)(*args, **kwargs)
+
+    helper.__name__ = helper.__qualname__ = alias
+    helper.__doc__ = f"Call ``{_HANDLERS}.{module}.{name}``, importing it on first use."
+    return helper
+
 
 # Re-export with stable names used by this project.
-prepare_rich_text_content = _prepare_rich_text_content
-is_ascii_art = _is_ascii_art
-resolve_code_engine = _resolve_code_engine
-payload_is_block_environment = _payload_is_block_environment
+coerce_attribute = _deferred("_helpers", "coerce_attribute", "coerce_attribute")
+mark_processed = _deferred("_helpers", "mark_processed", "mark_processed")
+gather_classes = _deferred("admonitions", "gather_classes", "gather_classes")
+prepare_rich_text_content = _deferred(
+    "blocks", "_prepare_rich_text_content", "prepare_rich_text_content"
+)
+is_ascii_art = _deferred("code", "_is_ascii_art", "is_ascii_art")
+resolve_code_engine = _deferred("code", "_resolve_code_engine", "resolve_code_engine")
+payload_is_block_environment = _deferred(
+    "inline", "_payload_is_block_environment", "payload_is_block_environment"
+)
+render_images = _deferred("media", "render_images", "render_images")
+
+
+def reset_script_counts(context: Any) -> None:
+    """Forget the script runs counted so far by the phase's ``ScriptDetector``.
+
+    The detector reports cumulative usage on every call; clearing it makes the
+    next calls report only the scripts they see themselves.
+    """
+    detector = context.runtime.get("_texsmith_script_detector")
+    specs = getattr(detector, "_specs", None)
+    if isinstance(specs, dict):
+        specs.clear()
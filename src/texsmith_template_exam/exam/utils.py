@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
 import re
 
 
+_ATTRS_BLOCK_PATTERN = re.compile(r"\\?\{(?P<attrs>[^}]*)\\?\}\s*$")
+_HEADING_DASH_ATTRS_PATTERN = re.compile(r"^\s*-\s*\\?\{(?P<attrs>.*)\\?\}\s*$")
+_CHOICE_MARKER_PATTERN = re.compile(r"^\[(?P<mark>[ xX])\]")
 _EMPTY_TITLE_PATTERN = re.compile(r"^[_\-\u2010\u2011\u2012\u2013\u2014\u2212]+$")
 _HEADING_ATTR_PATTERN = re.compile(
     r'(?P<key>[A-Za-z_][A-Za-z0-9_-]*)\s*=\s*(?P<value>"[^"]*"|\'[^\']*\'|«[^»]*»|“[^”]*”|[^,\s]+)'
@@ -62,6 +66,52 @@ def parse_heading_attrs(attrs: str) -> dict[str, str]:
     return parsed
 
 
+def split_heading_attrs(text: str) -> tuple[str, dict[str, str]]:
+    """Split heading text into its title and ``{key=value}`` attributes.
+
+    Attributes trail the title (``Title {points=2}``) or follow a leading
+    dash (``- {points=2} Title``). Text without attributes is returned as is.
+    """
+    stripped = text.strip()
+    match = _ATTRS_BLOCK_PATTERN.search(stripped)
+    if match:
+        attrs = parse_heading_attrs(match.group("attrs"))
+        if attrs:
+            return stripped[: match.start()].rstrip(), attrs
+    dash_attrs = extract_dash_attrs_prefix(stripped)
+    if dash_attrs:
+        attrs = parse_heading_attrs(dash_attrs[0])
+        if attrs:
+            return dash_attrs[1] or "-", attrs
+    match = _HEADING_DASH_ATTRS_PATTERN.match(stripped)
+    if match:
+        attrs = parse_heading_attrs(match.group("attrs"))
+        if attrs:
+            return "-", attrs
+    return text, {}
+
+
+def split_choice_marker(text: str) -> tuple[bool, str] | None:
+    """Return ``(checked, rest)`` when ``text`` starts with a ``[ ]``/``[x]`` task marker."""
+    match = _CHOICE_MARKER_PATTERN.match(text)
+    if match is None:
+        return None
+    return match.group("mark") != " ", text[match.end() :].strip()
+
+
+def choice_flags(items: Sequence[tuple[bool | None, bool]]) -> tuple[bool, ...] | None:
+    """Return which items of a bullet list are correct choices.
+
+    ``items`` holds, per list item, its checkbox state (``None`` without a
+    checkbox) and whether it contains a nested list. A list is a
+    multiple-choice block when at least one item has a checkbox and none
+    nests another list; ``None`` is returned for any other list.
+    """
+    if any(nested for _, nested in items) or all(checked is None for checked, _ in items):
+        return None
+    return tuple(bool(checked) for checked, _ in items)
+
+
 def normalize_style_choice(value: object | None, *, default: str, aliases: dict[str, str]) -> str:
     if value is None:
         return default
@@ -158,6 +208,7 @@ def matches_empty_title_pattern(text: str) -> bool:
 
 
 __all__ = [
+    "choice_flags",
     "choice_label",
     "expand_lines_value",
     "extract_dash_attrs_prefix",
@@ -170,4 +221,6 @@ __all__ = [
     "normalize_points",
     "normalize_style_choice",
     "parse_heading_attrs",
+    "split_choice_marker",
+    "split_heading_attrs",
 ]
@@ -2,23 +2,38 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
-import subprocess
+import threading
+import time
 from typing import Any
 import warnings
 
+from texsmith_template_exam.exam.gitrepo import GitError, Repository, find_repository
 
-_GIT_VERSION: str | None = None
-_GIT_VERSION_READY = False
+
+# How long a ``-dirty`` flag is trusted before the worktree is checked again.
+DIRTY_CHECK_SECONDS = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class _CachedVersion:
+    stamp: tuple[int, ...]
+    describe: str
+    version: str
+    checked: float
+
+
+_GIT_VERSIONS: dict[Path, _CachedVersion] = {}
+_GIT_VERSIONS_LOCK = threading.Lock()
 
 
 def reset_git_cache() -> None:
-    global _GIT_VERSION_READY, _GIT_VERSION
-    _GIT_VERSION_READY = False
-    _GIT_VERSION = None
+    with _GIT_VERSIONS_LOCK:
+        _GIT_VERSIONS.clear()
 
 
-def format_exam_version(value: Any) -> str:
+def format_exam_version(value: Any, source: Path | str | None = None) -> str:
     if value is None:
         return ""
     text = str(value).strip()
@@ -27,63 +42,108 @@ def format_exam_version(value: Any) -> str:
     if text.lower() != "git":
         return text
 
-    return get_git_version()
+    return get_git_version(source)
 
 
-def get_git_version() -> str:
-    global _GIT_VERSION_READY, _GIT_VERSION
-    if _GIT_VERSION_READY:
-        return _GIT_VERSION or ""
-    _GIT_VERSION_READY = True
-    _GIT_VERSION = ""
+def get_git_version(source: Path | str | None = None) -> str:
+    """Return ``git describe --tags --dirty`` for the repository holding ``source``.
 
-    repo_root = resolve_git_root()
-    if repo_root is None:
+    ``source`` is the document (or its directory); the current working
+    directory is used when it is not known. Results are cached per repository
+    root until ``HEAD``, the branch it points to, the tags or the index change.
+    Worktree edits do not touch those files, so when a tag makes the
+    ``-dirty`` flag visible it is re-checked after :data:`DIRTY_CHECK_SECONDS`.
+    """
+    found = resolve_git_root(source)
+    if found is None:
         warnings.warn(
-            "version=git requested but no git repository was found; "
-            "cannot resolve git version.",
+            "version=git requested but no git repository was found; cannot resolve git version.",
             stacklevel=2,
         )
         return ""
+    root, git_dir = found
+
+    stamp = _repository_stamp(root, git_dir)
+    now = time.monotonic()
+    with _GIT_VERSIONS_LOCK:
+        cached = _GIT_VERSIONS.get(root)
+    repository = Repository(root, git_dir)
+    if cached is not None and cached.stamp == stamp:
+        if not cached.describe or now - cached.checked < DIRTY_CHECK_SECONDS:
+            return cached.version
+        describe = cached.describe
+        version = _with_dirty_flag(repository, describe)
+    else:
+        describe = _describe(repository)
+        version = _with_dirty_flag(repository, describe) if describe else _short_head(repository)
+    if not version:
+        warnings.warn("version=git requested but git metadata could not be read.", stacklevel=2)
+    with _GIT_VERSIONS_LOCK:
+        _GIT_VERSIONS[root] = _CachedVersion(stamp, describe, version, now)
+    return version
+
+
+def read_git_version(repository: Repository) -> str:
+    describe = _describe(repository)
+    return _with_dirty_flag(repository, describe) if describe else _short_head(repository)
+
+
+def _describe(repository: Repository) -> str:
+    try:
+        return repository.describe() or ""
+    except (GitError, OSError, ValueError):
+        return ""
 
-    describe = run_git(repo_root, ["describe", "--tags", "--dirty"])
-    if describe:
-        _GIT_VERSION = describe
-        return describe
 
-    short = run_git(repo_root, ["rev-parse", "--short=6", "HEAD"])
-    if short:
-        _GIT_VERSION = short
-        return short
+def _with_dirty_flag(repository: Repository, describe: str) -> str:
+    try:
+        return f"{describe}-dirty" if repository.is_dirty() else describe
+    except (GitError, OSError, ValueError):
+        return ""
 
-    warnings.warn("version=git requested but git metadata could not be read.", stacklevel=2)
-    return ""
 
+def _short_head(repository: Repository) -> str:
+    try:
+        _, head = repository.head()
+    except (GitError, OSError, ValueError):
+        return ""
+    return head[:6] if head else ""
 
-def resolve_git_root() -> Path | None:
-    repo = run_git(Path(__file__).resolve().parent, ["rev-parse", "--show-toplevel"])
-    if not repo:
-        return None
-    return Path(repo)
 
+def resolve_git_root(source: Path | str | None = None) -> tuple[Path, Path] | None:
+    """Return ``(worktree_root, git_dir)`` for ``source`` (default: the working directory)."""
+    start = Path(source) if source else Path.cwd()
+    return find_repository(start)
 
-def run_git(repo_root: Path, args: list[str]) -> str:
+
+def _repository_stamp(root: Path, git_dir: Path) -> tuple[int, ...]:
+    paths = [git_dir / "HEAD", git_dir / "index"]
     try:
-        result = subprocess.run(
-            ["git", "-C", str(repo_root), *args],
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-    except (OSError, subprocess.CalledProcessError):
-        return ""
-    return result.stdout.strip()
+        head = paths[0].read_text(encoding="utf-8").strip()
+    except OSError:
+        head = ""
+    repository = Repository(root, git_dir)
+    if head.startswith("ref:"):
+        ref = head[4:].strip()
+        paths.extend([git_dir / ref, repository.common_dir / ref])
+    paths.extend([repository.common_dir / "packed-refs", repository.common_dir / "refs" / "tags"])
+
+    stamp: list[int] = []
+    for path in paths:
+        try:
+            info = path.stat()
+        except OSError:
+            stamp.extend((0, 0))
+            continue
+        stamp.extend((info.st_mtime_ns, info.st_size))
+    return tuple(stamp)
 
 
 __all__ = [
+    "DIRTY_CHECK_SECONDS",
     "format_exam_version",
     "get_git_version",
+    "read_git_version",
     "reset_git_cache",
     "resolve_git_root",
-    "run_git",
 ]
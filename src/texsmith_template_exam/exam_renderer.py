@@ -18,10 +18,22 @@ from texsmith_template_exam.exam.fenced_code import (
 from texsmith_template_exam.exam.fillin import build_fillin_latex, compute_fillin_width
 from texsmith_template_exam.exam.headings import (
     close_open_parts as _close_open_parts,
-    configure_heading_patterns as _configure_heading_patterns,
     render_exam_headings as _render_exam_headings,
 )
-from texsmith_template_exam.exam.mode import in_compact_mode, in_solution_mode
+from texsmith_template_exam.exam.mode import (
+    attach_exam_settings,
+    in_compact_mode,
+    in_solution_mode,
+)
+from texsmith_template_exam.exam.points import emit_point_tally as _emit_point_tally
+from texsmith_template_exam.exam.profiling import finish_profile, profiled
+from texsmith_template_exam.exam.questioncache import (
+    SEGMENT_TAG,
+    mark_phase_start as _mark_phase_start,
+    render_segment_boundary as _render_segment_boundary,
+    split_question_segments as _split_question_segments,
+    store_question_fragments as _store_question_fragments,
+)
 from texsmith_template_exam.exam.solutions import (
     promote_solution_admonitions as _promote_solution_admonitions,
     render_exam_images as _render_exam_images,
@@ -98,6 +110,18 @@ def set_exam_callouts(_root: Tag, context: RenderContext) -> None:
     _ensure_solution_callout(context)
 
 
+@renders(
+    DOCUMENT_NODE,
+    phase=RenderPhase.PRE,
+    priority=-2000,
+    name="exam_settings_snapshot",
+    auto_mark=False,
+)
+def snapshot_exam_settings(_root: Tag, context: RenderContext) -> None:
+    """Resolve the exam settings once, before any other exam rule reads them."""
+    attach_exam_settings(context)
+
+
 def _close_subsubparts(context: RenderContext, lines: list[str]) -> None:
     if _flag(context, "exam_subsubparts_open"):
         lines.append(r"\end{subsubparts}")
@@ -225,13 +249,6 @@ _SOLUTION_PATTERN = re.compile(
 _LINES_PATTERN = re.compile(r"\blines\s*=\s*([^\s,}]+)\b")
 _GRID_PATTERN = re.compile(r"\bgrid\s*=\s*([^\s,}]+)\b")
 _BOX_PATTERN = re.compile(r"\bbox\s*=\s*([^\s,}]+)\b")
-_ATTRS_BLOCK_PATTERN = re.compile(r"\\?\{(?P<attrs>[^}]*)\\?\}\s*$")
-_HEADING_DASH_ATTRS_PATTERN = re.compile(r"^\s*-\s*\\?\{(?P<attrs>.*)\\?\}\s*$")
-
-_configure_heading_patterns(
-    attrs_block_pattern=_ATTRS_BLOCK_PATTERN,
-    heading_dash_attrs_pattern=_HEADING_DASH_ATTRS_PATTERN,
-)
 
 
 def _exam_style(context: RenderContext) -> dict[str, object]:
@@ -515,6 +532,48 @@ def _render_fenced_segments(
     return "\n\n".join(parts) + ("\n" if parts else "")
 
 
+_FILLIN_SKIP_TAGS = frozenset({"code", "pre", "script"})
+
+
+def _skips_fillins(node: Tag, *, allow_latex_raw: bool) -> bool:
+    if node.name in _FILLIN_SKIP_TAGS:
+        return True
+    if allow_latex_raw:
+        return False
+    return "latex-raw" in gather_classes(node.get("class")) or (
+        node.get("data-texsmith-latex") == "true"
+    )
+
+
+def _collect_fillin_strings(
+    root: Tag,
+    pattern: re.Pattern[str],
+    *,
+    allow_latex_raw: bool,
+) -> list[NavigableString]:
+    """Return text nodes containing placeholders, in document order.
+
+    The walk is iterative and prunes ``code``/``pre``/``script`` and raw LaTeX
+    subtrees as soon as they are reached, so each node is visited at most once.
+    """
+    found: list[NavigableString] = []
+    if _skips_fillins(root, allow_latex_raw=allow_latex_raw):
+        return found
+    stack: list[Tag | NavigableString] = list(reversed(root.contents))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, NavigableString):
+            if getattr(node, "processed", False) and not allow_latex_raw:
+                continue
+            if pattern.search(node) is not None:
+                found.append(node)
+            continue
+        if _skips_fillins(node, allow_latex_raw=allow_latex_raw):
+            continue
+        stack.extend(reversed(node.contents))
+    return found
+
+
 def _replace_fillin_placeholders(
     root: Tag,
     context: RenderContext,
@@ -523,30 +582,14 @@ def _replace_fillin_placeholders(
     pattern: re.Pattern[str] = _FILLIN_PATTERN,
 ) -> None:
     """Replace [answer]{w=50} placeholders with exam.cls fill-ins."""
+    nodes = _collect_fillin_strings(root, pattern, allow_latex_raw=allow_latex_raw)
+    if not nodes:
+        return
+
     legacy_accents = getattr(context.config, "legacy_latex_accents", False)
-    for node in list(root.find_all(string=True)):
-        if getattr(node, "processed", False) and not allow_latex_raw:
-            continue
+    solution_mode = in_solution_mode(context)
+    for node in nodes:
         text = str(node)
-        if not text or pattern.search(text) is None:
-            continue
-
-        parent = node.parent
-        skip = False
-        while parent is not None:
-            if getattr(parent, "name", None) in {"code", "pre", "script"}:
-                skip = True
-                break
-            classes = gather_classes(getattr(parent, "get", lambda *_: None)("class"))
-            if (not allow_latex_raw) and (
-                "latex-raw" in classes or parent.get("data-texsmith-latex") == "true"
-            ):
-                skip = True
-                break
-            parent = getattr(parent, "parent", None)
-        if skip:
-            continue
-
         segments: list[NavigableString] = []
         cursor = 0
         for match in pattern.finditer(text):
@@ -565,21 +608,13 @@ def _replace_fillin_placeholders(
                 answer_latex=answer,
                 attrs=attrs,
                 context=context,
-                solution_mode=in_solution_mode(context),
+                solution_mode=solution_mode,
             )
             segments.append(mark_processed(NavigableString(latex)))
             cursor = match.end()
         if cursor < len(text):
             segments.append(NavigableString(text[cursor:]))
-
-        if not segments:
-            continue
-        first = segments[0]
-        node.replace_with(first)
-        cursor_node = first
-        for segment in segments[1:]:
-            cursor_node.insert_after(segment)
-            cursor_node = segment
+        node.replace_with(*segments)
 
 
 @renders(
@@ -852,25 +887,169 @@ def close_open_parts(root: Tag, context: RenderContext) -> None:
     _close_open_parts(root, context)
 
 
+@renders(
+    DOCUMENT_NODE,
+    phase=RenderPhase.PRE,
+    priority=100,
+    name="exam_question_cache_split",
+    auto_mark=False,
+)
+def split_question_segments(root: Tag, context: RenderContext) -> None:
+    """Mark question boundaries and drop questions whose LaTeX is cached."""
+    _split_question_segments(root, context)
+
+
+@renders(
+    DOCUMENT_NODE,
+    phase=RenderPhase.BLOCK,
+    priority=-1000,
+    name="exam_question_cache_block_start",
+    auto_mark=False,
+)
+def mark_block_phase_start(root: Tag, context: RenderContext) -> None:
+    _mark_phase_start(root, context)
+
+
+@renders(
+    DOCUMENT_NODE,
+    phase=RenderPhase.INLINE,
+    priority=-1000,
+    name="exam_question_cache_inline_start",
+    auto_mark=False,
+)
+def mark_inline_phase_start(root: Tag, context: RenderContext) -> None:
+    _mark_phase_start(root, context)
+
+
+@renders(
+    DOCUMENT_NODE,
+    phase=RenderPhase.POST,
+    priority=-1000,
+    name="exam_question_cache_post_start",
+    auto_mark=False,
+)
+def mark_post_phase_start(root: Tag, context: RenderContext) -> None:
+    _mark_phase_start(root, context)
+
+
+@renders(
+    SEGMENT_TAG,
+    phase=RenderPhase.PRE,
+    name="exam_question_boundary_pre",
+)
+def render_pre_segment_boundary(element: Tag, context: RenderContext) -> None:
+    _render_segment_boundary(element, context)
+
+
+@renders(
+    SEGMENT_TAG,
+    phase=RenderPhase.BLOCK,
+    name="exam_question_boundary_block",
+)
+def render_block_segment_boundary(element: Tag, context: RenderContext) -> None:
+    _render_segment_boundary(element, context)
+
+
+@renders(
+    SEGMENT_TAG,
+    phase=RenderPhase.INLINE,
+    name="exam_question_boundary_inline",
+)
+def render_inline_segment_boundary(element: Tag, context: RenderContext) -> None:
+    _render_segment_boundary(element, context)
+
+
+@renders(
+    SEGMENT_TAG,
+    phase=RenderPhase.POST,
+    name="exam_question_boundary_post",
+)
+def render_post_segment_boundary(element: Tag, context: RenderContext) -> None:
+    """Splice cached question LaTeX in place of the boundary marker."""
+    _render_segment_boundary(element, context)
+
+
+@renders(
+    "[document]",
+    phase=RenderPhase.POST,
+    priority=900,
+    name="exam_question_cache_store",
+    after_children=True,
+    auto_mark=False,
+)
+def store_question_fragments(root: Tag, context: RenderContext) -> None:
+    """Cache the LaTeX of the questions rendered in this pass."""
+    _store_question_fragments(root, context)
+
+
+@renders(
+    "[document]",
+    phase=RenderPhase.POST,
+    priority=950,
+    name="exam_point_tally",
+    after_children=True,
+    auto_mark=False,
+)
+def emit_point_tally(root: Tag, context: RenderContext) -> None:
+    """Append the question and part points seen in this document for the preamble."""
+    _emit_point_tally(root, context)
+
+
+@renders(
+    "[document]",
+    phase=RenderPhase.POST,
+    priority=1000,
+    name="exam_profile_report",
+    after_children=True,
+    auto_mark=False,
+)
+def report_rule_profile(_root: Tag, context: RenderContext) -> None:
+    """Emit the per-rule profile once the whole document has been rendered."""
+    finish_profile(context)
+
+
+_HANDLERS = (
+    set_exam_callouts,
+    render_solution_math_blocks,
+    render_solution_math_paragraphs,
+    render_fillin_placeholders,
+    render_table_fillin_cells,
+    strip_fenced_code_in_blocks,
+    strip_fenced_code_in_pre,
+    render_exam_checkboxes,
+    render_exam_fillin,
+    render_pending_answerline_paragraph,
+    render_exam_image_paragraphs,
+    render_exam_images,
+    render_solution_admonition,
+    promote_solution_admonitions,
+    render_solution_div_admonitions,
+    render_solution_callouts,
+    render_exam_headings,
+    close_open_parts,
+    split_question_segments,
+    mark_block_phase_start,
+    mark_inline_phase_start,
+    mark_post_phase_start,
+    render_pre_segment_boundary,
+    render_block_segment_boundary,
+    render_inline_segment_boundary,
+    render_post_segment_boundary,
+    store_question_fragments,
+    emit_point_tally,
+)
+
+
 def register(renderer: object) -> None:
-    """Entry point for texsmith.renderers to register exam handlers."""
+    """Entry point for texsmith.renderers to register exam handlers.
+
+    Handlers are wrapped by :func:`profiled` so that timing can be switched on
+    per render (``TEXSMITH_EXAM_PROFILE`` or the ``profile`` attribute).
+    """
     register_fn = getattr(renderer, "register", None)
     if callable(register_fn):
-        register_fn(set_exam_callouts)
-        register_fn(render_solution_math_blocks)
-        register_fn(render_solution_math_paragraphs)
-        register_fn(render_fillin_placeholders)
-        register_fn(render_table_fillin_cells)
-        register_fn(strip_fenced_code_in_blocks)
-        register_fn(strip_fenced_code_in_pre)
-        register_fn(render_exam_checkboxes)
-        register_fn(render_exam_fillin)
-        register_fn(render_pending_answerline_paragraph)
-        register_fn(render_exam_image_paragraphs)
-        register_fn(render_exam_images)
-        register_fn(render_solution_admonition)
-        register_fn(promote_solution_admonitions)
-        register_fn(render_solution_div_admonitions)
-        register_fn(render_solution_callouts)
-        register_fn(render_exam_headings)
-        register_fn(close_open_parts)
+        # Not profiled: the profiler itself reads the settings snapshot.
+        register_fn(snapshot_exam_settings)
+        for handler in _HANDLERS:
+            register_fn(profiled(handler))
+        register_fn(report_rule_profile)
@@ -0,0 +1,264 @@
+"""Precompiled LaTeX formats for the exam preamble.
+
+Loading ``exam.cls``, tcolorbox, pgf, columen and the template patches takes a
+large share of every compile. When many documents share the same preamble
+(variants, solution runs), it is dumped once with ``mylatexformat`` into a
+format keyed by the package version, the engine and a hash of the preamble
+and local packages. Later builds of an identical preamble start from that
+format; anything else compiles normally.
+
+Fonts cannot be stored in a format (XeTeX refuses to dump native fonts and
+LuaTeX loses the luaotfload state), so font packages are moved after the
+``\\endofdump`` marker and always run live.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+import hashlib
+import importlib.metadata
+import os
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import threading
+
+from texsmith.adapters.latex.engines import EngineResult, build_tex_env, resolve_engine
+from texsmith.core.conversion.service import ConversionService
+from texsmith.core.templates.session import TemplateRenderResult
+from texsmith.core.user_dir import get_user_dir
+
+from .passes import PassPlanner
+
+
+ENDOFDUMP = "\\csname endofdump\\endcsname"
+FORMAT_ENGINES = frozenset({"pdflatex", "xelatex", "lualatex"})
+
+_BEGIN_DOCUMENT = re.compile(r"^\\begin\{document\}", re.MULTILINE)
+_FONT_PACKAGE = re.compile(
+    r"^(?:\\IfFileExists\{[^{}\n]*\}\{\}\{)?\\(?:usepackage|RequirePackage)(?:\[[^\]\n]*\])?"
+    r"\{(?:ts-fonts|fontspec|unicode-math|heiglogo)\}.*$"
+)
+_LATEXMKRC_ENGINE = re.compile(r"^\$(?P<var>pdflatex|xelatex|lualatex) = '(?P<cmd>\S+)", re.M)
+_LOCAL_PACKAGE_SUFFIXES = (".sty", ".cls", ".def", ".cfg")
+
+
+@dataclass(frozen=True, slots=True)
+class DumpSplit:
+    """A main document rewritten for ``mylatexformat``."""
+
+    text: str
+    preamble: str
+
+
+def split_for_dump(text: str) -> DumpSplit | None:
+    """Insert ``\\endofdump`` before ``\\begin{document}`` and move font packages after it.
+
+    Returns ``None`` when ``text`` has no ``\\begin{document}``. Documents
+    already split are returned unchanged.
+    """
+    marker = text.find(ENDOFDUMP)
+    if marker >= 0:
+        return DumpSplit(text, text[:marker])
+    begin = _BEGIN_DOCUMENT.search(text)
+    if begin is None:
+        return None
+
+    kept: list[str] = []
+    live: list[str] = []
+    for line in text[: begin.start()].splitlines(keepends=True):
+        (live if _FONT_PACKAGE.match(line) else kept).append(line)
+    preamble = "".join(kept)
+    if preamble and not preamble.endswith("\n"):
+        preamble += "\n"
+    rewritten = preamble + ENDOFDUMP + "\n" + "".join(live) + text[begin.start() :]
+    return DumpSplit(rewritten, preamble)
+
+
+def _package_version() -> str:
+    try:
+        return importlib.metadata.version("texsmith-exam")
+    except importlib.metadata.PackageNotFoundError:
+        return "0"
+
+
+def engine_stamp(engine: str) -> str:
+    """Return an identifier of the ``engine`` binary that changes when it is updated."""
+    binary = shutil.which(engine)
+    if binary is None:
+        return ""
+    try:
+        info = Path(binary).resolve().stat()
+    except OSError:
+        return binary
+    return f"{binary}:{info.st_mtime_ns}:{info.st_size}"
+
+
+def format_key(preamble: str, engine: str, workdir: Path) -> str:
+    """Return the cache key of ``preamble`` compiled by ``engine`` in ``workdir``."""
+    digest = hashlib.sha256()
+    for part in (_package_version(), engine, engine_stamp(engine), preamble):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for path in sorted(workdir.iterdir()):
+        if path.suffix in _LOCAL_PACKAGE_SUFFIXES and path.is_file():
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:20]
+
+
+class FormatCache:
+    """Directory of dumped preamble formats shared by every build.
+
+    A format that fails to build, or whose compile fails, is recorded as
+    broken and never tried again; those builds simply run without a format.
+    """
+
+    def __init__(self, directory: Path | str | None = None) -> None:
+        self.directory = Path(directory) if directory else get_user_dir().cache_dir("formats")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def _paths(self, name: str) -> tuple[Path, Path]:
+        return self.directory / f"{name}.fmt", self.directory / f"{name}.failed"
+
+    def ensure(self, main_tex: Path, engine: str, env: dict[str, str] | None = None) -> str | None:
+        """Return the format name for ``main_tex``, dumping it first if needed.
+
+        ``main_tex`` is rewritten in place by :func:`split_for_dump` only when
+        a format is used; otherwise it is left as rendered. Returns ``None``
+        when the engine is unsupported or the format cannot be built.
+        """
+        if engine not in FORMAT_ENGINES or shutil.which(engine) is None:
+            return None
+        text = main_tex.read_text(encoding="utf-8")
+        split = split_for_dump(text)
+        if split is None:
+            return None
+
+        name = f"exam-{engine}-{format_key(split.preamble, engine, main_tex.parent)}"
+        fmt, failed = self._paths(name)
+        hit = fmt.exists()
+        if not hit and failed.exists():
+            return None
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        # mylatexformat reads the \endofdump marker from the document itself.
+        if split.text != text:
+            main_tex.write_text(split.text, encoding="utf-8")
+        if hit or self._dump(main_tex, engine, name, env):
+            return name
+        main_tex.write_text(text, encoding="utf-8")
+        return None
+
+    def _dump(self, main_tex: Path, engine: str, name: str, env: dict[str, str] | None) -> bool:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fmt, failed = self._paths(name)
+        jobname = f"{name}.{os.getpid()}.{threading.get_ident()}"
+        command = [
+            engine,
+            "-ini",
+            "-interaction=batchmode",
+            "-halt-on-error",
+            f"-jobname={jobname}",
+            f"-output-directory={self.directory}",
+            f"&{engine}",
+            "mylatexformat.ltx",
+            f'"{main_tex.name}"',
+        ]
+        try:
+            completed = subprocess.run(
+                command,
+                cwd=main_tex.parent,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        except OSError:
+            completed = None
+        built = self.directory / f"{jobname}.fmt"
+        if completed is None or completed.returncode != 0 or not built.exists():
+            built.unlink(missing_ok=True)
+            failed.touch()
+            return False
+        built.replace(fmt)
+        (self.directory / f"{jobname}.log").unlink(missing_ok=True)
+        return True
+
+    def discard(self, name: str) -> None:
+        fmt, failed = self._paths(name)
+        fmt.unlink(missing_ok=True)
+        failed.touch()
+
+    def build_pdf(
+        self,
+        service: ConversionService,
+        render_result: TemplateRenderResult,
+        *,
+        engine: str | None = None,
+        planner: PassPlanner | None = None,
+    ) -> EngineResult:
+        """Compile ``render_result`` from a cached format, or normally as a fallback.
+
+        With ``planner``, LaTeX passes are driven by the :class:`PassPlanner`
+        instead of latexmk.
+        """
+        compile_pdf = service.build_pdf if planner is None else partial(planner.build_pdf, service)
+        choice = resolve_engine(engine, render_result.template_engine)
+        program = (choice.latexmk_engine or "").strip().lower()
+        main_tex = render_result.main_tex_path
+        latexmkrc = main_tex.parent / ".latexmkrc"
+        name = None
+        if choice.backend == "latexmk" and latexmkrc.exists():
+            rendered = main_tex.read_text(encoding="utf-8")
+            env = build_tex_env(main_tex.parent, isolate_cache=False)
+            name = self.ensure(main_tex, program, env)
+        if name is None:
+            with self._lock:
+                self.fallbacks += 1
+            return compile_pdf(render_result, engine=engine)
+
+        # latexmk takes pdflatex from the command line but lualatex and xelatex
+        # from the generated .latexmkrc, so the format is passed to both.
+        original = latexmkrc.read_text(encoding="utf-8")
+        patched = _LATEXMKRC_ENGINE.sub(
+            lambda match: f"${match['var']} = '{match['cmd']} -fmt={name}", original, count=1
+        )
+        latexmkrc.write_text(patched, encoding="utf-8")
+        formats = f"{self.directory}{os.pathsep}{os.environ.get('TEXFORMATS', '')}"
+        try:
+            result = compile_pdf(
+                render_result,
+                engine=f"{program} -fmt={name}",
+                env={"TEXFORMATS": formats},
+            )
+        finally:
+            latexmkrc.write_text(original, encoding="utf-8")
+        if result.returncode == 0:
+            return result
+
+        self.discard(name)
+        main_tex.write_text(rendered, encoding="utf-8")
+        with self._lock:
+            self.fallbacks += 1
+        return compile_pdf(render_result, engine=engine)
+
+
+__all__ = [
+    "ENDOFDUMP",
+    "FORMAT_ENGINES",
+    "DumpSplit",
+    "FormatCache",
+    "engine_stamp",
+    "format_key",
+    "split_for_dump",
+]
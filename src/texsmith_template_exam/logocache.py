@@ -0,0 +1,215 @@
+"""Prebuilt title-page logos.
+
+``heiglogo.sty`` draws the school logo with TikZ from a few hundred lines of
+path code, on every compile of every variant. The template instead includes
+a ``texsmith-logo-<digest>.pdf`` next to the document when it exists and only
+draws the logo live otherwise. Before each build, :class:`LogoCache` compiles
+the logo once per source and height into a standalone PDF, keyed by the
+content of ``heiglogo.sty`` and the engine so an edited package is rebuilt,
+and copies it into the render directory. Custom ``logo.file`` values go through the same
+cache: SVG files are converted to PDF once; other images are already
+included directly by LaTeX.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from texsmith.core.user_dir import get_user_dir
+
+from .formats import engine_stamp
+
+
+LOGO_PATTERN = re.compile(
+    r"\\ExamLogoCached\{(?P<name>[^{}]+)\}\{(?P<source>[^{}]+)\}\{(?P<height>[^{}]*)\}"
+)
+LOGO_ENGINES = ("lualatex", "xelatex")
+FAILED_RETRY_SECONDS = 3600.0
+
+_BUILTIN_PACKAGES = {"heig-vd": "heiglogo.sty"}
+_TEMPLATE_DIR = Path(__file__).resolve().parent / "exam" / "template"
+
+
+def logo_file_name(source: str, height: str = "") -> str:
+    """Return the file name the template includes for ``source`` at ``height``.
+
+    ``source`` is ``builtin:<key>`` or ``file:<path>``.
+    """
+    digest = hashlib.sha256(f"{source}\0{height}".encode()).hexdigest()[:16]
+    return f"texsmith-logo-{digest}.pdf"
+
+
+def _standalone(height: str) -> str:
+    return (
+        "\\documentclass[border=0pt]{standalone}\n"
+        "\\usepackage{heiglogo}\n"
+        "\\begin{document}\n"
+        f"\\logo[relative,height={height}]\n"
+        "\\end{document}\n"
+    )
+
+
+def _digest(*parts: str | bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8") if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return digest.hexdigest()[:20]
+
+
+class LogoCache:
+    """Directory of logo PDFs shared by every build.
+
+    A logo that fails to build is recorded as broken and those documents keep
+    drawing it live. The build is tried again once the record is older than
+    ``retry_after`` seconds; built-in logos are also keyed on the engine, so
+    installing or updating one retries at once.
+    """
+
+    def __init__(
+        self, directory: Path | str | None = None, retry_after: float = FAILED_RETRY_SECONDS
+    ) -> None:
+        self.directory = (
+            Path(directory) if directory else get_user_dir().cache_dir("logos", create=False)
+        )
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.pdf", self.directory / f"{key}.failed"
+
+    def place(self, main_tex: Path) -> list[Path]:
+        """Copy the PDF of every logo ``main_tex`` asks for next to it.
+
+        Logos that cannot be built or copied are removed from the render
+        directory so that LaTeX draws them live.
+        """
+        workdir = main_tex.parent
+        placed: list[Path] = []
+        for match in LOGO_PATTERN.finditer(main_tex.read_text(encoding="utf-8")):
+            target = workdir / match["name"]
+            pdf = self.ensure(match["source"], match["height"], workdir)
+            try:
+                if pdf is None:
+                    target.unlink(missing_ok=True)
+                    continue
+                shutil.copyfile(pdf, target)
+            except OSError:
+                with contextlib.suppress(OSError):
+                    target.unlink(missing_ok=True)
+                continue
+            placed.append(target)
+        return placed
+
+    def ensure(self, source: str, height: str, workdir: Path) -> Path | None:
+        """Return the cached PDF of ``source``, building it first if needed.
+
+        Returns ``None`` when the logo cannot be built, including when the
+        cache directory cannot be written.
+        """
+        try:
+            return self._ensure(source, height, workdir)
+        except OSError:
+            return None
+
+    def _ensure(self, source: str, height: str, workdir: Path) -> Path | None:
+        kind, _, value = source.partition(":")
+        engine = next((name for name in LOGO_ENGINES if shutil.which(name)), None)
+        if kind == "builtin" and value in _BUILTIN_PACKAGES and engine and height:
+            package = workdir / _BUILTIN_PACKAGES[value]
+            if not package.is_file():
+                package = _TEMPLATE_DIR / _BUILTIN_PACKAGES[value]
+            key = _digest(kind, value, height, engine, engine_stamp(engine), package.read_bytes())
+        elif kind == "file" and Path(value).suffix.lower() == ".svg":
+            path = Path(value) if Path(value).is_absolute() else workdir / value
+            if not path.is_file():
+                return None
+            key = _digest(kind, path.read_bytes())
+        else:
+            return None
+
+        pdf, failed = self._paths(key)
+        if pdf.exists():
+            with self._lock:
+                self.hits += 1
+            return pdf
+        if self._failed_recently(failed):
+            return None
+        with self._lock:
+            self.misses += 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.directory) as tmp:
+            if kind == "builtin":
+                built = self._compile(engine, package, height, Path(tmp))
+            else:
+                built = self._convert(path, Path(tmp))
+            if built is None:
+                failed.touch()
+                return None
+            built.replace(pdf)
+        failed.unlink(missing_ok=True)
+        return pdf
+
+    def _failed_recently(self, failed: Path) -> bool:
+        try:
+            age = time.time() - failed.stat().st_mtime
+        except OSError:
+            return False
+        return age < self.retry_after
+
+    @staticmethod
+    def _compile(engine: str, package: Path, height: str, tmp: Path) -> Path | None:
+        shutil.copyfile(package, tmp / package.name)
+        (tmp / "logo.tex").write_text(_standalone(height), encoding="utf-8")
+        try:
+            completed = subprocess.run(
+                [engine, "-interaction=batchmode", "-halt-on-error", "logo.tex"],
+                cwd=tmp,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        except OSError:
+            return None
+        built = tmp / "logo.pdf"
+        return built if completed.returncode == 0 and built.exists() else None
+
+    @staticmethod
+    def _convert(path: Path, tmp: Path) -> Path | None:
+        # Imported here: the converters pull in optional SVG backends.
+        from texsmith.adapters.transformers import svg2pdf
+
+        try:
+            converted = Path(svg2pdf(path, tmp))
+        except Exception:  # any backend failure means "draw live"
+            return None
+        if not converted.is_file():
+            return None
+        # The converter may answer from its own cache; never move that file.
+        built = tmp / "logo.pdf"
+        shutil.copyfile(converted, built)
+        return built
+
+
+LOGO_CACHE = LogoCache()
+
+
+__all__ = [
+    "FAILED_RETRY_SECONDS",
+    "LOGO_CACHE",
+    "LOGO_ENGINES",
+    "LOGO_PATTERN",
+    "LogoCache",
+    "logo_file_name",
+]
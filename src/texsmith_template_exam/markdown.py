@@ -2,17 +2,101 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator, Sequence
+import contextlib
+from functools import lru_cache
+import threading
+from typing import Any
+
 from texsmith.adapters.markdown import (
+    DEFAULT_EXTENSION_CONFIGS,
     DEFAULT_MARKDOWN_EXTENSIONS,
+    MarkdownConversionError,
     deduplicate_markdown_extensions,
+    split_front_matter,
 )
 
 
 SOLUTION_EXTENSION = "texsmith_template_exam.solution_md:SolutionAdmonitionExtension"
 
 
+@lru_cache(maxsize=1)
+def _exam_extensions() -> tuple[str, ...]:
+    return tuple(
+        deduplicate_markdown_extensions([*DEFAULT_MARKDOWN_EXTENSIONS, SOLUTION_EXTENSION])
+    )
+
+
 def exam_markdown_extensions() -> list[str]:
     """Return the Markdown extensions with the exam solution block enabled."""
-    return deduplicate_markdown_extensions(
-        [*DEFAULT_MARKDOWN_EXTENSIONS, SOLUTION_EXTENSION]
-    )
+    return list(_exam_extensions())
+
+
+class MarkdownEnginePool:
+    """Pool of configured ``markdown.Markdown`` engines keyed by extension tuple.
+
+    Building an engine loads and configures every extension, which costs far
+    more than converting a short fragment. Engines are checked out for one
+    conversion, ``reset()`` and returned, so concurrent or nested conversions
+    each get their own instance and never wait on one another.
+    """
+
+    def __init__(self, *, maxsize: int = 4) -> None:
+        self._maxsize = maxsize
+        self._idle: dict[tuple[str, ...], list[Any]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+
+    @contextlib.contextmanager
+    def acquire(self, extensions: Sequence[str]) -> Iterator[Any]:
+        key = tuple(extensions)
+        with self._lock:
+            idle = self._idle.get(key)
+            engine = idle.pop() if idle else None
+        if engine is None:
+            engine = self._build(key)
+        try:
+            yield engine
+        finally:
+            engine.reset()
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self._maxsize:
+                    idle.append(engine)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+            self.created = 0
+
+    def _build(self, key: tuple[str, ...]) -> Any:
+        import markdown
+
+        configs = {
+            name: dict(DEFAULT_EXTENSION_CONFIGS[name])
+            for name in key
+            if name in DEFAULT_EXTENSION_CONFIGS
+        }
+        try:
+            engine = markdown.Markdown(extensions=list(key), extension_configs=configs)
+        except Exception as exc:
+            raise MarkdownConversionError(
+                f"Failed to initialize Markdown processor: {exc}"
+            ) from exc
+        with self._lock:
+            self.created += 1
+        return engine
+
+
+MARKDOWN_ENGINES = MarkdownEnginePool()
+
+
+def render_exam_markdown(source: str, extensions: Sequence[str] | None = None) -> str:
+    """Convert a Markdown fragment to HTML with a pooled exam Markdown engine."""
+    _, body = split_front_matter(source)
+    with MARKDOWN_ENGINES.acquire(extensions or _exam_extensions()) as engine:
+        engine.texsmith_mermaid_base_path = None
+        try:
+            return engine.convert(body)
+        except Exception as exc:
+            raise MarkdownConversionError(f"Failed to convert Markdown source: {exc}") from exc
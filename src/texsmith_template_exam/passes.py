@@ -0,0 +1,321 @@
+"""Run LaTeX pass by pass and stop as soon as the auxiliary files are stable.
+
+latexmk reruns the engine whenever an auxiliary file changes or the log
+mentions a rerun. An exam writes a ``\\label`` for every heading slug, so any
+page shift asks for another pass even though almost none of those labels are
+referenced, and warnings that persist (undefined references) look like rerun
+requests on every pass.
+
+:class:`PassPlanner` drives the engine itself. After each pass it hashes the
+``.aux`` and other auxiliary outputs and compares them with what the pass
+read. It runs another pass only when something the next pass reads has
+changed: an auxiliary file other than the ``.aux``, a non-label ``.aux``
+entry (exam.cls point tables, columen widths, page totals), a label that the
+sources actually reference, or a package that explicitly asks for a rerun
+in the log. Every build records how many passes it took.
+
+Builds that need external tools between passes (bibliographies, indexes,
+glossaries) and non-latexmk backends are left to TeXSmith.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+import hashlib
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import threading
+
+from texsmith.adapters.latex.engines import (
+    EngineResult,
+    build_tex_env,
+    compute_features,
+    parse_latex_log,
+    resolve_engine,
+)
+from texsmith.adapters.latex.latexmk import normalise_engine_command
+from texsmith.core.conversion.service import ConversionService
+from texsmith.core.templates.session import TemplateRenderResult
+
+from .defaults import DEFAULT_MAX_PASSES
+
+
+# Files written by a pass that the next pass does not read.
+_OUTPUT_SUFFIXES = frozenset(
+    {".tex", ".pdf", ".log", ".dvi", ".xdv", ".fls", ".fdb_latexmk", ".gz", ".synctex"}
+)
+_LABEL_RE = re.compile(r"^\\newlabel\{(?P<name>[^{}]*)\}(?P<value>.*)$")
+_REFERENCE_RE = re.compile(r"\\[a-zA-Z]*ref\*?\s*(?:\{(?P<keys>[^{}]*)\}|\[(?P<target>[^\[\]]*)\])")
+_WARNING_RE = re.compile(
+    r"^(?:(?:Package|Class) (?P<source>\S+)|LaTeX) Warning: (?P<message>.*?)"
+    r"(?: on input line \d+)?\.?$",
+    re.MULTILINE,
+)
+# Requests already covered by hashing: the kernel's label check (filtered to
+# referenced labels) and rerunfilecheck's report of changed files.
+_COVERED_REQUESTS = ("label(s) may have changed", "has changed. rerun")
+# TeX engines wrap log lines at this width unless max_print_line is changed.
+_LOG_WIDTH = 79
+_REPORT_LIMIT = 256
+
+
+@dataclass(frozen=True, slots=True)
+class PassReport:
+    """Passes one document needed and why each pass after the first ran."""
+
+    main_tex: Path
+    passes: int
+    reasons: tuple[str, ...] = ()
+    converged: bool = True
+
+    def describe(self) -> str:
+        text = f"{self.passes} pass{'es' if self.passes != 1 else ''}"
+        if self.reasons:
+            text += f" ({'; '.join(self.reasons)})"
+        if not self.converged:
+            text += ", auxiliary files still changing"
+        return text
+
+
+@dataclass(frozen=True, slots=True)
+class _AuxState:
+    digests: Mapping[str, str]
+    labels: Mapping[str, str]
+    entries: tuple[tuple[str, str], ...]
+
+
+def _auxiliary_files(workdir: Path, stem: str) -> list[Path]:
+    return sorted(
+        path
+        for path in workdir.iterdir()
+        if path.is_file()
+        and (path.suffix == ".aux" or (path.stem == stem and path.suffix not in _OUTPUT_SUFFIXES))
+    )
+
+
+def _aux_state(workdir: Path, stem: str) -> _AuxState:
+    digests: dict[str, str] = {}
+    labels: dict[str, str] = {}
+    entries: list[tuple[str, str]] = []
+    for path in _auxiliary_files(workdir, stem):
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        digests[path.name] = hashlib.sha256(data).hexdigest()
+        if path.suffix != ".aux":
+            continue
+        for line in data.decode("utf-8", errors="replace").splitlines():
+            match = _LABEL_RE.match(line)
+            if match:
+                labels[match["name"]] = match["value"]
+            elif line.strip():
+                entries.append((path.name, line))
+    return _AuxState(digests, labels, tuple(entries))
+
+
+def referenced_labels(texts: Iterable[str]) -> frozenset[str]:
+    """Return the labels referenced by ``\\ref``-like commands in ``texts``."""
+    labels: set[str] = set()
+    for text in texts:
+        for match in _REFERENCE_RE.finditer(text):
+            keys = match["keys"] if match["keys"] is not None else match["target"]
+            labels.update(key.strip() for key in keys.split(",") if key.strip())
+    return frozenset(labels)
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return ""
+
+
+def _unwrap_log(text: str) -> str:
+    lines = text.splitlines()
+    joined: list[str] = []
+    carry = ""
+    for line in lines:
+        if len(line) == _LOG_WIDTH:
+            carry += line
+            continue
+        joined.append(carry + line)
+        carry = ""
+    if carry:
+        joined.append(carry)
+    return "\n".join(joined)
+
+
+def rerun_requests(log_text: str) -> list[str]:
+    """Return the rerun requests in a log that hashing the auxiliary files does not cover."""
+    requests: list[str] = []
+    for match in _WARNING_RE.finditer(_unwrap_log(log_text)):
+        message = " ".join(match["message"].split())
+        lowered = message.lower()
+        if "rerun" not in lowered or any(token in lowered for token in _COVERED_REQUESTS):
+            continue
+        if (match["source"] or "").lower() == "rerunfilecheck":
+            continue
+        requests.append(f"{match['source'] or 'LaTeX'}: {message}")
+    return requests
+
+
+def _rerun_reason(
+    before: _AuxState, after: _AuxState, referenced: frozenset[str], requests: list[str]
+) -> str | None:
+    """Why the pass that turned ``before`` into ``after`` must be followed by another."""
+    if before.digests == after.digests:
+        return None
+    for name in sorted(before.digests.keys() | after.digests.keys()):
+        if not name.endswith(".aux") and before.digests.get(name) != after.digests.get(name):
+            return f"{name} changed"
+    if before.entries != after.entries:
+        return "auxiliary data changed"
+    for name in sorted(before.labels.keys() | after.labels.keys()):
+        if before.labels.get(name) == after.labels.get(name):
+            continue
+        if name in referenced or name.removesuffix("@cref") in referenced:
+            return f"reference '{name}' changed"
+    if requests:
+        return requests[0]
+    return None
+
+
+class PassPlanner:
+    """Compile documents with as few LaTeX passes as their auxiliary files allow.
+
+    ``reports`` keeps a :class:`PassReport` for each of the latest compiled
+    documents; ``delegated`` counts the builds handed to TeXSmith unchanged.
+    """
+
+    def __init__(self, max_passes: int = DEFAULT_MAX_PASSES) -> None:
+        if max_passes < 1:
+            raise ValueError("max_passes must be at least 1.")
+        self.max_passes = max_passes
+        self.reports: deque[PassReport] = deque(maxlen=_REPORT_LIMIT)
+        self.documents = 0
+        self.passes = 0
+        self.unconverged = 0
+        self.delegated = 0
+        self._lock = threading.Lock()
+
+    def report_for(self, main_tex: Path) -> PassReport | None:
+        """Return the latest report for ``main_tex``."""
+        with self._lock:
+            for report in reversed(self.reports):
+                if report.main_tex == main_tex:
+                    return report
+        return None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "passes": self.passes,
+                "extra_passes": self.passes - self.documents,
+                "unconverged": self.unconverged,
+                "delegated": self.delegated,
+            }
+
+    def build_pdf(
+        self,
+        service: ConversionService,
+        render_result: TemplateRenderResult,
+        *,
+        engine: str | None = None,
+        env: Mapping[str, str] | None = None,
+    ) -> EngineResult:
+        """Compile ``render_result``; builds that need more than LaTeX go to ``service``."""
+        choice = resolve_engine(engine, render_result.template_engine)
+        features = compute_features(
+            requires_shell_escape=render_result.requires_shell_escape,
+            bibliography=render_result.has_bibliography,
+            document_state=render_result.document_state,
+            template_context=getattr(render_result, "template_context", None),
+        )
+        command = normalise_engine_command(
+            choice.latexmk_engine, shell_escape=features.requires_shell_escape
+        ).command
+        if (
+            choice.backend != "latexmk"
+            or features.bibliography
+            or features.has_index
+            or features.has_glossary
+            or shutil.which(command[0]) is None
+        ):
+            with self._lock:
+                self.delegated += 1
+            return service.build_pdf(render_result, engine=engine, env=env)
+
+        main_tex = render_result.main_tex_path
+        workdir = main_tex.parent
+        merged_env = build_tex_env(workdir, isolate_cache=False)
+        merged_env.update(env or {})
+        argv = [
+            shutil.which(command[0]) or command[0],
+            *command[1:],
+            "-interaction=nonstopmode",
+            "-halt-on-error",
+            "-file-line-error",
+            main_tex.name,
+        ]
+        log_path = main_tex.with_suffix(".log")
+        pdf_path = main_tex.with_suffix(".pdf")
+        sources = [main_tex, *getattr(render_result, "fragment_paths", ())]
+        referenced = referenced_labels(_read(path) for path in sources)
+
+        before = _aux_state(workdir, main_tex.stem)
+        reasons: list[str] = []
+        passes = 0
+        while True:
+            passes += 1
+            returncode = self._run(argv, workdir, merged_env)
+            if returncode != 0:
+                break
+            after = _aux_state(workdir, main_tex.stem)
+            reason = _rerun_reason(before, after, referenced, rerun_requests(_read(log_path)))
+            if reason is None or passes == self.max_passes:
+                report = PassReport(main_tex, passes, tuple(reasons), converged=reason is None)
+                with self._lock:
+                    self.reports.append(report)
+                    self.documents += 1
+                    self.passes += passes
+                    self.unconverged += reason is not None
+                break
+            reasons.append(reason)
+            before = after
+        return EngineResult(
+            returncode=returncode,
+            messages=parse_latex_log(log_path),
+            command=argv,
+            log_path=log_path,
+            pdf_path=pdf_path,
+        )
+
+    @staticmethod
+    def _run(argv: list[str], workdir: Path, env: Mapping[str, str]) -> int:
+        try:
+            completed = subprocess.run(
+                argv,
+                cwd=workdir,
+                env=dict(env),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        except OSError:
+            return 127
+        return completed.returncode
+
+
+__all__ = [
+    "PassPlanner",
+    "PassReport",
+    "referenced_labels",
+    "rerun_requests",
+]
@@ -0,0 +1,400 @@
+"""Long-lived local render server.
+
+Keeps TeXSmith, the exam template runtime, the renderer rules, the pooled
+Markdown engines and every render cache loaded between requests, so that an
+integration (an LMS, a grading tool) pays the start-up cost once instead of
+per document.
+
+The API is plain JSON over HTTP, on localhost or a Unix socket:
+
+``POST /render``
+    ``{"markdown": "...", "config": "<yaml>", "attributes": {...},
+    "output": "tex" | "pdf" | "both", "engine": "lualatex"}``; ``documents``
+    (a list of ``{"name": "1.md", "markdown": "..."}``) may replace
+    ``markdown``. Returns ``{"tex": ..., "elapsed": ...}`` (with a base64
+    ``pdf`` for ``both``) or the raw PDF for ``pdf``.
+``GET /health``
+    Liveness and current load.
+``GET /metrics``
+    Request counters, render times, cache statistics and LaTeX pass counts.
+
+At most ``max_concurrent`` renders run at a time; other requests wait up to
+``queue_timeout`` seconds for a slot and then get ``503``.
+"""
+
+from __future__ import annotations
+
+import base64
+from collections.abc import Mapping
+from dataclasses import dataclass, field, replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from pathlib import Path
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Any
+
+from texsmith.core.conversion.service import ConversionService
+
+from .batch import ResidentConversionService, resident_runtime, warm_worker
+from .compilecache import CompileCache
+from .defaults import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_QUEUE_TIMEOUT
+from .dual import DEFAULT_TEMPLATE, _build_pdf, build_request
+from .exam.questioncache import QUESTION_CACHE
+from .formats import FormatCache
+from .passes import PassPlanner
+
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+OUTPUTS = ("tex", "pdf", "both")
+
+
+class ServerBusyError(RuntimeError):
+    """Raised when no render slot frees up within the queue timeout."""
+
+
+def _document_name(raw: object, index: int) -> str:
+    name = str(raw or f"document-{index}.md")
+    if Path(name).name != name or name.startswith("."):
+        raise ValueError(f"Invalid document name '{name}'.")
+    return name if name.endswith((".md", ".markdown")) else f"{name}.md"
+
+
+@dataclass(frozen=True, slots=True)
+class RenderJob:
+    """A validated ``/render`` request."""
+
+    documents: tuple[tuple[str, str], ...]
+    config: str | None = None
+    attributes: Mapping[str, Any] = field(default_factory=dict)
+    output: str = "tex"
+    engine: str | None = None
+
+    @classmethod
+    def from_payload(cls, payload: object) -> RenderJob:
+        """Build a job from decoded JSON.
+
+        Raises ``TypeError`` for values of the wrong type and ``ValueError``
+        for other malformed requests.
+        """
+        if not isinstance(payload, Mapping):
+            raise TypeError("Expected a JSON object.")
+        if "documents" in payload:
+            raw_documents = payload["documents"]
+            if not isinstance(raw_documents, list) or not raw_documents:
+                raise ValueError("'documents' must be a non-empty list.")
+        elif isinstance(payload.get("markdown"), str):
+            raw_documents = [{"name": "exam.md", "markdown": payload["markdown"]}]
+        else:
+            raise ValueError("Provide 'markdown' or 'documents'.")
+
+        documents = []
+        for index, entry in enumerate(raw_documents, start=1):
+            if not isinstance(entry, Mapping) or not isinstance(entry.get("markdown"), str):
+                raise TypeError(f"Document #{index} needs a 'markdown' string.")
+            documents.append((_document_name(entry.get("name"), index), entry["markdown"]))
+        if len({name for name, _ in documents}) != len(documents):
+            raise ValueError("Document names must be unique.")
+
+        config = payload.get("config")
+        if config is not None and not isinstance(config, str):
+            raise TypeError("'config' must be a YAML string.")
+        attributes = payload.get("attributes") or {}
+        if not isinstance(attributes, Mapping):
+            raise TypeError("'attributes' must be an object.")
+        output = payload.get("output", "tex")
+        if output not in OUTPUTS:
+            raise ValueError(f"'output' must be one of {', '.join(OUTPUTS)}.")
+        engine = payload.get("engine")
+        if engine is not None and not isinstance(engine, str):
+            raise TypeError("'engine' must be a string.")
+        return cls(tuple(documents), config, dict(attributes), output, engine)
+
+
+@dataclass(frozen=True, slots=True)
+class RenderOutput:
+    tex: str
+    pdf: bytes | None
+    elapsed: float
+
+
+class RenderServer:
+    """Render exams for the HTTP handler, bounded to ``max_concurrent`` at a time."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int | None = None,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        template: str = DEFAULT_TEMPLATE,
+        formats: FormatCache | None = None,
+        compiled: CompileCache | None = None,
+        planner: PassPlanner | None = None,
+    ) -> None:
+        self.max_concurrent = max(1, max_concurrent or os.cpu_count() or 1)
+        self.queue_timeout = queue_timeout
+        self.template = template
+        self.formats = formats
+        self.compiled = compiled
+        self.planner = planner
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._services = threading.local()
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.active = 0
+        self.waiting = 0
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.render_seconds = 0.0
+
+    def warm(self) -> None:
+        """Load the template runtime and Markdown engines before the first request."""
+        warm_worker()
+        resident_runtime(self.template)
+
+    def _service(self) -> ConversionService:
+        # Services are cheap; one per handler thread keeps their state apart.
+        service = getattr(self._services, "service", None)
+        if service is None:
+            service = self._services.service = ResidentConversionService()
+        return service
+
+    def render(self, job: RenderJob) -> RenderOutput:
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.rejected += 1
+            else:
+                self.active += 1
+        if not acquired:
+            raise ServerBusyError(f"All {self.max_concurrent} render slots are busy.")
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            output = self._render(job, start)
+            ok = True
+            return output
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.active -= 1
+                self.requests += 1
+                if not ok:
+                    self.failures += 1
+                self.render_seconds += elapsed
+            self._slots.release()
+
+    def _render(self, job: RenderJob, start: float) -> RenderOutput:
+        service = self._service()
+        with tempfile.TemporaryDirectory(prefix="texsmith-exam-") as tmp:
+            root = Path(tmp)
+            inputs: list[Path] = []
+            if job.config is not None:
+                config = root / "config.yml"
+                config.write_text(job.config, encoding="utf-8")
+                inputs.append(config)
+            for name, markdown in job.documents:
+                path = root / name
+                path.write_text(markdown, encoding="utf-8")
+                inputs.append(path)
+
+            request = build_request(
+                inputs, template=self.template, attributes=job.attributes, service=service
+            )
+            request = replace(request, render_dir=root / "build", embed_fragments=True)
+            response = service.execute(request)
+            tex = response.render_result.main_tex_path.read_text(encoding="utf-8")
+            pdf = None
+            if job.output != "tex":
+                pdf_path = _build_pdf(
+                    service,
+                    response,
+                    engine=job.engine,
+                    formats=self.formats,
+                    compiled=self.compiled,
+                    planner=self.planner,
+                )
+                pdf = pdf_path.read_bytes() if pdf_path is not None else None
+        return RenderOutput(tex=tex, pdf=pdf, elapsed=time.perf_counter() - start)
+
+    def health(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "status": "ok",
+                "uptime": round(time.time() - self.started, 3),
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_concurrent": self.max_concurrent,
+            }
+
+    def metrics(self) -> dict[str, Any]:
+        with self._lock:
+            payload: dict[str, Any] = {
+                "requests": self.requests,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "active": self.active,
+                "waiting": self.waiting,
+                "render_seconds": round(self.render_seconds, 6),
+            }
+        payload["question_cache"] = {
+            "entries": len(QUESTION_CACHE),
+            "hits": QUESTION_CACHE.hits,
+            "misses": QUESTION_CACHE.misses,
+        }
+        if self.formats is not None:
+            payload["format_cache"] = {
+                "hits": self.formats.hits,
+                "misses": self.formats.misses,
+                "fallbacks": self.formats.fallbacks,
+            }
+        if self.compiled is not None:
+            payload["compile_cache"] = {
+                "hits": self.compiled.hits,
+                "misses": self.compiled.misses,
+            }
+        if self.planner is not None:
+            payload["passes"] = self.planner.stats()
+        return payload
+
+
+class _RenderHandler(BaseHTTPRequestHandler):
+    server_version = "texsmith-exam"
+    app: RenderServer
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address.
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def _send(
+        self,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str,
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(
+        self,
+        status: HTTPStatus,
+        payload: Mapping[str, Any],
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self._send(status, body, "application/json", headers)
+
+    def _error(self, status: HTTPStatus, message: str, **headers: str) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, self.app.health())
+        elif self.path == "/metrics":
+            self._send_json(HTTPStatus.OK, self.app.metrics())
+        elif self.path == "/render":
+            self._error(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST.", Allow="POST")
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}.")
+
+    def do_POST(self) -> None:
+        if self.path != "/render":
+            self._error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}.")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+            return
+        try:
+            job = RenderJob.from_payload(json.loads(self.rfile.read(length) or b"null"))
+        except (ValueError, TypeError, UnicodeDecodeError) as exc:
+            self._error(HTTPStatus.BAD_REQUEST, str(exc))
+            return
+
+        try:
+            output = self.app.render(job)
+        except ServerBusyError as exc:
+            retry = str(max(1, int(self.app.queue_timeout)))
+            self._error(HTTPStatus.SERVICE_UNAVAILABLE, str(exc), **{"Retry-After": retry})
+            return
+        except Exception as exc:
+            self._error(HTTPStatus.UNPROCESSABLE_ENTITY, f"{type(exc).__name__}: {exc}")
+            return
+
+        if job.output == "pdf":
+            if output.pdf is None:
+                self._error(HTTPStatus.UNPROCESSABLE_ENTITY, "LaTeX produced no PDF.")
+                return
+            self._send(HTTPStatus.OK, output.pdf, "application/pdf")
+            return
+        payload: dict[str, Any] = {"tex": output.tex, "elapsed": round(output.elapsed, 6)}
+        if output.pdf is not None:
+            payload["pdf"] = base64.b64encode(output.pdf).decode("ascii")
+        self._send_json(HTTPStatus.OK, payload)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    app: RenderServer,
+    *,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Path | None = None,
+    verbose: bool = False,
+) -> socketserver.BaseServer:
+    """Bind an HTTP server for ``app`` on ``host:port`` or on the Unix ``socket_path``."""
+    handler = type("RenderHandler", (_RenderHandler,), {"app": app})
+    if socket_path is not None:
+        socket_path = Path(socket_path)
+        if socket_path.is_socket():
+            socket_path.unlink()
+        server: socketserver.BaseServer = _UnixHTTPServer(str(socket_path), handler)
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+__all__ = [
+    "DEFAULT_HOST",
+    "DEFAULT_PORT",
+    "DEFAULT_QUEUE_TIMEOUT",
+    "MAX_BODY_BYTES",
+    "OUTPUTS",
+    "RenderJob",
+    "RenderOutput",
+    "RenderServer",
+    "ResidentConversionService",
+    "ServerBusyError",
+    "make_server",
+    "resident_runtime",
+]
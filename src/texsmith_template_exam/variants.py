@@ -0,0 +1,409 @@
+"""Generate seeded exam variants by shuffling choices, questions and parts.
+
+Variants are produced at the Markdown level, so each one renders through the
+regular pipeline (``texsmith render``, ``texsmith-exam dual`` or ``batch``).
+The structure follows the renderer: top-level headings of each source are
+questions, deeper headings are parts and subparts, and task lists
+(``- [ ]`` / ``- [x]``) are multiple-choice blocks whose checked items are the
+correct answers. Heading attributes and choice blocks are recognised with the
+same helpers as the renderer, including lists nested in admonitions.
+
+Headings marked ``{heading=true}`` or ``{shuffle=false}`` stay in place, and
+so does everything below them.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import random
+import re
+
+from texsmith.adapters.markdown import split_front_matter
+
+from texsmith_template_exam.exam.utils import (
+    choice_flags,
+    choice_label,
+    is_truthy_attribute,
+    split_choice_marker,
+    split_heading_attrs,
+)
+
+
+_HEADING_PATTERN = re.compile(r"^(?P<marks>#{1,6})\s+(?P<text>.*?)\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(?P<fence>`{3,}|~{3,})")
+_BULLET_PATTERN = re.compile(r"^(?P<indent>\s*)[-*+]\s+(?P<text>.*)$")
+_RULE_PATTERN = re.compile(r"^\s*([-*_])(?:\s*\1){2,}\s*$")
+_NESTED_LIST_PATTERN = re.compile(r"^\s+(?:[-*+]|\d+[.)])\s")
+
+
+@dataclass(slots=True)
+class ChoiceGroup:
+    """A task list: item line blocks and which of them are checked."""
+
+    start: int
+    end: int
+    items: list[list[str]]
+    correct: tuple[bool, ...]
+    loose: bool
+
+
+@dataclass(slots=True)
+class Section:
+    """A heading, the lines up to its first child heading, and its children."""
+
+    level: int
+    lines: list[str]
+    children: list[Section] = field(default_factory=list)
+    pinned: bool = False
+    numbered: bool = True
+    groups: list[ChoiceGroup] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ExamOutline:
+    """A parsed Markdown exam file."""
+
+    front_matter: str
+    root: Section
+
+
+@dataclass(frozen=True, slots=True)
+class ShuffleOptions:
+    choices: bool = True
+    questions: bool = False
+    parts: bool = False
+
+
+def parse_outline(source: str) -> ExamOutline:
+    """Split ``source`` into front matter and a tree of heading sections."""
+    _, body = split_front_matter(source)
+    front_matter = source[: len(source) - len(body)] if body != source else ""
+
+    root = Section(level=0, lines=[])
+    stack = [root]
+    fence: str | None = None
+    for line in body.split("\n"):
+        fence_match = _FENCE_PATTERN.match(line)
+        if fence_match:
+            token = fence_match.group("fence")
+            if fence is None:
+                fence = token
+            elif token[0] == fence[0] and len(token) >= len(fence):
+                fence = None
+        heading = _HEADING_PATTERN.match(line) if fence is None and not fence_match else None
+        if heading is None:
+            stack[-1].lines.append(line)
+            continue
+
+        level = len(heading.group("marks"))
+        while stack[-1].level >= level:
+            stack.pop()
+        _, attrs = split_heading_attrs(heading.group("text"))
+        parent = stack[-1]
+        section = Section(
+            level=level,
+            lines=[line],
+            pinned=parent.pinned
+            or is_truthy_attribute(attrs.get("heading"))
+            or attrs.get("shuffle", "").lower() in {"false", "no", "off", "0"},
+            numbered=not is_truthy_attribute(attrs.get("heading")),
+        )
+        parent.children.append(section)
+        stack.append(section)
+
+    _collect_groups(root)
+    return ExamOutline(front_matter=front_matter, root=root)
+
+
+def _collect_groups(section: Section) -> None:
+    section.groups = _find_choice_groups(section.lines)
+    for child in section.children:
+        _collect_groups(child)
+
+
+def _find_choice_groups(lines: list[str]) -> list[ChoiceGroup]:
+    groups: list[ChoiceGroup] = []
+    _scan_lists(lines, 0, len(lines), groups)
+    return groups
+
+
+def _bullet(line: str) -> re.Match[str] | None:
+    return None if _RULE_PATTERN.match(line) else _BULLET_PATTERN.match(line)
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _scan_lists(lines: list[str], start: int, end: int, groups: list[ChoiceGroup]) -> None:
+    """Append the choice blocks among ``lines[start:end]`` to ``groups``."""
+    fence: str | None = None
+    index = start
+    while index < end:
+        line = lines[index]
+        fence_match = _FENCE_PATTERN.match(line)
+        if fence_match:
+            token = fence_match.group("fence")
+            if fence is None:
+                fence = token
+            elif token[0] == fence[0] and len(token) >= len(fence):
+                fence = None
+            index += 1
+            continue
+        bullet = _bullet(line) if fence is None else None
+        if bullet is None:
+            index += 1
+            continue
+        index = _read_list(lines, index, end, len(bullet.group("indent")), groups)
+
+
+def _read_list(
+    lines: list[str], start: int, end: int, indent: int, groups: list[ChoiceGroup]
+) -> int:
+    """Read the bullet list starting at ``start`` and return the index after it.
+
+    The list is a choice block under the same rule as the renderer
+    (:func:`choice_flags`); otherwise its items are searched for nested blocks.
+    """
+    index = start
+    items: list[list[str]] = []
+    spans: list[tuple[int, int]] = []
+    states: list[tuple[bool | None, bool]] = []
+    loose = False
+    while index < end:
+        bullet = _bullet(lines[index])
+        if bullet is None or len(bullet.group("indent")) != indent:
+            break
+        marker = split_choice_marker(bullet.group("text"))
+        item_start = index
+        item = [lines[index]]
+        nested = False
+        index += 1
+        while index < end:
+            current = lines[index]
+            if current.strip() and _indent(current) > indent:
+                nested = nested or bool(_NESTED_LIST_PATTERN.match(current))
+                item.append(current)
+                index += 1
+                continue
+            if not current.strip():
+                following = index + 1
+                while following < end and not lines[following].strip():
+                    following += 1
+                upcoming = lines[following] if following < end else ""
+                sibling = _bullet(upcoming)
+                if (sibling and len(sibling.group("indent")) == indent) or (
+                    upcoming.strip() and _indent(upcoming) > indent
+                ):
+                    loose = loose or bool(sibling and len(sibling.group("indent")) == indent)
+                    index = following
+                    continue
+            break
+        items.append(item)
+        spans.append((item_start + 1, index))
+        states.append((marker[0] if marker else None, nested))
+
+    flags = choice_flags(states)
+    if flags is not None:
+        groups.append(ChoiceGroup(start, index, items, flags, loose))
+    else:
+        for item_start, item_end in spans:
+            _scan_lists(lines, item_start, item_end, groups)
+    return index
+
+
+def permutation(seed: int | str, variant: int, key: str, size: int) -> list[int]:
+    """Return the deterministic order of ``size`` items for one variant and group.
+
+    The generator is seeded from ``(seed, variant, key)`` only, so any variant
+    can be produced on its own and in any order.
+    """
+    order = list(range(size))
+    random.Random(f"{seed}/{variant}/{key}").shuffle(order)
+    return order
+
+
+@dataclass(slots=True)
+class _Plan:
+    """Permutations of every shuffled sibling list and choice group of one variant."""
+
+    seed: int | str
+    variant: int
+    options: ShuffleOptions
+
+    def children(self, section: Section, key: str, depth: int) -> list[int]:
+        order = list(range(len(section.children)))
+        enabled = self.options.parts if depth else self.options.questions
+        if section.pinned or not enabled:
+            return order
+        movable = [index for index, child in enumerate(section.children) if not child.pinned]
+        shuffled = permutation(self.seed, self.variant, f"{key}/children", len(movable))
+        for slot, source in zip(movable, shuffled, strict=True):
+            order[slot] = movable[source]
+        return order
+
+    def choices(self, section: Section, key: str, group: int) -> list[int]:
+        size = len(section.groups[group].items)
+        if section.pinned or not self.options.choices:
+            return list(range(size))
+        return permutation(self.seed, self.variant, f"{key}/choices{group}", size)
+
+
+def question_count(outline: ExamOutline) -> int:
+    """Return the number of questions (top-level headings) in ``outline``."""
+    return sum(child.numbered for child in outline.root.children)
+
+
+def _walk(
+    outline: ExamOutline,
+    plan: _Plan,
+    visit: Callable[[Section, str, str, list[list[int]]], None],
+    offset: int,
+) -> None:
+    def walk(section: Section, key: str, depth: int, number: str) -> None:
+        orders = [plan.choices(section, key, index) for index in range(len(section.groups))]
+        visit(section, key, number, orders)
+        position = 0
+        for index in plan.children(section, key, depth):
+            child = section.children[index]
+            child_key = f"{key}/{index}"
+            if child.numbered:
+                position += 1
+                child_number = f"{number}.{position}" if number else str(position + offset)
+            else:
+                child_number = number
+            walk(child, child_key, depth + 1, child_number)
+
+    walk(outline.root, "", 0, "")
+
+
+def variant_answers(
+    outline: ExamOutline,
+    variant: int,
+    *,
+    seed: int | str = 0,
+    options: ShuffleOptions | None = None,
+    offset: int = 0,
+) -> dict[str, str]:
+    """Return ``{question: labels}`` for one variant without rebuilding its text.
+
+    Questions are numbered as printed in the variant, starting after
+    ``offset``. A question holding several choice blocks gets one entry per
+    block, suffixed ``#1``, ``#2``, and so on.
+    """
+    answers: dict[str, str] = {}
+
+    def visit(section: Section, _key: str, number: str, orders: list[list[int]]) -> None:
+        for index, (group, order) in enumerate(zip(section.groups, orders, strict=True)):
+            labels = [
+                choice_label(position)
+                for position, source in enumerate(order)
+                if group.correct[source]
+            ]
+            suffix = f"#{index + 1}" if len(orders) > 1 else ""
+            answers[f"{number or '0'}{suffix}"] = ", ".join(labels)
+
+    _walk(outline, _Plan(seed, variant, options or ShuffleOptions()), visit, offset)
+    return answers
+
+
+def render_variant(
+    outline: ExamOutline,
+    variant: int,
+    *,
+    seed: int | str = 0,
+    options: ShuffleOptions | None = None,
+) -> str:
+    """Return the Markdown of ``variant``."""
+    lines: list[str] = []
+
+    def visit(section: Section, _key: str, _number: str, orders: list[list[int]]) -> None:
+        body = list(section.lines)
+        for group, order in reversed(list(zip(section.groups, orders, strict=True))):
+            replacement: list[str] = []
+            for position, source in enumerate(order):
+                if position and group.loose:
+                    replacement.append("")
+                replacement.extend(group.items[source])
+            body[group.start : group.end] = replacement
+        lines.extend(body)
+
+    _walk(outline, _Plan(seed, variant, options or ShuffleOptions()), visit, 0)
+    return outline.front_matter + "\n".join(lines)
+
+
+def answer_table(
+    outlines: Sequence[ExamOutline],
+    count: int,
+    *,
+    seed: int | str = 0,
+    options: ShuffleOptions | None = None,
+) -> list[dict[str, str]]:
+    """Return the answer maps of variants ``1..count`` of an exam split over ``outlines``.
+
+    Only the index permutations are computed, so thousands of variants cost
+    milliseconds. Question numbers continue from one outline to the next.
+    """
+    offsets = [0]
+    for outline in outlines[:-1]:
+        offsets.append(offsets[-1] + question_count(outline))
+    table: list[dict[str, str]] = []
+    for variant in range(1, count + 1):
+        answers: dict[str, str] = {}
+        for outline, offset in zip(outlines, offsets, strict=True):
+            answers.update(
+                variant_answers(outline, variant, seed=seed, options=options, offset=offset)
+            )
+        table.append(answers)
+    return table
+
+
+def write_variants(
+    sources: Sequence[Path],
+    output: Path,
+    count: int,
+    *,
+    seed: int | str = 0,
+    options: ShuffleOptions | None = None,
+) -> Path:
+    """Write ``output/vNN/<source name>`` for each variant and ``output/answers.json``.
+
+    Returns the path of the answer file.
+    """
+    outlines = [parse_outline(Path(source).read_text(encoding="utf-8")) for source in sources]
+    width = max(2, len(str(count)))
+    for variant in range(1, count + 1):
+        target = Path(output) / f"v{variant:0{width}d}"
+        target.mkdir(parents=True, exist_ok=True)
+        for source, outline in zip(sources, outlines, strict=True):
+            text = render_variant(outline, variant, seed=seed, options=options)
+            (target / Path(source).name).write_text(text, encoding="utf-8")
+
+    table = answer_table(outlines, count, seed=seed, options=options)
+    payload = {
+        "seed": seed,
+        "variants": {
+            f"v{variant:0{width}d}": answers for variant, answers in enumerate(table, start=1)
+        },
+    }
+    path = Path(output) / "answers.json"
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+__all__ = [
+    "ChoiceGroup",
+    "ExamOutline",
+    "Section",
+    "ShuffleOptions",
+    "answer_table",
+    "parse_outline",
+    "permutation",
+    "question_count",
+    "render_variant",
+    "variant_answers",
+    "write_variants",
+]
@@ -0,0 +1,253 @@
+"""Rebuild an exam whenever its sources change.
+
+The watcher polls the Markdown sources, the YAML config given on the command
+line and the ``common``/``config`` files the renderer reads next to the
+sources. Edits are debounced, then the exam is rendered again on the same
+warm :class:`ConversionService`; with the per-question cache enabled (the
+``watch`` command turns it on), only edited questions go through the
+renderer. PDFs are compiled through the format and compile caches: the
+preamble comes from a dumped format and a variant whose LaTeX did not change
+is not compiled at all.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field, replace
+import hashlib
+from pathlib import Path
+import threading
+import time
+from typing import Any
+
+from texsmith.core.conversion.service import ConversionService
+
+from .compilecache import CompileCache
+from .defaults import DEFAULT_DEBOUNCE, DEFAULT_INTERVAL
+from .dual import DEFAULT_TEMPLATE, VARIANTS, _build_pdf, build_request
+from .formats import FormatCache
+from .passes import PassPlanner
+
+
+_SOURCE_CONFIGS = ("common.yaml", "common.yml", "config.yaml", "config.yml")
+_MARKDOWN_SUFFIXES = (".md", ".markdown")
+
+# (mtime_ns, size) of a watched file, or ``None`` when it does not exist.
+_Stat = tuple[int, int] | None
+
+
+@dataclass(frozen=True, slots=True)
+class WatchRebuild:
+    """Outcome of one rebuild triggered by a change.
+
+    ``latency`` runs from the modification time of the newest changed file to
+    the moment the last PDF (or ``.tex`` without ``--build``) was written.
+    ``passes`` holds the LaTeX passes of each variant compiled by a planner.
+    """
+
+    changed: tuple[Path, ...]
+    elapsed: float
+    latency: float
+    main_tex: Mapping[str, Path] = field(default_factory=dict)
+    pdfs: Mapping[str, Path] = field(default_factory=dict)
+    passes: Mapping[str, int] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+ReportCallback = Callable[[WatchRebuild], None]
+
+
+def watched_paths(inputs: Iterable[Path]) -> list[Path]:
+    """Return ``inputs`` and the source config files the renderer may read."""
+    paths: dict[Path, None] = {}
+    for path in inputs:
+        path = Path(path)
+        paths[path] = None
+        if path.suffix.lower() in _MARKDOWN_SUFFIXES:
+            for name in _SOURCE_CONFIGS:
+                paths[path.parent / name] = None
+    return list(paths)
+
+
+def _stat(path: Path) -> _Stat:
+    try:
+        info = path.stat()
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+def _digest(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+class ExamWatcher:
+    """Poll the sources of an exam and rebuild it when their content changes.
+
+    Files are compared by modification time and size first and by content
+    hash second, so saving a file without editing it does not rebuild.
+    """
+
+    def __init__(
+        self,
+        inputs: Sequence[Path],
+        output_dir: Path,
+        *,
+        template: str = DEFAULT_TEMPLATE,
+        attributes: Mapping[str, Any] | None = None,
+        variants: Iterable[str] = ("exam", "solution"),
+        build: bool = False,
+        engine: str | None = None,
+        service: ConversionService | None = None,
+        formats: FormatCache | None = None,
+        compiled: CompileCache | None = None,
+        planner: PassPlanner | None = None,
+        interval: float = DEFAULT_INTERVAL,
+        debounce: float = DEFAULT_DEBOUNCE,
+    ) -> None:
+        known = dict(VARIANTS)
+        self.variants = tuple(dict.fromkeys(variants))
+        unknown = [name for name in self.variants if name not in known]
+        if unknown or not self.variants:
+            raise ValueError(f"Unknown variant(s): {', '.join(unknown) or 'none selected'}.")
+        self.inputs = [Path(path) for path in inputs]
+        self.output_dir = Path(output_dir)
+        self.template = template
+        self.attributes = dict(attributes or {})
+        self.build = build
+        self.engine = engine
+        self.service = service or ConversionService()
+        self.formats = formats
+        self.compiled = compiled
+        self.planner = planner
+        self.interval = interval
+        self.debounce = debounce
+        self.paths = watched_paths(self.inputs)
+        self._stats: dict[Path, _Stat] = {path: _stat(path) for path in self.paths}
+        self._digests: dict[Path, str | None] = {path: _digest(path) for path in self.paths}
+
+    def poll(self) -> list[Path]:
+        """Return the watched files whose content changed since the last poll."""
+        changed: list[Path] = []
+        for path in self.paths:
+            stat = _stat(path)
+            if stat == self._stats[path]:
+                continue
+            self._stats[path] = stat
+            digest = _digest(path) if stat is not None else None
+            if digest != self._digests[path]:
+                self._digests[path] = digest
+                changed.append(path)
+        return changed
+
+    def wait_for_change(self, stop: threading.Event | None = None) -> list[Path]:
+        """Block until a change has settled for ``debounce`` seconds.
+
+        Returns every file changed meanwhile, or an empty list once ``stop``
+        is set.
+        """
+        stop = stop or threading.Event()
+        changed: dict[Path, None] = {}
+        settled_at = None
+        while not stop.is_set():
+            now = time.monotonic()
+            fresh = self.poll()
+            if fresh:
+                changed.update(dict.fromkeys(fresh))
+                settled_at = now + self.debounce
+            elif settled_at is not None and now >= settled_at:
+                return list(changed)
+            stop.wait(self.interval)
+        return []
+
+    def rebuild(self, changed: Sequence[Path] = ()) -> WatchRebuild:
+        """Render the selected variants, and compile them with ``build``."""
+        edited = [stat[0] for path in changed if (stat := self._stats.get(path)) is not None]
+        edit_time = max(edited) / 1e9 if edited else time.time()
+        start = time.perf_counter()
+        main_tex: dict[str, Path] = {}
+        pdfs: dict[str, Path] = {}
+        passes: dict[str, int] = {}
+        error = None
+        try:
+            request = build_request(
+                self.inputs,
+                template=self.template,
+                attributes=self.attributes,
+                service=self.service,
+            )
+            prepared = self.service.prepare_documents(request)
+            solutions = dict(VARIANTS)
+            for name in self.variants:
+                variant_request = replace(
+                    request,
+                    render_dir=self.output_dir / name,
+                    template_options={**request.template_options, "solution": solutions[name]},
+                )
+                response = self.service.execute(variant_request, prepared=prepared)
+                main_tex[name] = response.render_result.main_tex_path
+                if self.build:
+                    compiled_before = self.planner.documents if self.planner else 0
+                    pdf = _build_pdf(
+                        self.service,
+                        response,
+                        engine=self.engine,
+                        formats=self.formats,
+                        compiled=self.compiled,
+                        planner=self.planner,
+                    )
+                    if pdf is not None:
+                        pdfs[name] = pdf
+                    # A compile cache hit runs no pass and leaves no new report.
+                    if self.planner is not None and self.planner.documents > compiled_before:
+                        report = self.planner.report_for(main_tex[name])
+                        if report is not None:
+                            passes[name] = report.passes
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        return WatchRebuild(
+            changed=tuple(changed),
+            elapsed=time.perf_counter() - start,
+            latency=max(time.time() - edit_time, 0.0),
+            main_tex=main_tex,
+            pdfs=pdfs,
+            passes=passes,
+            error=error,
+        )
+
+    def run(
+        self,
+        report: ReportCallback | None = None,
+        *,
+        stop: threading.Event | None = None,
+        initial: bool = True,
+    ) -> None:
+        """Rebuild once (with ``initial``), then after every change until ``stop`` is set."""
+        stop = stop or threading.Event()
+        if initial and not stop.is_set():
+            result = self.rebuild()
+            if report is not None:
+                report(result)
+        while not stop.is_set():
+            changed = self.wait_for_change(stop)
+            if not changed:
+                continue
+            result = self.rebuild(changed)
+            if report is not None:
+                report(result)
+
+
+__all__ = [
+    "DEFAULT_DEBOUNCE",
+    "DEFAULT_INTERVAL",
+    "ExamWatcher",
+    "WatchRebuild",
+    "watched_paths",
+]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from texsmith_template_exam.batch import BatchJob, load_manifest, run_batch
+
+
+class _RecordingService:
+    def __init__(self) -> None:
+        self.executed: list[object] = []
+
+    def split_inputs(self, inputs: list[Path]) -> SimpleNamespace:
+        documents = [path for path in inputs if path.suffix == ".md"]
+        return SimpleNamespace(
+            documents=documents,
+            bibliography_files=[],
+            front_matter=None,
+            front_matter_path=None,
+        )
+
+    def execute(self, request) -> SimpleNamespace:
+        if any(not Path(path).exists() for path in request.documents):
+            raise FileNotFoundError(request.documents[0])
+        self.executed.append(request)
+        main_tex = Path(request.render_dir) / "main.tex"
+        return SimpleNamespace(render_result=SimpleNamespace(main_tex_path=main_tex))
+
+
+def test_load_manifest_resolves_paths_and_merges_defaults(tmp_path: Path) -> None:
+    manifest = tmp_path / "manifest.yml"
+    manifest.write_text(
+        "defaults:\n"
+        "  config: config.yml\n"
+        "  attributes: {compact: false, points: true}\n"
+        "jobs:\n"
+        "  - name: student\n"
+        "    sources: exam.md\n"
+        "    output: build/exam\n"
+        "  - sources: [exam.md]\n"
+        "    output: build/solution\n"
+        "    attributes: {solution: true, compact: true}\n",
+        encoding="utf-8",
+    )
+
+    student, solution = load_manifest(manifest)
+
+    assert student.name == "student"
+    assert student.sources == (tmp_path / "exam.md",)
+    assert student.inputs() == [tmp_path / "config.yml", tmp_path / "exam.md"]
+    assert student.attributes == {"compact": False, "points": True}
+    assert solution.name == "job-2"
+    assert solution.output == tmp_path / "build/solution"
+    assert solution.attributes == {"compact": True, "points": True, "solution": True}
+
+
+def test_load_manifest_rejects_incomplete_jobs(tmp_path: Path) -> None:
+    manifest = tmp_path / "manifest.yml"
+    manifest.write_text("jobs:\n  - name: nope\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="needs 'sources' and 'output'"):
+        load_manifest(manifest)
+
+
+def test_run_batch_streams_progress_and_keeps_order(tmp_path: Path) -> None:
+    source = tmp_path / "exam.md"
+    source.write_text("# Q1\n", encoding="utf-8")
+    jobs = [
+        BatchJob("exam", (source,), tmp_path / "exam"),
+        BatchJob("missing", (tmp_path / "missing.md",), tmp_path / "missing"),
+        BatchJob("solution", (source,), tmp_path / "solution", attributes={"solution": True}),
+    ]
+    service = _RecordingService()
+    events: list[tuple[str, int, int]] = []
+
+    results = run_batch(
+        jobs,
+        workers=0,
+        service=service,
+        progress=lambda result, done, total: events.append((result.name, done, total)),
+    )
+
+    assert [result.name for result in results] == ["exam", "missing", "solution"]
+    assert [result.ok for result in results] == [True, False, True]
+    assert "FileNotFoundError" in (results[1].error or "")
+    assert results[2].main_tex == tmp_path / "solution" / "main.tex"
+    assert events == [("exam", 1, 3), ("missing", 2, 3), ("solution", 3, 3)]
+    assert service.executed[1].template_options == {"solution": True}
+
+
+def test_load_manifest_rejects_non_mapping_jobs(tmp_path: Path) -> None:
+    manifest = tmp_path / "manifest.yml"
+    manifest.write_text("jobs:\n  - exam.md\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="job #1 must be a mapping"):
+        load_manifest(manifest)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+from texsmith_template_exam.compilecache import CompileCache, compile_key
+
+
+def _render_dir(root: Path, body: str = "Hello") -> SimpleNamespace:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "columen.sty").write_text("% columen\n", encoding="utf-8")
+    (root / "assets").mkdir(exist_ok=True)
+    (root / "assets" / "logo.pdf").write_bytes(b"%PDF logo")
+    fragment = root / "part.tex"
+    fragment.write_text("\\includegraphics[width=2cm]{assets/logo}\n", encoding="utf-8")
+    main_tex = root / "main.tex"
+    main_tex.write_text(f"\\documentclass{{exam}}\n\\input{{part}}\n{body}\n", encoding="utf-8")
+    return SimpleNamespace(
+        main_tex_path=main_tex,
+        fragment_paths=[fragment],
+        asset_paths=[root / "columen.sty"],
+        bibliography_path=None,
+        template_engine="lualatex",
+        requires_shell_escape=False,
+    )
+
+
+class _Builder:
+    def __init__(self, render_result: SimpleNamespace, returncode: int = 0) -> None:
+        self.render_result = render_result
+        self.returncode = returncode
+        self.calls = 0
+
+    def __call__(self) -> SimpleNamespace:
+        self.calls += 1
+        pdf = self.render_result.main_tex_path.with_suffix(".pdf")
+        pdf.write_bytes(b"%PDF build " + str(self.calls).encode())
+        return SimpleNamespace(returncode=self.returncode, pdf_path=pdf)
+
+
+def test_compile_key_tracks_every_input(tmp_path: Path) -> None:
+    render_result = _render_dir(tmp_path / "a")
+    key = compile_key(render_result)
+
+    assert key == compile_key(_render_dir(tmp_path / "b"))
+    assert key != compile_key(render_result, "xelatex")
+    (tmp_path / "a" / "assets" / "logo.pdf").write_bytes(b"%PDF other logo")
+    assert key != compile_key(render_result)
+
+    for name in ("columen.sty", "part.tex"):
+        render_result = _render_dir(tmp_path / name)
+        key = compile_key(render_result)
+        with (tmp_path / name / name).open("a", encoding="utf-8") as handle:
+            handle.write("% changed\n")
+        assert key != compile_key(render_result)
+
+
+def test_unchanged_documents_restore_the_cached_pdf(tmp_path: Path) -> None:
+    cache = CompileCache(tmp_path / "cache")
+    first = _render_dir(tmp_path / "first")
+    second = _render_dir(tmp_path / "second")
+    builder = _Builder(first)
+
+    cache.build_pdf(first, builder)
+    result = cache.build_pdf(second, _Builder(second))
+
+    assert builder.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert result.returncode == 0
+    assert result.pdf_path.read_bytes() == b"%PDF build 1"
+
+
+def test_changed_documents_and_failures_are_rebuilt(tmp_path: Path) -> None:
+    cache = CompileCache(tmp_path / "cache")
+    failing = _render_dir(tmp_path / "failing")
+    builder = _Builder(failing, returncode=1)
+
+    cache.build_pdf(failing, builder)
+    cache.build_pdf(failing, builder)
+    changed = _render_dir(tmp_path / "changed", body="Bye")
+    changed_builder = _Builder(changed)
+    cache.build_pdf(changed, changed_builder)
+
+    assert builder.calls == 2
+    assert changed_builder.calls == 1
+    assert len(list((tmp_path / "cache").glob("*.pdf"))) == 1
+
+
+def test_eviction_removes_least_recently_used(tmp_path: Path) -> None:
+    cache = CompileCache(tmp_path / "cache", max_bytes=25)
+    cache.directory.mkdir()
+    for index, name in enumerate(("old", "used", "new")):
+        path = cache.directory / f"{name}.pdf"
+        path.write_bytes(b"x" * 10)
+        os.utime(path, ns=(index * 10**9, index * 10**9))
+
+    assert cache.restore("old", tmp_path / "out.pdf")
+    cache.evict()
+
+    assert sorted(path.stem for path in cache.directory.glob("*.pdf")) == ["new", "old"]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from texsmith.core.conversion.models import ConversionRequest
+
+from texsmith_template_exam.cli import parse_attributes
+from texsmith_template_exam.dual import build_request, render_dual
+from texsmith_template_exam.markdown import SOLUTION_EXTENSION
+
+
+class _RecordingService:
+    def __init__(self) -> None:
+        self.prepared: list[ConversionRequest] = []
+        self.executed: list[tuple[ConversionRequest, object]] = []
+
+    def prepare_documents(self, request: ConversionRequest) -> object:
+        self.prepared.append(request)
+        return object()
+
+    def execute(self, request: ConversionRequest, *, prepared: object) -> SimpleNamespace:
+        self.executed.append((request, prepared))
+        main_tex = Path(request.render_dir) / "main.tex"
+        return SimpleNamespace(render_result=SimpleNamespace(main_tex_path=main_tex))
+
+
+def test_render_dual_parses_once_and_renders_both_variants(tmp_path: Path) -> None:
+    service = _RecordingService()
+    request = ConversionRequest(
+        documents=[tmp_path / "exam.md"],
+        template="exam",
+        template_options={"compact": True},
+    )
+
+    result = render_dual(request, tmp_path / "build", service=service)
+
+    assert len(service.prepared) == 1
+    assert len(service.executed) == 2
+    prepared = {id(batch) for _, batch in service.executed}
+    assert len(prepared) == 1
+
+    student, solution = (executed for executed, _ in service.executed)
+    assert student.render_dir == tmp_path / "build" / "exam"
+    assert solution.render_dir == tmp_path / "build" / "solution"
+    assert student.template_options == {"compact": True, "solution": False}
+    assert solution.template_options == {"compact": True, "solution": True}
+    assert request.template_options == {"compact": True}
+    assert result.student_pdf is None
+    assert result.solution_pdf is None
+
+
+def test_build_request_uses_yaml_as_front_matter(tmp_path: Path) -> None:
+    config = tmp_path / "config.yml"
+    config.write_text("exam:\n  points: false\n", encoding="utf-8")
+    source = tmp_path / "exam.md"
+    source.write_text("# Q1\n", encoding="utf-8")
+
+    request = build_request([config, source], attributes={"compact": True})
+
+    assert list(request.documents) == [source]
+    assert request.front_matter == {"exam": {"points": False}}
+    assert SOLUTION_EXTENSION in request.markdown_extensions
+    assert request.template_options == {"compact": True}
+
+
+def test_parse_attributes_coerces_and_nests() -> None:
+    attributes = parse_attributes(["solution=true", "exam.fillin.scale=1.5", "points=10"])
+    assert attributes == {"solution": True, "exam": {"fillin": {"scale": 1.5}}, "points": 10}
+
+
+def test_parse_attributes_rejects_missing_value() -> None:
+    with pytest.raises(ValueError, match="expected key=value"):
+        parse_attributes(["solution"])
+    with pytest.raises(ValueError, match="'exam' is already a value"):
+        parse_attributes(["exam=1", "exam.points=2"])
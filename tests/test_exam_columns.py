@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import pytest
+from texsmith.adapters.latex.renderer import LaTeXRenderer
+from texsmith.core.context import DocumentState
+
+from texsmith_template_exam import exam_renderer
+from texsmith_template_exam.exam.columns import (
+    ChoiceLayout,
+    estimate_width,
+    line_width,
+    plan_choices,
+)
+from texsmith_template_exam.markdown import render_exam_markdown
+
+
+VOLCANOES = ["Etna", "Krakatoa", "Vesuvius", "Mauna Loa", "Fuji", "Stromboli", "Kilauea"]
+LINE = 443.0
+
+
+def _render(source: str, **overrides: object) -> str:
+    renderer = LaTeXRenderer(copy_assets=False, convert_assets=False)
+    exam_renderer.register(renderer)
+    return renderer.render(
+        render_exam_markdown(source),
+        runtime={"template_overrides": overrides},
+        state=DocumentState(),
+    )
+
+
+def test_estimate_uses_glyph_widths_and_fonts() -> None:
+    assert estimate_width("Etna") == pytest.approx(6.81 + 3.89 + 5.56 + 5.0)
+    assert estimate_width("\\textbf{Etna}") == pytest.approx(estimate_width("Etna") * 1.15)
+    assert estimate_width("\\texttt{\\textbasiclatin{int x}}") == pytest.approx(5 * 5.25)
+    assert estimate_width("Etna\\label{q1}\\footnote{Sicily}") == estimate_width("Etna")
+    assert estimate_width("$x^2$") == pytest.approx(5.28 + 0.7 * 5.0)
+
+
+def test_estimate_gives_up_on_unsized_content() -> None:
+    assert estimate_width("$\\frac{1}{2}$") is None
+    assert estimate_width("\\includegraphics{map.png}") is None
+    assert estimate_width("two\\\\lines") is None
+
+
+def test_plan_picks_the_widest_fitting_columns_with_fewest_empty_cells() -> None:
+    widths = [estimate_width(text) for text in VOLCANOES]
+
+    assert plan_choices(widths, LINE) == ChoiceLayout(4)
+    assert plan_choices([150.0, 120.0], LINE) == ChoiceLayout(2)
+    assert plan_choices([300.0] * 3, LINE) == ChoiceLayout(1)
+
+
+def test_plan_puts_many_short_options_on_one_line() -> None:
+    widths = [estimate_width(str(number)) for number in range(1, 8)]
+
+    assert plan_choices(widths, LINE) == ChoiceLayout(1, inline=True)
+    assert plan_choices(widths[:3], LINE) == ChoiceLayout(3)
+
+
+def test_plan_leaves_close_or_unknown_estimates_to_columen() -> None:
+    assert plan_choices([180.0, 180.0], LINE) == ChoiceLayout(2, balanced=True)
+    assert plan_choices([10.0, None], LINE) == ChoiceLayout(2, balanced=True)
+    assert plan_choices([10.0] * 7, None) == ChoiceLayout(5, balanced=True)
+
+
+def test_line_width_follows_paper_settings() -> None:
+    assert line_width(None) == pytest.approx(455.24, abs=0.01)
+    margins = {"left": "2.4cm", "right": "24mm"}
+    assert line_width({"margin": margins}) == pytest.approx(162 * 72.27 / 25.4)
+    landscape = {"format": "a4", "orientation": "landscape", "margin": "narrow"}
+    assert line_width(landscape) == pytest.approx(267 * 72.27 / 25.4)
+    assert line_width({"format": "a5"}) is None
+    assert line_width("a4") is None
+
+
+def test_rendered_lists_use_the_estimated_layout() -> None:
+    options = "\n".join(f"- [{'x' if name == 'Etna' else ' '}] {name}" for name in VOLCANOES)
+    digits = "\n".join(f"- [ ] {number}" for number in range(1, 8))
+    source = f"## Volcanoes\n\n{options}\n\n## Digits\n\n{digits}\n"
+
+    latex = _render(source)
+
+    assert "\\begin{texsmithcolumns}{4}\n\\begin{choices}" in latex
+    assert "\\begin{oneparchoices}\n\\choice 1" in latex
+    assert "columen" not in latex
+    assert "\\begin{columen}[5]\n\\begin{choices}" in _render(source, fonts={"family": "cursor"})
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from texsmith.adapters.latex.renderer import LaTeXRenderer
+
+from texsmith_template_exam import exam, exam_renderer
+from texsmith_template_exam.markdown import render_exam_markdown
+
+
+_THREADS = 8
+_DOCUMENTS = 24
+
+
+def _source(index: int) -> str:
+    return "\n".join(
+        [
+            f"## Question {index} {{ points={index % 5 + 1} }}",
+            "",
+            f"The answer is [{index * 7}]{{w=20}} and [value{index}].",
+            "",
+            f"- [x] right {index}",
+            "- [ ] wrong",
+            "",
+            "### -",
+            "",
+            f"Explain step {index}.",
+            "",
+            "!!! solution { lines=2 }",
+            "",
+            f"    Because of rule {index}.",
+            "",
+        ]
+    )
+
+
+def _render(index: int) -> str:
+    renderer = LaTeXRenderer(copy_assets=False, convert_assets=False)
+    exam_renderer.register(renderer)
+    html = render_exam_markdown(_source(index))
+    solution = index % 2 == 0
+    latex = renderer.render(
+        html,
+        runtime={
+            "template_overrides": {"solution": solution, "compact": index % 3 == 0},
+            "document_path": f"/tmp/exams/exam-{index}.md",
+        },
+    )
+    rules = exam._markdown_to_latex_list([f"Rule **{index}**.", "No phones."])
+    return latex + "\n".join(rules)
+
+
+def test_concurrent_renders_match_sequential_renders() -> None:
+    expected = [_render(index) for index in range(_DOCUMENTS)]
+
+    with ThreadPoolExecutor(max_workers=_THREADS) as pool:
+        for _ in range(3):
+            results = list(pool.map(_render, range(_DOCUMENTS)))
+            assert results == expected
+
+    assert r"\fillin[7][20mm]" in expected[1]
+    assert r"\answerline" not in expected[0]
+    assert "Because of rule 0" in expected[0]
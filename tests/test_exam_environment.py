@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+from jinja2 import Environment
+import pytest
+from texsmith.core.templates import load_template
+
+from texsmith_template_exam.exam.environment import (
+    JINJA_CACHE_ENV,
+    TemplateBytecodeCache,
+    bytecode_cache,
+    clear_shared_templates,
+)
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    directory = tmp_path / "jinja"
+    monkeypatch.setenv(JINJA_CACHE_ENV, str(directory))
+    clear_shared_templates()
+    yield directory
+    clear_shared_templates()
+
+
+def test_templates_share_one_environment(cache_dir: Path) -> None:
+    first = load_template("exam")
+    entrypoint = first.info.entrypoint
+    compiled = first.environment.get_template(entrypoint)
+
+    second = load_template("exam")
+
+    assert second is not first
+    assert second.environment is first.environment
+    assert second.environment.get_template(entrypoint) is compiled
+    assert "markdown_to_latex" in second.environment.filters
+    assert second.manifest is first.manifest
+
+
+def test_compiled_templates_are_reused_across_environments(
+    cache_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    template = load_template("exam")
+    template.environment.get_template(template.info.entrypoint)
+    assert list(cache_dir.glob("__jinja2_*.cache"))
+
+    clear_shared_templates()
+    fresh = load_template("exam")
+
+    def _compile(*_args, **_kwargs):
+        pytest.fail("template.tex was compiled again")
+
+    monkeypatch.setattr(fresh.environment, "compile", _compile)
+    rendered = fresh.environment.get_template(fresh.info.entrypoint)
+    assert rendered.render(fresh.prepare_context("BODY"))
+
+
+def test_entry_point_is_parsed_once(cache_dir: Path) -> None:
+    template = load_template("exam")
+    environment = template.environment
+    source, _, _ = environment.loader.get_source(environment, template.info.entrypoint)
+
+    assert environment.parse(source) is environment.parse(source)
+    assert environment.parse(source + "\n") is not environment.parse(source)
+
+
+def test_buckets_are_keyed_by_source(tmp_path: Path) -> None:
+    cache = TemplateBytecodeCache(str(tmp_path))
+    environment = Environment()
+
+    first = cache.get_bucket(environment, "t.tex", "/t.tex", "one")
+    second = cache.get_bucket(environment, "t.tex", "/t.tex", "two")
+
+    assert first.key != second.key
+    assert first.key == cache.get_bucket(environment, "t.tex", "/t.tex", "one").key
+
+
+def test_cache_write_failures_are_ignored(tmp_path: Path) -> None:
+    cache = TemplateBytecodeCache(str(tmp_path / "missing"))
+    environment = Environment(bytecode_cache=cache)
+    bucket = cache.get_bucket(environment, "t", None, "x")
+    bucket.code = environment.compile("x")
+
+    cache.dump_bytecode(bucket)
+
+
+def test_bytecode_cache_can_be_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(JINJA_CACHE_ENV, "0")
+    assert bytecode_cache() is None
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from texsmith_template_exam.exam import mode
+from texsmith_template_exam.exam.filecache import FRONT_MATTER_CACHE, YAML_CACHE, FileCache
+
+
+class _DummyContext:
+    def __init__(
+        self, runtime: dict[str, object] | None = None, config: object | None = None
+    ) -> None:
+        self.runtime = runtime or {}
+        self.config = config
+
+
+def _bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_file_cache_reuses_parsed_value_until_file_changes(tmp_path: Path) -> None:
+    calls: list[Path] = []
+
+    def _loader(path: Path) -> str:
+        calls.append(path)
+        return path.read_text(encoding="utf-8")
+
+    cache = FileCache(_loader)
+    target = tmp_path / "config.yml"
+    target.write_text("a", encoding="utf-8")
+
+    assert cache.get(target) == "a"
+    assert cache.get(target) == "a"
+    assert len(calls) == 1
+
+    target.write_text("bb", encoding="utf-8")
+    _bump_mtime(target)
+    assert cache.get(target) == "bb"
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = FileCache(lambda path: path.name, maxsize=2)
+    paths = [tmp_path / f"{name}.yml" for name in "abc"]
+    for path in paths:
+        path.write_text("x", encoding="utf-8")
+
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+
+    assert len(cache) == 2
+    misses = cache.misses
+    cache.get(paths[0])
+    assert cache.misses == misses
+    cache.get(paths[1])
+    assert cache.misses == misses + 1
+
+
+def test_file_cache_returns_default_for_missing_or_invalid_files(tmp_path: Path) -> None:
+    def _loader(_path: Path) -> object:
+        raise ValueError("broken")
+
+    cache = FileCache(_loader)
+    broken = tmp_path / "broken.yml"
+    broken.write_text("x", encoding="utf-8")
+
+    assert cache.get(tmp_path / "missing.yml", {}) == {}
+    assert cache.get(broken) is None
+
+
+def test_source_config_is_parsed_once_across_contexts(tmp_path: Path) -> None:
+    YAML_CACHE.clear()
+    source_dir = tmp_path / "series"
+    source_dir.mkdir()
+    config = source_dir / "config.yml"
+    config.write_text("exam:\n  solution: true\n", encoding="utf-8")
+
+    for _ in range(3):
+        assert mode.in_solution_mode(_DummyContext({"source_dir": str(source_dir)}))
+    assert YAML_CACHE.misses == 1
+
+    config.write_text("exam:\n  solution: false\n", encoding="utf-8")
+    _bump_mtime(config)
+    assert not mode.in_solution_mode(_DummyContext({"source_dir": str(source_dir)}))
+    assert YAML_CACHE.misses == 2
+
+
+def test_front_matter_is_shared_across_contexts(tmp_path: Path) -> None:
+    FRONT_MATTER_CACHE.clear()
+    doc = tmp_path / "doc.md"
+    doc.write_text("---\nexam:\n  compact: true\n---\n# Q\n", encoding="utf-8")
+
+    for _ in range(3):
+        assert mode.in_compact_mode(_DummyContext({"document_path": str(doc)}))
+    assert FRONT_MATTER_CACHE.misses == 1
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from texsmith_template_exam import exam
+
+
+@pytest.fixture(autouse=True)
+def _clear_fragment_cache():
+    exam._fragment_cache.clear()
+    yield
+    exam._fragment_cache.clear()
+
+
+def test_markdown_to_latex_is_memoized(monkeypatch) -> None:
+    calls: list[str] = []
+
+    def _convert(text: str) -> str:
+        calls.append(text)
+        return f"<{text}>"
+
+    monkeypatch.setattr(exam, "_convert_markdown", _convert)
+
+    assert exam._markdown_to_latex("No phones.") == "<No phones.>"
+    assert exam._markdown_to_latex("No phones.") == "<No phones.>"
+    assert exam._markdown_to_latex("  ") == "  "
+    assert exam._markdown_to_latex(None) == ""
+    assert calls == ["No phones."]
+
+
+def test_markdown_to_latex_list_converts_misses_in_one_pass(monkeypatch) -> None:
+    batches: list[list[str]] = []
+
+    def _batch(texts: list[str]) -> list[str]:
+        batches.append(list(texts))
+        return [f"<{text}>" for text in texts]
+
+    monkeypatch.setattr(exam, "_convert_markdown_batch", _batch)
+    monkeypatch.setattr(exam, "_convert_markdown", lambda text: pytest.fail(text))
+
+    rules = ["First", "Second", "First", "Third"]
+    assert exam._markdown_to_latex_list(rules) == ["<First>", "<Second>", "<First>", "<Third>"]
+    assert exam._markdown_to_latex_list(rules[:2]) == ["<First>", "<Second>"]
+    assert batches == [["First", "Second", "Third"]]
+
+
+def test_markdown_to_latex_list_falls_back_per_item(monkeypatch) -> None:
+    monkeypatch.setattr(exam, "_convert_markdown_batch", lambda _texts: None)
+    monkeypatch.setattr(exam, "_convert_markdown", lambda text: text.upper())
+
+    assert exam._markdown_to_latex_list(["a", "b", None]) == ["A", "B", ""]
+    assert exam._markdown_to_latex_list("single") == ["SINGLE"]
+
+
+def test_batch_conversion_matches_single_conversion() -> None:
+    rules = [
+        "Write your **first name** legibly on each page.",
+        "Use `pen` and $x^2$.",
+        "- one\n- two",
+    ]
+    expected = [exam._convert_markdown(rule) for rule in rules]
+    assert exam._convert_markdown_batch(rules) == expected
+
+
+def test_batch_conversion_rejects_unsplittable_output() -> None:
+    assert exam._convert_markdown_batch(["```\nopen fence", "Next rule."]) is None
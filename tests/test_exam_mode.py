@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import dataclasses
+
+import pytest
+
 from texsmith_template_exam.exam import mode
 
 
@@ -90,3 +94,47 @@ def test_points_enabled_reads_source_config_file(tmp_path) -> None:
     source_dir.mkdir()
     (source_dir / "config.yml").write_text("exam:\n  points: false\n", encoding="utf-8")
     assert mode.points_enabled(_DummyContext(runtime={"source_dir": str(source_dir)})) is False
+
+
+def test_exam_settings_snapshot_is_reused_and_reports_layers(tmp_path) -> None:
+    doc = tmp_path / "doc.md"
+    doc.write_text("---\nexam:\n  compact: true\n---\n# Title\n", encoding="utf-8")
+    ctx = _DummyContext(
+        runtime={"template_overrides": {"solution": True}, "document_path": str(doc)},
+        config={"exam": {"points": False}},
+    )
+
+    settings = mode.exam_settings(ctx)
+    assert mode.exam_settings(ctx) is settings
+    assert (settings.solution, settings.compact, settings.points) == (True, True, False)
+
+    layers = {row["setting"]: row["layer"] for row in settings.describe()}
+    assert layers == {
+        "solution": "template_overrides",
+        "compact": "front_matter",
+        "points": "config",
+        "style": "default",
+        "fillin_scale": "default",
+        "profile": "default",
+        "question_cache": "default",
+        "paper": "default",
+        "fonts": "default",
+    }
+    assert "[front_matter]" in settings.dump()
+
+
+def test_exam_settings_is_frozen_and_rebuilt_once_per_render() -> None:
+    ctx = _DummyContext(runtime={"document_path": "/tmp/series/exam.md"})
+    settings = mode.exam_settings(ctx)
+    assert settings.solution is False
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.solution = True  # type: ignore[misc]
+
+    ctx.runtime["document_path"] = "/tmp/series/solution/exam.md"
+    assert mode.exam_settings(ctx) is settings
+    rebuilt = mode.attach_exam_settings(ctx)
+    assert mode.exam_settings(ctx) is rebuilt
+    assert rebuilt is not settings
+    assert rebuilt.solution is True
+    assert rebuilt.layers["solution"] == "document_path"
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from texsmith.adapters.latex.renderer import LaTeXRenderer
+from texsmith.core.context import DocumentState
+from texsmith.core.templates import load_template
+
+from texsmith_template_exam import exam_renderer
+from texsmith_template_exam.exam.points import POINTS_COMMENT, point_macros, point_totals
+from texsmith_template_exam.exam.questioncache import QUESTION_CACHE, QUESTION_CACHE_ENV
+from texsmith_template_exam.markdown import render_exam_markdown
+
+
+SOURCE = """## First { points=2 }
+
+Intro.
+
+### - { points=1.5 }
+
+### - { points=0.5 }
+
+#### - { points=1 }
+
+## Second { points=3 }
+
+## Notes
+
+Unscored.
+"""
+
+
+def _render(source: str, **overrides: object) -> str:
+    renderer = LaTeXRenderer(copy_assets=False, convert_assets=False)
+    exam_renderer.register(renderer)
+    return renderer.render(
+        render_exam_markdown(source),
+        runtime={"template_overrides": overrides, "document_path": "/tmp/exams/exam.md"},
+        state=DocumentState(),
+    )
+
+
+def test_totals_include_parts_and_subparts() -> None:
+    totals = point_totals([(1, "2"), (2, "1.5"), (2, "0.5"), (3, "1"), (1, "3"), (1, None)])
+
+    assert totals is not None
+    assert totals.questions == (Decimal("5"), Decimal("3"), Decimal("0"))
+    assert totals.parts == ((Decimal("1.5"), Decimal("1.5")), (), ())
+    assert totals.subparts == 1
+    assert totals.total == Decimal("8")
+
+
+def test_rendered_document_defines_totals() -> None:
+    macros = point_macros(_render(SOURCE))
+
+    assert macros.splitlines() == [
+        r"\gdef\exam@numpoints{8}",
+        r"\gdef\exam@numquestions{3}",
+        r"\gdef\exam@numparts{2}",
+        r"\gdef\exam@numsubparts{1}",
+        r"\gdef\exam@numsubsubparts{0}",
+        r"\gdef\pointsofq@i{5}",
+        r"\gdef\texsmith@pointsofpart@i@i{1.5}",
+        r"\gdef\texsmith@pointsofpart@i@ii{1.5}",
+        r"\gdef\pointsofq@ii{3}",
+        r"\gdef\pointsofq@iii{0}",
+    ]
+
+
+def test_points_disabled_or_not_numeric_leave_totals_to_aux() -> None:
+    assert POINTS_COMMENT not in _render(SOURCE, points=False)
+    assert point_macros(_render("## Q { points=2\\half }\n\nText.\n")) == ""
+    assert point_macros("") == ""
+
+
+def test_cached_questions_replay_their_points(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(QUESTION_CACHE_ENV, "1")
+    QUESTION_CACHE.clear()
+    try:
+        expected = point_macros(_render(SOURCE))
+        cached = _render(SOURCE)
+        hits = QUESTION_CACHE.hits
+    finally:
+        QUESTION_CACHE.clear()
+
+    assert hits == 3
+    assert point_macros(cached) == expected
+    assert cached.count(POINTS_COMMENT) == 1
+
+
+def test_template_preamble_defines_totals() -> None:
+    template = load_template("exam")
+    latex = _render(SOURCE)
+    rendered = template.environment.get_template(template.info.entrypoint).render(
+        template.prepare_context(latex)
+    )
+
+    assert r"\gdef\pointsofq@ii{3}" in rendered
+    assert rendered.index(r"\gdef\exam@numpoints{8}") < rendered.index(r"\begin{document}")
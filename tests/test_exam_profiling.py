@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+
+from bs4 import BeautifulSoup
+
+from texsmith_template_exam import exam_renderer
+from texsmith_template_exam.exam import profiling
+
+
+class _DummyContext:
+    def __init__(self, runtime: dict[str, object] | None = None) -> None:
+        self.runtime = runtime or {}
+        self.config = None
+
+
+def _unwrap_em(element, _context) -> None:
+    if element.name != "em":
+        return
+    element.unwrap()
+
+
+def test_profiled_handler_is_transparent_when_disabled(monkeypatch) -> None:
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    soup = BeautifulSoup("<p><em>x</em></p>", "html.parser")
+    context = _DummyContext()
+
+    wrapped = profiling.profiled(_unwrap_em)
+    wrapped(soup.em, context)
+
+    assert wrapped.__name__ == "_unwrap_em"
+    assert str(soup) == "<p>x</p>"
+    assert profiling.active_profiler(context) is None
+
+
+def test_profiler_counts_calls_and_tags(tmp_path, monkeypatch) -> None:
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    report_path = tmp_path / "report.json"
+    soup = BeautifulSoup("<p><em>x</em><b>y</b></p>", "html.parser")
+    context = _DummyContext({"profile": str(report_path)})
+
+    wrapped = profiling.profiled(_unwrap_em)
+    wrapped(soup.b, context)
+    wrapped(soup.em, context)
+    report = profiling.finish_profile(context)
+
+    stats = report["rules"]["_unwrap_em"]
+    assert stats["calls"] == 2
+    assert "early_returns" not in stats
+    assert stats["tags"] == {"b": 1, "em": 1}
+    assert json.loads(report_path.read_text(encoding="utf-8"))["rules"]["_unwrap_em"]["calls"] == 2
+
+
+def test_register_keeps_rule_names() -> None:
+    recorded: list[object] = []
+
+    class _Renderer:
+        def register(self, handler: object) -> None:
+            recorded.append(handler)
+
+    exam_renderer.register(_Renderer())
+
+    names = [getattr(handler, "__name__", "") for handler in recorded]
+    assert names[0] == "snapshot_exam_settings"
+    assert names[1:-1] == [handler.__name__ for handler in exam_renderer._HANDLERS]
+    assert all(hasattr(handler, "__render_rule__") for handler in recorded)
+    assert recorded[-1].__render_rule__.name == "exam_profile_report"
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from texsmith.adapters.latex.renderer import LaTeXRenderer
+from texsmith.core.context import DocumentState
+
+from texsmith_template_exam import exam_renderer
+from texsmith_template_exam.exam.questioncache import QUESTION_CACHE, QUESTION_CACHE_ENV
+from texsmith_template_exam.markdown import render_exam_markdown
+
+
+QUESTIONS = {
+    "mcq": """## Volcanoes { points=2 }
+
+Which volcanoes are in Italy?
+
+- [x] Etna
+- [ ] Fuji
+""",
+    "parts": """## Short { points=4 }
+
+### -
+
+Compute $1+1$: [2]{w=10}
+
+### Explain
+
+#### -
+
+Why? Ünïcødé text.
+
+!!! solution { lines=2 }
+
+    Because **reasons**.
+""",
+    "code": """## Code
+
+```python
+print("hi")
+```
+
+What does `print` do?
+""",
+    "notes": """## Appendix { heading=true }
+
+Some notes.
+
+### Sub
+
+More.
+""",
+    "answer": """## Answer { answer="42" }
+
+The answer to everything.
+""",
+}
+
+
+@pytest.fixture(autouse=True)
+def _clean_cache(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.delenv(QUESTION_CACHE_ENV, raising=False)
+    QUESTION_CACHE.clear()
+    yield
+    QUESTION_CACHE.clear()
+
+
+def _source(*names: str) -> str:
+    return "\n".join(QUESTIONS[name] for name in names)
+
+
+def _render(
+    monkeypatch: pytest.MonkeyPatch,
+    source: str,
+    *,
+    cache: bool = True,
+    solution: bool = False,
+) -> tuple[str, DocumentState]:
+    monkeypatch.setenv(QUESTION_CACHE_ENV, "1" if cache else "0")
+    renderer = LaTeXRenderer(copy_assets=False, convert_assets=False)
+    exam_renderer.register(renderer)
+    state = DocumentState()
+    latex = renderer.render(
+        render_exam_markdown(source),
+        runtime={
+            "template_overrides": {"solution": solution},
+            "document_path": "/tmp/exams/exam.md",
+        },
+        state=state,
+    )
+    return latex, state
+
+
+@pytest.mark.parametrize("solution", [False, True])
+def test_cached_questions_render_identically(
+    monkeypatch: pytest.MonkeyPatch, solution: bool
+) -> None:
+    source = _source(*QUESTIONS)
+    expected, expected_state = _render(monkeypatch, source, cache=False, solution=solution)
+
+    first, _ = _render(monkeypatch, source, solution=solution)
+    stores = QUESTION_CACHE.stores
+    second, state = _render(monkeypatch, source, solution=solution)
+
+    assert first == expected
+    assert second == expected
+    assert stores == len(QUESTIONS)
+    assert QUESTION_CACHE.hits == len(QUESTIONS)
+    assert state.headings == expected_state.headings
+    assert state.solutions == expected_state.solutions
+    assert state.pygments_styles == expected_state.pygments_styles
+    assert state.counters == expected_state.counters
+    assert state.fallback_summary == expected_state.fallback_summary
+    assert [e["slug"] for e in state.script_usage] == [
+        e["slug"] for e in expected_state.script_usage
+    ]
+
+
+def test_editing_one_question_rerenders_only_that_question(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _render(monkeypatch, _source("mcq", "parts", "answer"))
+    edited = _source("mcq", "parts", "answer").replace("1+1", "2+2")
+    QUESTION_CACHE.hits = QUESTION_CACHE.misses = 0
+
+    latex, _ = _render(monkeypatch, edited)
+
+    assert (QUESTION_CACHE.hits, QUESTION_CACHE.misses) == (2, 1)
+    assert latex == _render(monkeypatch, edited, cache=False)[0]
+
+
+def test_reordered_questions_close_open_parts(monkeypatch: pytest.MonkeyPatch) -> None:
+    _render(monkeypatch, _source("parts", "mcq", "notes", "code"))
+    source = _source("code", "parts", "notes", "mcq", "parts")
+
+    latex, _ = _render(monkeypatch, source)
+
+    assert QUESTION_CACHE.hits == 5
+    assert latex == _render(monkeypatch, source, cache=False)[0]
+
+
+def test_images_and_disabled_cache_are_never_stored(monkeypatch: pytest.MonkeyPatch) -> None:
+    _render(monkeypatch, _source("mcq"), cache=False)
+    _render(monkeypatch, "## Figure\n\n![Logo](logo.png)\n")
+
+    assert QUESTION_CACHE.stores == 0
+    assert len(QUESTION_CACHE) == 0
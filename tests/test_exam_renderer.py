@@ -3,6 +3,7 @@ from __future__ import annotations
 from bs4 import BeautifulSoup
 
 from texsmith_template_exam import exam_renderer as er
+from texsmith_template_exam.exam.utils import choice_flags, split_choice_marker, split_heading_attrs
 
 
 class _DummyConfig:
@@ -119,6 +120,24 @@ def test_replace_fillin_placeholders_drops_width_in_solution(monkeypatch) -> Non
     assert "[30mm]" not in soup.get_text()
 
 
+def test_replace_fillin_placeholders_skips_code_and_raw_subtrees(monkeypatch) -> None:
+    monkeypatch.setattr(er, "render_moving_text", lambda text, *_args, **_kwargs: text)
+    soup = BeautifulSoup(
+        "<div><p>A [1]{w=10} <em>B [2]{w=10}</em></p>"
+        "<pre><code>x = [3]{w=10}</code></pre>"
+        "<div class='latex-raw'><p>[4]{w=10}</p></div>"
+        "<p>[5]{w=10} and [6]{w=10}</p></div>",
+        "html.parser",
+    )
+    er._replace_fillin_placeholders(soup, _DummyContext())
+    rendered = soup.get_text()
+    for answer in ("1", "2", "5", "6"):
+        assert rf"\fillin[{answer}][10mm]" in rendered
+    assert "x = [3]{w=10}" in rendered
+    assert "[4]{w=10}" in rendered
+    assert rendered.index(r"\fillin[5]") < rendered.index(" and ") < rendered.index(r"\fillin[6]")
+
+
 def test_render_table_fillin_cells(monkeypatch) -> None:
     monkeypatch.setattr(er, "render_moving_text", lambda text, *_args, **_kwargs: text)
     soup = BeautifulSoup("<table><tr><td>[ok]{w=12}</td></tr></table>", "html.parser")
@@ -178,3 +197,17 @@ def test_register_registers_all_handlers() -> None:
     assert "close_open_parts" in registered
     assert "render_pending_answerline_paragraph" in registered
 
+
+
+def test_heading_attrs_and_choice_markers_are_shared_helpers() -> None:
+    assert split_heading_attrs("Title {points=2}") == ("Title", {"points": "2"})
+    assert split_heading_attrs("- {heading=true} Intro") == ("Intro", {"heading": "true"})
+    assert split_heading_attrs("Plain title ") == ("Plain title ", {})
+
+    assert split_choice_marker("[x] Paris") == (True, "Paris")
+    assert split_choice_marker("[ ] Rome") == (False, "Rome")
+    assert split_choice_marker("Berlin") is None
+
+    assert choice_flags([(True, False), (None, False)]) == (True, False)
+    assert choice_flags([(None, False), (None, False)]) is None
+    assert choice_flags([(True, False), (False, True)]) is None
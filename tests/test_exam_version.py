@@ -1,15 +1,61 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
+import shutil
+import subprocess
 import warnings
 
-from texsmith_template_exam.exam import version as exam_version
+import pytest
+
+from texsmith_template_exam.exam import gitrepo, version as exam_version
+
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
 
 
 def _reset_git_cache() -> None:
     exam_version.reset_git_cache()
 
 
+def _git(repo: Path, *args: str) -> str:
+    result = subprocess.run(
+        [
+            "git",
+            "-C",
+            str(repo),
+            "-c",
+            "user.name=Exam",
+            "-c",
+            "user.email=exam@example.com",
+            *args,
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip()
+
+
+def _commit(repo: Path, name: str, content: str) -> None:
+    (repo / name).write_text(content, encoding="utf-8")
+    _git(repo, "add", name)
+    _git(repo, "commit", "-q", "-m", f"update {name}")
+
+
+def _git_describe(repo: Path) -> str:
+    return _git(repo, "describe", "--tags", "--dirty")
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    root = tmp_path / "repo"
+    root.mkdir()
+    _git(root, "init", "-q")
+    _commit(root, "exam.md", "# Q1\n")
+    return root
+
+
 def test_exam_version_passes_through_string() -> None:
     _reset_git_cache()
     assert exam_version.format_exam_version("v1.2.1") == "v1.2.1"
@@ -23,44 +69,101 @@ def test_exam_version_empty_is_blank() -> None:
     assert exam_version.format_exam_version("   ") == ""
 
 
-def test_exam_version_git_uses_describe(monkeypatch) -> None:
+def test_exam_version_git_warns_without_repo(tmp_path: Path) -> None:
     _reset_git_cache()
+    with warnings.catch_warnings(record=True) as records:
+        warnings.simplefilter("always")
+        assert exam_version.format_exam_version("git", tmp_path / "exam.md") == ""
+        assert any(
+            "version=git requested but no git repository was found" in str(w.message)
+            for w in records
+        )
 
-    def _fake_root() -> Path:
-        return Path("/tmp/repo")
-
-    def _fake_run(_root: Path, args: list[str]) -> str:
-        if args[:2] == ["describe", "--tags"]:
-            return "v2.0.0"
-        return ""
 
-    monkeypatch.setattr(exam_version, "resolve_git_root", _fake_root)
-    monkeypatch.setattr(exam_version, "run_git", _fake_run)
-    assert exam_version.format_exam_version("git") == "v2.0.0"
+@requires_git
+def test_exam_version_git_falls_back_to_commit(repo: Path) -> None:
+    _reset_git_cache()
+    head = _git(repo, "rev-parse", "HEAD")
+    assert exam_version.format_exam_version("git", repo / "exam.md") == head[:6]
 
 
-def test_exam_version_git_falls_back_to_commit(monkeypatch) -> None:
+@requires_git
+def test_exam_version_git_matches_describe(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     _reset_git_cache()
+    monkeypatch.setattr(exam_version, "DIRTY_CHECK_SECONDS", 0.0)
+    _git(repo, "tag", "v1.0")
+    assert exam_version.get_git_version(repo / "exam.md") == _git_describe(repo) == "v1.0"
+
+    _commit(repo, "exam.md", "# Q1\n# Q2\n")
+    _git(repo, "tag", "-a", "v1.1", "-m", "release")
+    _commit(repo, "exam.md", "# Q1\n# Q2\n# Q3\n")
+    _commit(repo, "other.md", "text\n")
+    assert exam_version.get_git_version(repo) == _git_describe(repo)
+
+    (repo / "exam.md").write_text("changed\n", encoding="utf-8")
+    assert exam_version.get_git_version(repo) == _git_describe(repo)
+    assert exam_version.get_git_version(repo).endswith("-dirty")
+
+
+@requires_git
+def test_reader_handles_packed_objects_and_refs(repo: Path) -> None:
+    _git(repo, "tag", "-a", "v2.0", "-m", "release")
+    for index in range(5):
+        _commit(repo, "exam.md", "# Q1\n" + "line\n" * (index + 20))
+    _git(repo, "checkout", "-q", "-b", "topic", "HEAD~2")
+    _commit(repo, "topic.md", "topic\n")
+    _git(repo, "checkout", "-q", "-")
+    _git(repo, "merge", "-q", "--no-edit", "topic")
+    _git(repo, "gc", "-q", "--aggressive")
+
+    assert not list((repo / ".git" / "refs" / "tags").iterdir())
+    repository = gitrepo.Repository.discover(repo / "exam.md")
+    assert repository is not None
+    assert repository.describe() == _git_describe(repo)
+    assert not repository.is_dirty()
+
+
+@requires_git
+def test_git_version_is_cached_per_repository(repo: Path, tmp_path: Path) -> None:
+    _reset_git_cache()
+    other = tmp_path / "other"
+    other.mkdir()
+    _git(other, "init", "-q")
+    _commit(other, "exam.md", "# Other\n")
+    _git(other, "tag", "other-1")
+    _git(repo, "tag", "main-1")
 
-    def _fake_root() -> Path:
-        return Path("/tmp/repo")
-
-    def _fake_run(_root: Path, args: list[str]) -> str:
-        if args[:2] == ["describe", "--tags"]:
-            return ""
-        if args[:1] == ["rev-parse"]:
-            return "abc123"
-        return ""
+    assert exam_version.get_git_version(repo) == "main-1"
+    assert exam_version.get_git_version(other) == "other-1"
 
-    monkeypatch.setattr(exam_version, "resolve_git_root", _fake_root)
-    monkeypatch.setattr(exam_version, "run_git", _fake_run)
-    assert exam_version.format_exam_version("git") == "abc123"
+    _commit(repo, "exam.md", "# Q1 updated\n")
+    assert exam_version.get_git_version(repo) == _git_describe(repo)
+    assert exam_version.get_git_version(repo).startswith("main-1-1-g")
 
 
-def test_exam_version_git_warns_without_repo(monkeypatch) -> None:
+@requires_git
+def test_dirty_flag_compares_contents_and_follows_the_worktree(
+    repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
     _reset_git_cache()
-    monkeypatch.setattr(exam_version, "resolve_git_root", lambda: None)
-    with warnings.catch_warnings(record=True) as records:
-        warnings.simplefilter("always")
-        assert exam_version.format_exam_version("git") == ""
-        assert any("version=git requested but no git repository was found" in str(w.message) for w in records)
+    _git(repo, "tag", "v1.0")
+    (repo / "link").symlink_to("exam.md")
+    _git(repo, "add", "link")
+    _git(repo, "commit", "-q", "-m", "add link")
+    _git(repo, "tag", "v1.1")
+    assert exam_version.get_git_version(repo) == "v1.1"
+
+    exam = repo / "exam.md"
+    info = exam.stat()
+    os.utime(exam, ns=(info.st_atime_ns, info.st_mtime_ns + 5_000_000_000))
+    (repo / "link").unlink()
+    (repo / "link").symlink_to("exam.md")
+    assert not gitrepo.Repository.discover(repo).is_dirty()
+
+    exam.write_text("# Q9\n", encoding="utf-8")
+    monkeypatch.setattr(exam_version, "DIRTY_CHECK_SECONDS", 3600.0)
+    assert exam_version.get_git_version(repo) == "v1.1"
+    monkeypatch.setattr(exam_version, "DIRTY_CHECK_SECONDS", 0.0)
+    assert exam_version.get_git_version(repo) == "v1.1-dirty"
+    exam.write_text("# Q1\n", encoding="utf-8")
+    assert exam_version.get_git_version(repo) == "v1.1"
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import stat
+from types import SimpleNamespace
+
+import pytest
+
+from texsmith_template_exam.formats import ENDOFDUMP, FormatCache, format_key, split_for_dump
+
+
+DOCUMENT = """\
+\\documentclass[addpoints]{exam}
+\\usepackage{xcolor}
+\\usepackage{ts-fonts}
+\\usepackage[defaults=exam]{columen}
+\\usepackage{heiglogo}
+\\usepackage{tcolorbox}
+\\begin{document}
+Hello
+\\end{document}
+"""
+
+# Stands in for ``lualatex -ini``: writes the requested format (unless the
+# preamble asks it to fail) and logs every invocation.
+FAKE_ENGINE = """\
+#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.log"
+for arg in "$@"; do
+  case "$arg" in
+    -jobname=*) job="${arg#-jobname=}" ;;
+    -output-directory=*) out="${arg#-output-directory=}" ;;
+  esac
+done
+if grep -q FAILDUMP *.tex; then exit 1; fi
+echo fmt > "$out/$job.fmt"
+"""
+
+
+class _RecordingService:
+    def __init__(self, returncodes: list[int]) -> None:
+        self.returncodes = returncodes
+        self.calls: list[dict[str, object]] = []
+
+    def build_pdf(self, render_result, *, engine=None, env=None):
+        rc = render_result.main_tex_path.parent / ".latexmkrc"
+        self.calls.append(
+            {
+                "engine": engine,
+                "env": env,
+                "latexmkrc": rc.read_text(),
+                "tex": render_result.main_tex_path.read_text(),
+            }
+        )
+        return SimpleNamespace(returncode=self.returncodes.pop(0))
+
+
+@pytest.fixture
+def fake_engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine = bin_dir / "lualatex"
+    engine.write_text(FAKE_ENGINE, encoding="utf-8")
+    engine.chmod(engine.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir / "calls.log"
+
+
+def _render_dir(root: Path, name: str, text: str = DOCUMENT) -> SimpleNamespace:
+    workdir = root / name
+    workdir.mkdir()
+    (workdir / "columen.sty").write_text("% columen\n", encoding="utf-8")
+    (workdir / ".latexmkrc").write_text(
+        "$pdf_mode = 4;\n$lualatex = 'lualatex %O %S';\n", encoding="utf-8"
+    )
+    main_tex = workdir / "exam.tex"
+    main_tex.write_text(text, encoding="utf-8")
+    return SimpleNamespace(main_tex_path=main_tex, template_engine="lualatex")
+
+
+def test_split_moves_font_packages_after_endofdump() -> None:
+    split = split_for_dump(DOCUMENT)
+
+    assert split is not None
+    assert "ts-fonts" not in split.preamble
+    assert "heiglogo" not in split.preamble
+    assert "columen" in split.preamble and "tcolorbox" in split.preamble
+    live = split.text.split(ENDOFDUMP, 1)[1]
+    assert live.startswith("\n\\usepackage{ts-fonts}\n\\usepackage{heiglogo}\n\\begin{document}")
+    assert split_for_dump(split.text) == split
+    assert split_for_dump("\\documentclass{exam}\n") is None
+
+
+def test_format_key_tracks_preamble_engine_and_local_packages(tmp_path: Path) -> None:
+    (tmp_path / "columen.sty").write_text("% v1\n", encoding="utf-8")
+    key = format_key("preamble", "lualatex", tmp_path)
+
+    assert key == format_key("preamble", "lualatex", tmp_path)
+    assert key != format_key("preamble 2", "lualatex", tmp_path)
+    assert key != format_key("preamble", "xelatex", tmp_path)
+    (tmp_path / "columen.sty").write_text("% v2\n", encoding="utf-8")
+    assert key != format_key("preamble", "lualatex", tmp_path)
+
+
+def test_identical_preambles_share_one_format(tmp_path: Path, fake_engine: Path) -> None:
+    cache = FormatCache(tmp_path / "formats")
+    service = _RecordingService([0, 0])
+
+    for name in ("exam", "variant"):
+        assert cache.build_pdf(service, _render_dir(tmp_path, name)).returncode == 0
+
+    assert fake_engine.read_text().count("-ini") == 1
+    assert (cache.hits, cache.misses, cache.fallbacks) == (1, 1, 0)
+    formats = list((tmp_path / "formats").glob("*.fmt"))
+    assert len(formats) == 1
+    name = formats[0].stem
+    for call in service.calls:
+        assert call["engine"] == f"lualatex -fmt={name}"
+        assert f"$lualatex = 'lualatex -fmt={name} %O %S';" in call["latexmkrc"]
+        assert str(tmp_path / "formats") in call["env"]["TEXFORMATS"]
+    latexmkrc = tmp_path / "exam" / ".latexmkrc"
+    assert "-fmt" not in latexmkrc.read_text()
+    assert ENDOFDUMP in (tmp_path / "exam" / "exam.tex").read_text()
+
+
+def test_failed_dump_falls_back_and_is_not_retried(tmp_path: Path, fake_engine: Path) -> None:
+    cache = FormatCache(tmp_path / "formats")
+    service = _RecordingService([0, 0])
+    broken = DOCUMENT.replace("\\usepackage{xcolor}", "% FAILDUMP")
+
+    cache.build_pdf(service, _render_dir(tmp_path, "a", broken))
+    cache.build_pdf(service, _render_dir(tmp_path, "b", broken))
+
+    assert fake_engine.read_text().count("-ini") == 1
+    assert cache.fallbacks == 2
+    assert [call["engine"] for call in service.calls] == [None, None]
+    assert [call["tex"] for call in service.calls] == [broken, broken]
+
+
+def test_known_broken_format_leaves_the_document_untouched(
+    tmp_path: Path, fake_engine: Path
+) -> None:
+    cache = FormatCache(tmp_path / "formats")
+    broken = DOCUMENT.replace("\\usepackage{xcolor}", "% FAILDUMP")
+    cache.ensure(_render_dir(tmp_path, "a", broken).main_tex_path, "lualatex")
+    main_tex = _render_dir(tmp_path, "b", broken).main_tex_path
+
+    assert cache.ensure(main_tex, "lualatex") is None
+    assert main_tex.read_text() == broken
+
+
+def test_failed_compile_discards_the_format(tmp_path: Path, fake_engine: Path) -> None:
+    cache = FormatCache(tmp_path / "formats")
+    service = _RecordingService([1, 0])
+
+    result = cache.build_pdf(service, _render_dir(tmp_path, "exam"))
+
+    assert result.returncode == 0
+    assert service.calls[0]["engine"].startswith("lualatex -fmt=")
+    assert service.calls[1]["engine"] is None
+    assert ENDOFDUMP in service.calls[0]["tex"]
+    assert service.calls[1]["tex"] == DOCUMENT
+    assert not list((tmp_path / "formats").glob("*.fmt"))
+    assert list((tmp_path / "formats").glob("*.failed"))
+
+
+def test_unsupported_engine_compiles_normally(tmp_path: Path) -> None:
+    cache = FormatCache(tmp_path / "formats")
+    service = _RecordingService([0])
+    render_result = _render_dir(tmp_path, "exam")
+
+    cache.build_pdf(service, render_result, engine="tectonic")
+
+    assert service.calls[0]["engine"] == "tectonic"
+    assert render_result.main_tex_path.read_text() == DOCUMENT
+
+
+def test_split_moves_guarded_logo_package_after_endofdump() -> None:
+    guarded = "\\IfFileExists{texsmith-logo-0123.pdf}{}{\\usepackage{heiglogo}}\n"
+    split = split_for_dump(DOCUMENT.replace("\\usepackage{heiglogo}\n", guarded))
+
+    assert split is not None
+    assert "heiglogo" not in split.preamble
+    assert guarded in split.text.split(ENDOFDUMP, 1)[1]
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import texsmith_template_exam
+
+
+# Microseconds our own modules may add to a cold start, measured with
+# ``-X importtime``. Loading texsmith itself (well over a second) is excluded:
+# the renderer entry point is timed after ``import texsmith``.
+TEMPLATE_BUDGET_US = 50_000
+RENDERER_BUDGET_US = 150_000
+CLI_BUDGET_US = 100_000
+
+_PACKAGE = "texsmith_template_exam"
+
+
+def _importtime(code: str) -> tuple[int, set[str]]:
+    """Return our top-level import time in µs and the modules loaded by ``code``."""
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(Path(texsmith_template_exam.__file__).parents[1]), env.get("PYTHONPATH", "")]
+    )
+    script = f"{code}\nimport sys\nprint('\\n'.join(sys.modules))"
+    best = None
+    for _ in range(3):  # The first run writes the bytecode caches.
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            check=True,
+            env=env,
+            text=True,
+        )
+        total = 0
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            # Nested imports are indented; only count the top-level entries.
+            if name.startswith(f" {_PACKAGE}") and cumulative.strip().isdigit():
+                total += int(cumulative)
+        best = total if best is None else min(best, total)
+    return best, set(completed.stdout.split())
+
+
+def test_template_entry_point_does_not_load_texsmith() -> None:
+    elapsed, modules = _importtime(f"import {_PACKAGE}; {_PACKAGE}.template()")
+
+    assert "texsmith" not in modules
+    assert elapsed < TEMPLATE_BUDGET_US
+
+
+def test_renderer_entry_point_stays_within_budget() -> None:
+    elapsed, modules = _importtime(f"import texsmith\nimport {_PACKAGE}.exam_renderer")
+
+    assert f"{_PACKAGE}.exam.gitrepo" not in modules
+    assert elapsed < RENDERER_BUDGET_US, f"renderer import took {elapsed / 1000:.1f} ms"
+
+
+def test_cli_parser_does_not_load_texsmith() -> None:
+    elapsed, modules = _importtime(
+        f"from {_PACKAGE}.cli import build_parser\n"
+        "build_parser().parse_args(['variants', 'exam.md'])"
+    )
+
+    assert not {name for name in modules if name.split(".")[0] in {"texsmith", "bs4"}}
+    assert elapsed < CLI_BUDGET_US, f"CLI import took {elapsed / 1000:.1f} ms"
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import stat
+import time
+
+import pytest
+
+from texsmith_template_exam.logocache import LogoCache, logo_file_name
+
+
+# Stands in for ``lualatex``: turns logo.tex into logo.pdf (unless the package
+# asks it to fail) and logs every invocation.
+FAKE_ENGINE = """\
+#!/bin/sh
+echo "$@" >> "$(dirname "$0")/calls.log"
+if grep -q FAILLOGO heiglogo.sty; then exit 1; fi
+cat heiglogo.sty logo.tex > logo.pdf
+"""
+
+
+@pytest.fixture
+def fake_engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine = bin_dir / "lualatex"
+    engine.write_text(FAKE_ENGINE, encoding="utf-8")
+    engine.chmod(engine.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir / "calls.log"
+
+
+def _document(workdir: Path, source: str = "builtin:heig-vd", height: str = "1.8cm") -> Path:
+    workdir.mkdir(exist_ok=True)
+    name = logo_file_name(source, height)
+    main_tex = workdir / "exam.tex"
+    main_tex.write_text(
+        f"\\ExamLogoCached{{{name}}}{{{source}}}{{{height}}}%\n  {{}}{{}}\n", encoding="utf-8"
+    )
+    return main_tex
+
+
+def test_logo_names_depend_on_source_and_height() -> None:
+    name = logo_file_name("builtin:heig-vd", "1.8cm")
+
+    assert name.startswith("texsmith-logo-") and name.endswith(".pdf")
+    assert logo_file_name("builtin:heig-vd", "1.8cm") == name
+    assert logo_file_name("builtin:heig-vd", "1.45cm") != name
+    assert logo_file_name("file:heig-vd", "1.8cm") != name
+
+
+def test_builtin_logo_is_built_once_and_rebuilt_when_the_package_changes(
+    tmp_path: Path, fake_engine: Path
+) -> None:
+    cache = LogoCache(tmp_path / "logos")
+    first = _document(tmp_path / "a")
+    (first.parent / "heiglogo.sty").write_text("% v1\n", encoding="utf-8")
+
+    [placed] = cache.place(first)
+    assert "\\logo[relative,height=1.8cm]" in placed.read_text(encoding="utf-8")
+    second = _document(tmp_path / "b")
+    (second.parent / "heiglogo.sty").write_text("% v1\n", encoding="utf-8")
+    assert cache.place(second)[0].read_bytes() == placed.read_bytes()
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(fake_engine.read_text().splitlines()) == 1
+
+    (second.parent / "heiglogo.sty").write_text("% v2\n", encoding="utf-8")
+    assert "% v2" in cache.place(second)[0].read_text(encoding="utf-8")
+    assert cache.misses == 2
+
+
+def test_logos_that_cannot_be_built_are_drawn_live(tmp_path: Path, fake_engine: Path) -> None:
+    cache = LogoCache(tmp_path / "logos")
+    main_tex = _document(tmp_path / "exam")
+    (main_tex.parent / "heiglogo.sty").write_text("% FAILLOGO\n", encoding="utf-8")
+    stale = main_tex.parent / logo_file_name("builtin:heig-vd", "1.8cm")
+    stale.write_text("stale", encoding="utf-8")
+
+    assert cache.place(main_tex) == []
+    assert not stale.exists()
+    assert cache.place(main_tex) == []
+    assert len(fake_engine.read_text().splitlines()) == 1
+
+    png = _document(tmp_path / "png", source="file:crest.png")
+    (png.parent / "crest.png").write_bytes(b"png")
+    assert cache.place(png) == []
+
+
+def test_failed_logos_are_retried_after_a_while_or_with_another_engine(
+    tmp_path: Path, fake_engine: Path
+) -> None:
+    cache = LogoCache(tmp_path / "logos")
+    main_tex = _document(tmp_path / "exam")
+    (main_tex.parent / "heiglogo.sty").write_text("% FAILLOGO\n", encoding="utf-8")
+    assert cache.place(main_tex) == []
+    [marker] = (tmp_path / "logos").glob("*.failed")
+
+    old = time.time() - cache.retry_after - 1
+    os.utime(marker, (old, old))
+    assert cache.place(main_tex) == []
+    assert len(fake_engine.read_text().splitlines()) == 2
+
+    engine = fake_engine.parent / "lualatex"
+    engine.write_text(FAKE_ENGINE.replace("FAILLOGO", "NEVERFAILS"), encoding="utf-8")
+    assert len(cache.place(main_tex)) == 1
+    assert len(fake_engine.read_text().splitlines()) == 3
+
+
+def test_unusable_cache_directory_falls_back_to_live_drawing(
+    tmp_path: Path, fake_engine: Path
+) -> None:
+    blocked = tmp_path / "logos"
+    blocked.write_text("not a directory", encoding="utf-8")
+    main_tex = _document(tmp_path / "exam")
+    stale = main_tex.parent / logo_file_name("builtin:heig-vd", "1.8cm")
+    stale.write_text("stale", encoding="utf-8")
+
+    assert LogoCache(blocked).place(main_tex) == []
+    assert not stale.exists()
@@ -1,4 +1,11 @@
-from texsmith_template_exam.markdown import SOLUTION_EXTENSION, exam_markdown_extensions
+from texsmith.adapters.markdown import render_markdown
+
+from texsmith_template_exam.markdown import (
+    SOLUTION_EXTENSION,
+    MarkdownEnginePool,
+    exam_markdown_extensions,
+    render_exam_markdown,
+)
 
 
 def test_exam_markdown_extensions_includes_solution_extension() -> None:
@@ -12,3 +19,27 @@ def test_exam_markdown_extensions_is_idempotent() -> None:
 
     assert first == second
     assert first.count(SOLUTION_EXTENSION) == 1
+
+
+def test_exam_markdown_extensions_returns_a_fresh_list() -> None:
+    first = exam_markdown_extensions()
+    first.append("extra")
+    assert "extra" not in exam_markdown_extensions()
+
+
+def test_render_exam_markdown_matches_render_markdown() -> None:
+    source = "Some **bold** text.\n\n- [x] yes\n- [ ] no\n"
+    expected = render_markdown(source, exam_markdown_extensions()).html
+    assert render_exam_markdown(source) == expected
+
+
+def test_markdown_engine_pool_reuses_engines() -> None:
+    pool = MarkdownEnginePool(maxsize=1)
+    extensions = ("abbr",)
+
+    with pool.acquire(extensions) as first, pool.acquire(extensions) as nested:
+        assert nested is not first
+    with pool.acquire(extensions) as again:
+        assert again in {first, nested}
+
+    assert pool.created == 2
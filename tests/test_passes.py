@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import stat
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from texsmith_template_exam.passes import PassPlanner, referenced_labels, rerun_requests
+
+
+# Stands in for ``lualatex``: pass N writes the ``.aux``, extra files and log
+# of step N of ``plan.json`` (the last step repeats) and counts its calls.
+FAKE_ENGINE = f"""\
+#!{sys.executable}
+import json, pathlib, sys
+work = pathlib.Path.cwd()
+calls = work / "calls"
+count = int(calls.read_text()) + 1 if calls.exists() else 1
+calls.write_text(str(count))
+plan = json.loads((work / "plan.json").read_text())
+step = plan[min(count, len(plan)) - 1]
+(work / "exam.aux").write_text(step["aux"])
+for name, text in step.get("files", {{}}).items():
+    (work / name).write_text(text)
+(work / "exam.log").write_text(step.get("log", ""))
+(work / "exam.pdf").write_text("pdf")
+sys.exit(step.get("rc", 0))
+"""
+
+AUX = "\\relax\n\\newlabel{q1}{{1}{1}}\n\\newlabel{LastPage}{{}{2}}\n\\gdef \\@abspage@last{2}\n"
+LABEL_WARNING = "LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.\n"
+
+
+class _RecordingService:
+    def __init__(self) -> None:
+        self.calls: list[str | None] = []
+
+    def build_pdf(self, render_result, *, engine=None, env=None):
+        self.calls.append(engine)
+        return SimpleNamespace(returncode=0)
+
+
+@pytest.fixture(autouse=True)
+def fake_engine(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    engine = bin_dir / "lualatex"
+    engine.write_text(FAKE_ENGINE, encoding="utf-8")
+    engine.chmod(engine.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def _render_dir(
+    root: Path, plan: list[dict[str, object]], *, aux: str | None = None, name: str = "build"
+) -> SimpleNamespace:
+    workdir = root / name
+    workdir.mkdir()
+    main_tex = workdir / "exam.tex"
+    main_tex.write_text("Page \\thepage\\ of \\pageref{LastPage}\n", encoding="utf-8")
+    (workdir / "plan.json").write_text(json.dumps(plan), encoding="utf-8")
+    if aux is not None:
+        (workdir / "exam.aux").write_text(aux, encoding="utf-8")
+    return SimpleNamespace(
+        main_tex_path=main_tex,
+        template_engine="lualatex",
+        requires_shell_escape=False,
+        has_bibliography=False,
+        document_state=None,
+        fragment_paths=[],
+    )
+
+
+def _calls(render_result: SimpleNamespace) -> int:
+    return int((render_result.main_tex_path.parent / "calls").read_text())
+
+
+def test_cold_build_stops_once_auxiliary_files_are_stable(tmp_path: Path) -> None:
+    planner = PassPlanner()
+    render_result = _render_dir(tmp_path, [{"aux": AUX, "log": LABEL_WARNING}, {"aux": AUX}])
+
+    result = planner.build_pdf(_RecordingService(), render_result)
+
+    assert result.returncode == 0
+    assert result.pdf_path == render_result.main_tex_path.with_suffix(".pdf")
+    assert _calls(render_result) == 2
+    report = planner.report_for(render_result.main_tex_path)
+    assert report is not None
+    assert (report.passes, report.reasons, report.converged) == (
+        2,
+        ("auxiliary data changed",),
+        True,
+    )
+    assert planner.stats() == {
+        "documents": 1,
+        "passes": 2,
+        "extra_passes": 1,
+        "unconverged": 0,
+        "delegated": 0,
+    }
+
+
+def test_unreferenced_labels_and_stale_warnings_do_not_rerun(tmp_path: Path) -> None:
+    moved = AUX.replace("\\newlabel{q1}{{1}{1}}", "\\newlabel{q1}{{1}{2}}")
+    log = LABEL_WARNING + "LaTeX Warning: There were undefined references.\n"
+    render_result = _render_dir(tmp_path, [{"aux": moved, "log": log}], aux=AUX)
+
+    PassPlanner().build_pdf(_RecordingService(), render_result)
+
+    assert _calls(render_result) == 1
+
+
+def test_referenced_labels_and_other_files_rerun(tmp_path: Path) -> None:
+    planner = PassPlanner()
+    moved = AUX.replace("{{}{2}}", "{{}{3}}")
+    first = _render_dir(tmp_path, [{"aux": moved}, {"aux": moved}], aux=AUX)
+
+    planner.build_pdf(_RecordingService(), first)
+
+    assert planner.report_for(first.main_tex_path).reasons == ("reference 'LastPage' changed",)
+    plan = [{"aux": AUX, "files": {"exam.toc": "1"}}, {"aux": AUX}]
+    second = _render_dir(tmp_path, plan, aux=AUX, name="toc")
+    planner.build_pdf(_RecordingService(), second)
+    assert planner.report_for(second.main_tex_path).reasons == ("exam.toc changed",)
+
+
+def test_package_rerun_requests_are_honoured(tmp_path: Path) -> None:
+    moved = AUX.replace("\\newlabel{q1}{{1}{1}}", "\\newlabel{q1}{{1}{2}}")
+    log = "Package columen Warning: List columns expanded; rerun LaTeX.\n"
+    planner = PassPlanner()
+    render_result = _render_dir(tmp_path, [{"aux": moved, "log": log}, {"aux": moved}], aux=AUX)
+
+    planner.build_pdf(_RecordingService(), render_result)
+
+    assert planner.report_for(render_result.main_tex_path).reasons == (
+        "columen: List columns expanded; rerun LaTeX",
+    )
+
+
+def test_unstable_documents_stop_at_the_limit(tmp_path: Path) -> None:
+    plan = [{"aux": f"\\gdef \\@abspage@last{{{page}}}\n"} for page in range(1, 10)]
+    planner = PassPlanner(max_passes=3)
+    render_result = _render_dir(tmp_path, plan)
+
+    planner.build_pdf(_RecordingService(), render_result)
+
+    report = planner.report_for(render_result.main_tex_path)
+    assert _calls(render_result) == 3
+    assert not report.converged
+    assert report.describe().endswith("auxiliary files still changing")
+    assert planner.stats()["unconverged"] == 1
+
+
+def test_failed_pass_returns_its_exit_code(tmp_path: Path) -> None:
+    planner = PassPlanner()
+    render_result = _render_dir(tmp_path, [{"aux": AUX, "rc": 1}])
+
+    result = planner.build_pdf(_RecordingService(), render_result)
+
+    assert result.returncode == 1
+    assert _calls(render_result) == 1
+    assert planner.report_for(render_result.main_tex_path) is None
+
+
+def test_builds_needing_more_than_latex_are_delegated(tmp_path: Path) -> None:
+    planner = PassPlanner()
+    service = _RecordingService()
+    render_result = _render_dir(tmp_path, [{"aux": AUX}])
+
+    planner.build_pdf(service, render_result, engine="tectonic")
+    render_result.has_bibliography = True
+    planner.build_pdf(service, render_result)
+
+    assert service.calls == ["tectonic", None]
+    assert planner.stats()["delegated"] == 2
+    assert not (render_result.main_tex_path.parent / "calls").exists()
+
+
+def test_rerun_requests_skip_covered_and_unwrap_long_lines() -> None:
+    wrapped = "Package rerunfilecheck Warning: File `exam.out' has changed.\n" + (
+        "Package hyperref Warning: Rerun to get /PageLabels entry" + " " * (79 - 56) + "\nright.\n"
+    )
+
+    assert rerun_requests(LABEL_WARNING + wrapped) == [
+        "hyperref: Rerun to get /PageLabels entry right"
+    ]
+
+
+def test_referenced_labels() -> None:
+    text = "\\pageref{LastPage} \\cref{a,b} \\hyperref[c]{C} \\label{d}"
+
+    assert referenced_labels([text]) == {"LastPage", "a", "b", "c"}
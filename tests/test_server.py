@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import base64
+from collections.abc import Iterator
+import http.client
+import inspect
+import json
+from pathlib import Path
+import socket
+import threading
+
+import pytest
+from texsmith.core.conversion.service import ConversionService
+
+from texsmith_template_exam import batch
+from texsmith_template_exam.server import (
+    RenderJob,
+    RenderOutput,
+    RenderServer,
+    ResidentConversionService,
+    ServerBusyError,
+    make_server,
+)
+
+
+class _StubServer(RenderServer):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.release = threading.Event()
+        self.release.set()
+        self.started_render = threading.Event()
+
+    def _render(self, job: RenderJob, start: float) -> RenderOutput:
+        self.started_render.set()
+        self.release.wait(5)
+        if job.documents[0][1] == "fail":
+            raise ValueError("broken exam")
+        pdf = b"%PDF stub" if job.output != "tex" else None
+        return RenderOutput(tex=f"% {job.documents[0][0]}\n", pdf=pdf, elapsed=0.0)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: Path) -> None:
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(self.socket_path))
+
+
+@pytest.fixture
+def served() -> Iterator[tuple[_StubServer, int]]:
+    app = _StubServer(max_concurrent=1, queue_timeout=0.05)
+    server = make_server(app, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield app, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _request(port: int, method: str, path: str, payload: object = None) -> tuple[int, str, bytes]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    body = None if payload is None else json.dumps(payload)
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    result = response.status, response.getheader("Content-Type"), response.read()
+    connection.close()
+    return result
+
+
+def test_render_job_validates_payloads() -> None:
+    job = RenderJob.from_payload({"markdown": "# Q", "attributes": {"solution": True}})
+    assert job.documents == (("exam.md", "# Q"),)
+    assert job.attributes == {"solution": True}
+
+    documents = RenderJob.from_payload(
+        {"documents": [{"name": "1", "markdown": "a"}, {"markdown": "b"}], "output": "pdf"}
+    )
+    assert [name for name, _ in documents.documents] == ["1.md", "document-2.md"]
+
+    for payload, error, message in (
+        ([], TypeError, "JSON object"),
+        ({}, ValueError, "'markdown' or 'documents'"),
+        ({"documents": [{"name": "../x.md", "markdown": ""}]}, ValueError, "Invalid document name"),
+        ({"markdown": "", "output": "dvi"}, ValueError, "'output'"),
+        ({"markdown": "", "config": {"title": "x"}}, TypeError, "YAML string"),
+    ):
+        with pytest.raises(error, match=message):
+            RenderJob.from_payload(payload)
+
+
+def test_requests_beyond_the_limit_are_rejected() -> None:
+    app = _StubServer(max_concurrent=1, queue_timeout=0.05)
+    app.release.clear()
+    job = RenderJob.from_payload({"markdown": "# Q"})
+    worker = threading.Thread(target=app.render, args=(job,))
+    worker.start()
+    assert app.started_render.wait(5)
+
+    with pytest.raises(ServerBusyError):
+        app.render(job)
+    assert app.health()["active"] == 1
+
+    app.release.set()
+    worker.join()
+    metrics = app.metrics()
+    assert (metrics["requests"], metrics["rejected"], metrics["active"]) == (1, 1, 0)
+
+
+def test_http_api(served: tuple[_StubServer, int]) -> None:
+    _app, port = served
+
+    status, content_type, body = _request(port, "POST", "/render", {"markdown": "# Q"})
+    assert (status, content_type) == (200, "application/json")
+    assert json.loads(body)["tex"] == "% exam.md\n"
+
+    status, _, body = _request(port, "POST", "/render", {"markdown": "# Q", "output": "both"})
+    assert base64.b64decode(json.loads(body)["pdf"]) == b"%PDF stub"
+    status, content_type, body = _request(
+        port, "POST", "/render", {"markdown": "# Q", "output": "pdf"}
+    )
+    assert (status, content_type, body) == (200, "application/pdf", b"%PDF stub")
+
+    assert _request(port, "POST", "/render", {"markdown": 1})[0] == 400
+    assert _request(port, "POST", "/render", {"markdown": "# Q", "engine": 1})[0] == 400
+    status, _, body = _request(port, "POST", "/render", {"markdown": "fail"})
+    assert status == 422
+    assert json.loads(body)["error"] == "ValueError: broken exam"
+    assert _request(port, "GET", "/render")[0] == 405
+    assert _request(port, "GET", "/nope")[0] == 404
+
+    status, _, body = _request(port, "GET", "/health")
+    assert status == 200
+    assert json.loads(body)["status"] == "ok"
+    metrics = json.loads(_request(port, "GET", "/metrics")[2])
+    assert (metrics["requests"], metrics["failures"]) == (4, 1)
+    assert "question_cache" in metrics
+
+
+def test_unix_socket(tmp_path: Path) -> None:
+    path = tmp_path / "exam.sock"
+    server = make_server(_StubServer(), socket_path=path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = _UnixConnection(path)
+        connection.request("POST", "/render", body=json.dumps({"markdown": "# Q"}))
+        response = connection.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())["tex"] == "% exam.md\n"
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_resident_service_overrides_the_texsmith_session_hook() -> None:
+    # ResidentConversionService overrides a private ConversionService method.
+    hook = inspect.signature(ConversionService._initialise_template_session)
+    override = inspect.signature(ResidentConversionService._initialise_template_session)
+
+    assert list(hook.parameters) == ["template", "settings", "emitter"]
+    assert hook.parameters["settings"].kind is inspect.Parameter.KEYWORD_ONLY
+    assert hook.parameters["emitter"].kind is inspect.Parameter.KEYWORD_ONLY
+    assert override.parameters.keys() == hook.parameters.keys()
+
+
+def test_real_render_returns_latex(monkeypatch: pytest.MonkeyPatch) -> None:
+    loaded: list[str] = []
+    resident_runtime = batch.resident_runtime
+
+    def _recording(template: str):
+        loaded.append(template)
+        return resident_runtime(template)
+
+    monkeypatch.setattr(batch, "resident_runtime", _recording)
+
+    app = RenderServer(max_concurrent=1)
+    job = RenderJob.from_payload(
+        {
+            "markdown": "# Volcanoes { points=2 }\n\n- [x] Etna\n- [ ] Fuji\n",
+            "config": "title: Demo\n",
+            "attributes": {"solution": True},
+        }
+    )
+
+    output = app.render(job)
+
+    assert "\\begin{document}" in output.tex
+    assert "Etna" in output.tex
+    assert output.pdf is None
+    assert loaded, "TeXSmith no longer calls _initialise_template_session"
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from texsmith.core.templates import load_template
+
 
 TEMPLATE = Path(__file__).resolve().parents[1] / "src/texsmith_template_exam/exam/template/template.tex"
 
@@ -41,3 +43,37 @@ def test_template_supports_version_display() -> None:
     assert "version_value" in text
     assert "exam_version" in text
     assert "date_display" in text
+
+
+def test_template_defines_fixed_choice_columns() -> None:
+    text = _template_text()
+    assert r"\newenvironment{texsmithcolumns}[1]" in text
+    assert r"\WI@maybeRelaxSamepagePenalties" in text
+
+
+def test_template_answer_bar_style_selects_rule_bar() -> None:
+    template = load_template("exam")
+
+    def render(overrides: dict[str, object] | None) -> str:
+        context = template.prepare_context("", overrides=overrides)
+        return template.environment.get_template(template.info.entrypoint).render(context)
+
+    default = render(None)
+    assert r"\newtcolorbox{examanswerbar}" in default
+    assert r"\texsmith@answerbar" not in default
+    rule = render({"exam": {"style": {"answer-bar": "rule"}}})
+    assert r"\newenvironment{examanswerbar}" in rule
+    assert r"\newtcolorbox{examanswerbar}" not in rule
+    assert r"\newtcolorbox{examanswerbar}" in render({"style": {"answer_bar": "dashed"}})
+
+
+def test_template_draws_answer_fillers_from_reused_forms() -> None:
+    text = _template_text()
+    start = text.index(r"\newif\iftexsmithforms")
+    block = text[start : text.index(r"\makeatother", start)]
+    for filler in ("fillwithlines", "fillwithdottedlines", "fillwithgrid"):
+        assert f"\\renewcommand{{\\{filler}}}[1]" in block
+    assert r"\saveboxresource" in block
+    assert r"\pdfxform" in block
+    assert block.count(r"  \texsmith@formrow{") == 3
+    assert block.count("{") == block.count("}")
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from texsmith_template_exam.cli import main
+from texsmith_template_exam.variants import (
+    ShuffleOptions,
+    answer_table,
+    parse_outline,
+    question_count,
+    render_variant,
+    variant_answers,
+)
+
+
+SOURCE = """\
+---
+title: Variants
+---
+
+# Intro {heading=true}
+
+Read carefully.
+
+# Capitals {points=2}
+
+Capital of France?
+
+- [ ] Berlin
+- [x] Paris
+- [ ] Rome
+- [ ] Madrid
+
+```markdown
+- [x] not a choice
+# not a heading
+```
+
+# Rivers
+
+## -
+
+Longest river?
+
+- [x] Nile
+- [ ] Seine
+- [ ] Rhine
+
+## -
+
+Rivers in Europe?
+
+- [x] Danube
+- [ ] Amazon
+- [x] Loire
+
+# Fixed {shuffle=false}
+
+- [x] first
+- [ ] second
+"""
+
+
+def _choices(text: str) -> list[str]:
+    return [line for line in text.splitlines() if line.startswith("- [")]
+
+
+def test_without_shuffling_the_source_is_unchanged() -> None:
+    outline = parse_outline(SOURCE)
+    options = ShuffleOptions(choices=False)
+
+    assert render_variant(outline, 1, options=options) == SOURCE
+    assert question_count(outline) == 3
+
+
+def test_variants_are_deterministic_and_seed_dependent() -> None:
+    outline = parse_outline(SOURCE)
+    options = ShuffleOptions(questions=True, parts=True)
+
+    first = [render_variant(outline, variant, seed=7, options=options) for variant in (1, 2, 3)]
+    again = [render_variant(outline, variant, seed=7, options=options) for variant in (1, 2, 3)]
+    other = [render_variant(outline, variant, seed=8, options=options) for variant in (1, 2, 3)]
+
+    assert first == again
+    assert first != other
+    assert render_variant(parse_outline(SOURCE), 2, seed=7, options=options) == first[1]
+
+
+def test_answer_labels_follow_the_shuffled_choices() -> None:
+    outline = parse_outline(SOURCE)
+    for variant in range(1, 20):
+        text = render_variant(outline, variant, seed=1)
+        answers = variant_answers(outline, variant, seed=1)
+        capitals = _choices(text)[:4]
+        label = answers["1"]
+        assert capitals["ABCD".index(label)] == "- [x] Paris"
+        assert sorted(_choices(text)[:4]) == sorted(_choices(SOURCE)[:4])
+
+
+def test_fenced_code_and_pinned_sections_are_kept() -> None:
+    outline = parse_outline(SOURCE)
+    options = ShuffleOptions(questions=True, parts=True)
+    for variant in range(1, 10):
+        text = render_variant(outline, variant, seed=3, options=options)
+        assert "```markdown\n- [x] not a choice\n# not a heading\n```" in text
+        assert text.index("# Intro") < text.index("# Capitals")
+        assert text.rstrip().endswith("- [x] first\n- [ ] second")
+        assert variant_answers(outline, variant, seed=3, options=options)["3"] == "A"
+
+
+def test_questions_move_only_when_enabled() -> None:
+    outline = parse_outline(SOURCE)
+    orders = {
+        render_variant(outline, variant, options=ShuffleOptions()).index("# Rivers")
+        > render_variant(outline, variant, options=ShuffleOptions()).index("# Capitals")
+        for variant in range(1, 20)
+    }
+    assert orders == {True}
+
+    shuffled = ShuffleOptions(choices=False, questions=True)
+    moved = {
+        render_variant(outline, variant, options=shuffled).index("# Rivers")
+        < render_variant(outline, variant, options=shuffled).index("# Capitals")
+        for variant in range(1, 20)
+    }
+    assert moved == {True, False}
+
+
+def test_answer_table_numbers_questions_across_sources() -> None:
+    outlines = [parse_outline(SOURCE), parse_outline("# Last\n\n- [ ] no\n- [x] yes\n")]
+    table = answer_table(outlines, 50, seed=5)
+
+    assert len(table) == 50
+    assert set(table[0]) == {"1", "2.1", "2.2", "3", "4"}
+    assert {answers["4"] for answers in table} == {"A", "B"}
+    assert all(len(answers["2.2"].split(", ")) == 2 for answers in table)
+
+
+def test_cli_writes_variants_and_answers(tmp_path: Path) -> None:
+    source = tmp_path / "exam.md"
+    source.write_text(SOURCE, encoding="utf-8")
+    output = tmp_path / "out"
+
+    assert main(["variants", str(source), "-n", "3", "--seed", "11", "-o", str(output)]) == 0
+
+    payload = json.loads((output / "answers.json").read_text(encoding="utf-8"))
+    assert list(payload["variants"]) == ["v01", "v02", "v03"]
+    for name, answers in payload["variants"].items():
+        text = (output / name / "exam.md").read_text(encoding="utf-8")
+        capitals = _choices(text)[:4]
+        assert capitals["ABCD".index(answers["1"])] == "- [x] Paris"
+
+
+def test_choice_blocks_follow_the_renderer_inside_containers() -> None:
+    source = (
+        "# Container\n\n"
+        '!!! note "Pick one"\n\n'
+        "    - [ ] red\n"
+        "    - [x] green\n\n"
+        "# Nested\n\n"
+        "- outer\n"
+        "    - [x] inner yes\n"
+        "    - [ ] inner no\n\n"
+        "# Single\n\n"
+        "- [x] only\n"
+    )
+    outline = parse_outline(source)
+    options = ShuffleOptions(choices=False)
+
+    assert variant_answers(outline, 1, options=options) == {"1": "B", "2": "A", "3": "A"}
+    for variant in range(1, 10):
+        text = render_variant(outline, variant, seed=2)
+        colours = [
+            line.strip() for line in text.splitlines() if "] red" in line or "] green" in line
+        ]
+        assert colours["AB".index(variant_answers(outline, variant, seed=2)["1"])] == "- [x] green"
+        assert "- outer\n    - [" in text
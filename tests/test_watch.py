@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from texsmith_template_exam.watch import ExamWatcher, WatchRebuild, watched_paths
+
+
+class _RecordingService:
+    def __init__(self) -> None:
+        self.prepared = 0
+        self.executed: list[object] = []
+
+    def split_inputs(self, inputs: list[Path]) -> SimpleNamespace:
+        return SimpleNamespace(
+            documents=[path for path in inputs if path.suffix == ".md"],
+            bibliography_files=[],
+            front_matter=None,
+            front_matter_path=None,
+        )
+
+    def prepare_documents(self, request) -> object:
+        if any("broken" in Path(path).read_text() for path in request.documents):
+            raise ValueError("cannot parse")
+        self.prepared += 1
+        return object()
+
+    def execute(self, request, *, prepared: object) -> SimpleNamespace:
+        self.executed.append(request)
+        main_tex = Path(request.render_dir) / "main.tex"
+        return SimpleNamespace(render_result=SimpleNamespace(main_tex_path=main_tex))
+
+
+def _sources(tmp_path: Path) -> list[Path]:
+    config = tmp_path / "config.yml"
+    config.write_text("exam:\n  points: true\n", encoding="utf-8")
+    source = tmp_path / "exam.md"
+    source.write_text("# Q1\n", encoding="utf-8")
+    return [config, source]
+
+
+def _edit(path: Path, text: str) -> None:
+    path.write_text(text, encoding="utf-8")
+    info = path.stat()
+    os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns - 10**9))
+
+
+def test_watched_paths_include_source_configs(tmp_path: Path) -> None:
+    config, source = _sources(tmp_path)
+
+    paths = watched_paths([config, source])
+
+    assert paths[:2] == [config, source]
+    assert tmp_path / "common.yml" in paths
+    assert paths.count(config) == 1
+
+
+def test_poll_reports_content_changes_only(tmp_path: Path) -> None:
+    config, source = _sources(tmp_path)
+    watcher = ExamWatcher([config, source], tmp_path / "build", service=_RecordingService())
+
+    _edit(source, "# Q1\n")
+    assert watcher.poll() == []
+    _edit(source, "# Q1 edited\n")
+    (tmp_path / "common.yml").write_text("points: false\n", encoding="utf-8")
+    assert watcher.poll() == [source, tmp_path / "common.yml"]
+    assert watcher.poll() == []
+
+
+def test_wait_for_change_collects_edits_until_they_settle(tmp_path: Path) -> None:
+    config, source = _sources(tmp_path)
+    watcher = ExamWatcher(
+        [config, source], tmp_path / "build", service=_RecordingService(), interval=0.01
+    )
+    _edit(source, "# Q2\n")
+    _edit(config, "exam:\n  points: false\n")
+
+    assert sorted(watcher.wait_for_change()) == sorted([config, source])
+
+    stop = threading.Event()
+    stop.set()
+    assert watcher.wait_for_change(stop) == []
+
+
+def test_rebuild_renders_selected_variants_and_reports_errors(tmp_path: Path) -> None:
+    config, source = _sources(tmp_path)
+    service = _RecordingService()
+    watcher = ExamWatcher(
+        [config, source], tmp_path / "build", variants=["solution"], service=service
+    )
+
+    _edit(source, "# Q2\n")
+    result = watcher.rebuild(watcher.poll())
+
+    assert result.ok
+    assert result.changed == (source,)
+    assert result.latency >= result.elapsed
+    assert list(result.main_tex) == ["solution"]
+    (request,) = service.executed
+    assert request.render_dir == tmp_path / "build" / "solution"
+    assert request.template_options["solution"] is True
+
+    _edit(source, "broken\n")
+    failed = watcher.rebuild(watcher.poll())
+    assert not failed.ok
+    assert failed.error == "ValueError: cannot parse"
+
+
+def test_unknown_variants_are_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="draft"):
+        ExamWatcher(_sources(tmp_path), tmp_path / "build", variants=["draft"])
+
+
+def test_run_rebuilds_after_each_change(tmp_path: Path) -> None:
+    config, source = _sources(tmp_path)
+    service = _RecordingService()
+    watcher = ExamWatcher(
+        [config, source], tmp_path / "build", service=service, interval=0.01, debounce=0.01
+    )
+    stop = threading.Event()
+    reports: list[WatchRebuild] = []
+
+    def report(result: WatchRebuild) -> None:
+        reports.append(result)
+        if len(reports) == 1:
+            _edit(source, "# Q2\n")
+        else:
+            stop.set()
+
+    watcher.run(report, stop=stop)
+
+    assert [result.changed for result in reports] == [(), (source,)]
+    assert service.prepared == 2
+    assert len(service.executed) == 4